@@ -0,0 +1,262 @@
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+class FeatureKernel:
+    """Rolling-window features of OHLCV series from shared block-local prefix sums.
+
+    Rows are split into blocks of ``BLOCK`` rows (or a multiple of it for
+    longer windows). Within each block the values, centered on an anchor
+    taken from that block, and their squares are cumulatively summed once
+    per input. A rolling window then spans at most two blocks, so any
+    rolling mean, sum or standard deviation is O(n) whatever the window.
+    The sums only ever cover a block of nearby values, so they stay small
+    and the variance keeps its precision on long series far from their
+    first value (a single global prefix sum loses it to cancellation).
+
+    Inputs are either single series of shape (n,) or dates x symbols panels
+    of shape (n, m), in which case every statistic is computed for all
+    columns at once; each column may start with its own run of NaN (e.g.
+    symbols listed later).
+
+    Outputs are read-only float arrays in the input's shape, NaN during
+    warm-up, matching ``pandas.Series.rolling(window)`` (``std`` uses
+    ddof=1) for series whose only missing values are leading ones. Every
+    derived array is cached on the kernel.
+    """
+
+    BLOCK = 1024
+
+    def __init__(self, close: np.ndarray, high: Optional[np.ndarray] = None,
+                 low: Optional[np.ndarray] = None, volume: Optional[np.ndarray] = None):
+        close = np.asarray(close, dtype=np.float64)
+        self._vector = close.ndim == 1
+        self._inputs: Dict[str, np.ndarray] = {'close': self._as_panel(close)}
+        for name, values in (('high', high), ('low', low), ('volume', volume)):
+            if values is not None:
+                self._inputs[name] = self._as_panel(np.asarray(values, dtype=np.float64))
+        for values in self._inputs.values():
+            values.flags.writeable = False   # a view, so the caller's array stays writeable
+        self.n = len(close)
+        self._prefix: Dict[Tuple[str, int], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._cache: Dict[Tuple, Any] = {}
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame) -> 'FeatureKernel':
+        """Kernel over the close/high/low/volume columns that are present"""
+        columns = {name: data[name].to_numpy(dtype=np.float64)
+                   for name in ('close', 'high', 'low', 'volume') if name in data}
+        return cls(**columns)
+
+    @staticmethod
+    def _as_panel(values: np.ndarray) -> np.ndarray:
+        return values[:, np.newaxis] if values.ndim == 1 else values[:]
+
+    @staticmethod
+    def _frozen(values: np.ndarray) -> np.ndarray:
+        values.flags.writeable = False
+        return values
+
+    def _output(self, values: np.ndarray) -> np.ndarray:
+        """Drop the column axis again for single-series kernels"""
+        return values[:, 0] if self._vector else values
+
+    def has(self, name: str) -> bool:
+        return name in self._inputs
+
+    def values(self, name: str = 'close') -> np.ndarray:
+        """An input or derived series in the input's shape"""
+        return self._output(self._series(name))
+
+    def _series(self, name: str) -> np.ndarray:
+        if name in self._inputs:
+            return self._inputs[name]
+        derived = {'returns': self._returns, 'true_range': self._true_range,
+                   'gains': self._gains, 'losses': self._losses}
+        if name not in derived:
+            raise KeyError(f"Unknown series: {name}")
+        self._inputs[name] = self._frozen(derived[name]())
+        return self._inputs[name]
+
+    def _block_size(self, window: int) -> int:
+        """A multiple of BLOCK rows that fits the window, or every row when there are fewer"""
+        return min(self.BLOCK * -(-window // self.BLOCK), max(self.n, 1))
+
+    def _blocks(self, name: str, block: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Values centered on their block's anchor (NaN as 0), the anchors and each column's first valid row"""
+        key = (name, block)
+        if key not in self._prefix:
+            values = self._series(name)
+            n, m = values.shape
+            n_blocks = max(-(-n // block), 1)
+            padded = np.full((n_blocks * block, m), np.nan)
+            padded[:n] = values
+            padded = padded.reshape(n_blocks, block, m)
+            # Any value of the block works as its anchor; fmax skips NaN
+            anchors = np.nan_to_num(np.fmax.reduce(padded, axis=1))
+            centered = np.nan_to_num(padded - anchors[:, np.newaxis, :])
+
+            valid = ~np.isnan(values)
+            start = np.where(valid.any(axis=0), valid.argmax(axis=0), n)
+            self._prefix[key] = (centered, anchors, start)
+        return self._prefix[key]
+
+    def _window_sums(self, prefix: np.ndarray, block: int, window: int) -> Tuple[np.ndarray, Any]:
+        """Sums of each full window's rows in the block it starts in and in the next block (0 if none)"""
+        prefix = prefix.reshape(-1, prefix.shape[-1])
+        n = self.n
+        if block >= n:
+            head = prefix[window - 1:n].copy()
+            head[1:] -= prefix[:n - window]
+            return head, 0.0
+        end = np.arange(window - 1, n)
+        first = end - window + 1
+        first_block = first // block
+        before = first - 1
+        has_before = (before >= first_block * block)[:, np.newaxis]
+        block_end = np.minimum((first_block + 1) * block - 1, end)
+        head = prefix[block_end] - np.where(has_before, prefix[np.maximum(before, 0)], 0.0)
+        tail = np.where((block_end < end)[:, np.newaxis], prefix[end], 0.0)
+        return head, tail
+
+    def _anchor_shift(self, anchors: np.ndarray, block: int, window: int) -> Tuple[np.ndarray, Any, Any]:
+        """Anchor of the block each window ends in, and what moves the first block's sums onto it"""
+        if block >= self.n:
+            return anchors[0], 0.0, 0.0
+        end = np.arange(window - 1, self.n)
+        first = end - window + 1
+        count = (np.minimum((first // block + 1) * block, end + 1) - first)[:, np.newaxis]
+        return anchors[end // block], anchors[first // block] - anchors[end // block], count
+
+    def _warm_up(self, values: np.ndarray, start: np.ndarray, window: int) -> np.ndarray:
+        """Full-length output, NaN until each column has a full window"""
+        output = np.full((self.n, values.shape[1]), np.nan)
+        output[window - 1:] = values
+        # Only columns starting with NaN need a longer warm-up
+        late = np.flatnonzero(start > 0)
+        if len(late):
+            columns = output[:, late]
+            columns[np.arange(self.n)[:, np.newaxis] < start[late] + window - 1] = np.nan
+            output[:, late] = columns
+        return self._frozen(output)
+
+    def _rolling_sums(self, window: int, name: str) -> np.ndarray:
+        """Window sums relative to the anchor of the block each window ends in"""
+        key = ('sums', name, window)
+        if key not in self._cache:
+            block = self._block_size(window)
+            centered, anchors, _ = self._blocks(name, block)
+            head, tail = self._window_sums(np.cumsum(centered, axis=1), block, window)
+            _, shift, count = self._anchor_shift(anchors, block, window)
+            self._cache[key] = head + count * shift + tail
+        return self._cache[key]
+
+    def _rolling_mean(self, window: int, name: str) -> np.ndarray:
+        key = ('mean', name, window)
+        if key not in self._cache:
+            block = self._block_size(window)
+            _, anchors, start = self._blocks(name, block)
+            if window > self.n:
+                self._cache[key] = self._frozen(np.full((self.n, anchors.shape[1]), np.nan))
+            else:
+                base, _, _ = self._anchor_shift(anchors, block, window)
+                self._cache[key] = self._warm_up(base + self._rolling_sums(window, name) / window, start, window)
+        return self._cache[key]
+
+    def rolling_mean(self, window: int, name: str = 'close') -> np.ndarray:
+        return self._output(self._rolling_mean(window, name))
+
+    def rolling_sum(self, window: int, name: str = 'close') -> np.ndarray:
+        return self.rolling_mean(window, name) * window
+
+    def rolling_std(self, window: int, name: str = 'close') -> np.ndarray:
+        key = ('std', name, window)
+        if key not in self._cache:
+            block = self._block_size(window)
+            centered, anchors, start = self._blocks(name, block)
+            if window > self.n:
+                self._cache[key] = self._frozen(np.full((self.n, anchors.shape[1]), np.nan))
+            else:
+                # Centered squares of the first block moved onto the end block's anchor:
+                # sum (y + d)^2 = sum y^2 + 2 d sum y + k d^2
+                squares, tail = self._window_sums(np.cumsum(centered * centered, axis=1), block, window)
+                if block < self.n:
+                    linear_head, _ = self._window_sums(np.cumsum(centered, axis=1), block, window)
+                    _, shift, count = self._anchor_shift(anchors, block, window)
+                    squares = squares + 2 * shift * linear_head + count * shift * shift + tail
+                sums = self._rolling_sums(window, name)
+                variance = np.maximum(squares - sums * sums / window, 0.0) / (window - 1)
+                self._cache[key] = self._warm_up(np.sqrt(variance), start, window)
+        return self._output(self._cache[key])
+
+    @property
+    def returns(self) -> np.ndarray:
+        """Simple returns, NaN for the first bar (like pct_change)"""
+        return self.values('returns')
+
+    def atr(self, window: int = 14) -> np.ndarray:
+        """Average true range as a simple rolling mean of the true range"""
+        return self.rolling_mean(window, 'true_range')
+
+    def rsi(self, window: int = 14) -> np.ndarray:
+        """RSI from simple rolling averages of gains and losses"""
+        key = ('rsi', window)
+        if key not in self._cache:
+            gains = self._rolling_mean(window, 'gains')
+            losses = self._rolling_mean(window, 'losses')
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rsi = 100 - 100 / (1 + gains / losses)
+            # Like the pandas formula: 100 without losses, NaN on flat windows
+            rsi = np.where(losses == 0, np.where(gains > 0, 100.0, np.nan), rsi)
+            rsi[np.isnan(gains)] = np.nan
+            self._cache[key] = self._frozen(rsi)
+        return self._output(self._cache[key])
+
+    def _drawdown(self) -> np.ndarray:
+        key = ('drawdown',)
+        if key not in self._cache:
+            close = self._inputs['close']
+            self._cache[key] = self._frozen(close / np.fmax.accumulate(close, axis=0) - 1)
+        return self._cache[key]
+
+    @property
+    def drawdown(self) -> np.ndarray:
+        """Close relative to its running peak minus one (0 at new highs)"""
+        return self._output(self._drawdown())
+
+    @property
+    def max_drawdown(self) -> Union[float, np.ndarray]:
+        """Worst drawdown, a float for a single series or one value per column"""
+        drawdown = self._drawdown()
+        worst = np.zeros(drawdown.shape[1])
+        has_data = ~np.isnan(drawdown).all(axis=0)
+        worst[has_data] = np.nanmin(drawdown[:, has_data], axis=0)
+        return float(worst[0]) if self._vector else worst
+
+    def _returns(self) -> np.ndarray:
+        close = self._inputs['close']
+        returns = np.full(close.shape, np.nan)
+        returns[1:] = close[1:] / close[:-1] - 1
+        return returns
+
+    def _previous_close(self) -> np.ndarray:
+        close = self._inputs['close']
+        return np.concatenate([np.full((1, close.shape[1]), np.nan), close[:-1]])
+
+    def _true_range(self) -> np.ndarray:
+        close = self._inputs['close']
+        high = self._inputs.get('high', close)
+        low = self._inputs.get('low', close)
+        previous = self._previous_close()
+        # fmax ignores the missing previous close on the first bar
+        return np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+
+    def _gains(self) -> np.ndarray:
+        change = self._inputs['close'] - self._previous_close()
+        return np.where(np.isnan(change), np.nan, np.maximum(change, 0.0))
+
+    def _losses(self) -> np.ndarray:
+        change = self._inputs['close'] - self._previous_close()
+        return np.where(np.isnan(change), np.nan, np.maximum(-change, 0.0))
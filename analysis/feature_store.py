@@ -0,0 +1,255 @@
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analysis.feature_kernel import FeatureKernel
+
+try:
+    import pyarrow  # noqa: F401  (needed by DataFrame.to_parquet)
+except ImportError:
+    pyarrow = None
+
+
+def _returns(values: np.ndarray, periods: int) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    out[periods:] = values[periods:] / values[:-periods] - 1
+    return out
+
+
+def _ema(values: np.ndarray, span: int, previous: Optional[float] = None) -> np.ndarray:
+    """pandas ``ewm(span, adjust=False)``, continuing from ``previous`` when given"""
+    if previous is None:
+        return pd.Series(values).ewm(span=span, adjust=False).mean().to_numpy()
+    seeded = np.concatenate([[previous], values])
+    return pd.Series(seeded).ewm(span=span, adjust=False).mean().to_numpy()[1:]
+
+
+# name -> (function of the input column, rows of lookback each value needs, default params)
+WINDOWED_FEATURES: Dict[str, Tuple[Callable, Callable, Dict]] = {
+    'returns': (lambda values, periods: _returns(values, periods), lambda periods: periods, {'periods': 1}),
+    'sma': (lambda values, window: FeatureKernel(values).rolling_mean(window), lambda window: window - 1, {'window': 20}),
+    'volatility': (lambda values, window: FeatureKernel(values).rolling_std(window, 'returns'),
+                   lambda window: window, {'window': 20}),
+    'rsi': (lambda values, period: FeatureKernel(values).rsi(period), lambda period: period, {'period': 14}),
+}
+RECURSIVE_FEATURES = {'ema': {'span': 20}}
+DERIVED_FEATURES = {'macd': {'fast': 12, 'slow': 26}}
+
+
+def feature_key(name: str, column: str = 'close', **params) -> str:
+    """Canonical column name of a feature, e.g. ``sma|close|window=50``"""
+    defaults = {**WINDOWED_FEATURES, **{k: (None, None, v) for k, v in RECURSIVE_FEATURES.items()}}
+    if name not in defaults:
+        raise KeyError(f"Unknown feature: {name}")
+    unknown = set(params) - set(defaults[name][2])
+    if unknown:
+        raise ValueError(f"Unknown parameters for {name}: {', '.join(sorted(unknown))}")
+    params = {**defaults[name][2], **params}
+    return '|'.join([name, column] + [f'{k}={params[k]}' for k in sorted(params)])
+
+
+def _parse_key(key: str) -> Tuple[str, str, Dict[str, int]]:
+    name, column, *pairs = key.split('|')
+    return name, column, {k: int(v) for k, v in (pair.split('=') for pair in pairs)}
+
+
+class _SymbolFeatures:
+    """Input columns and computed features of one symbol, aligned on one index"""
+
+    def __init__(self, index: np.ndarray):
+        self.index = index
+        self.inputs: Dict[str, np.ndarray] = {}
+        self.features: Dict[str, np.ndarray] = {}
+
+
+class FeatureStore:
+    """Per-symbol feature columns that grow incrementally as bars arrive.
+
+    Features are keyed by (symbol, feature, params) and computed once over
+    the stored history. ``append`` adds bars at timestamps not stored yet
+    and overwrites stored bars whose values changed, and every registered
+    feature is extended from the earliest added or revised row (plus the
+    lookback it needs) rather than recomputed. Windowed features reuse
+    ``FeatureKernel``; EMAs continue their recursion from the last stored
+    value, so extended columns match a full recomputation.
+
+    With a ``root`` directory each symbol is persisted column by column to
+    ``<root>/<symbol>.parquet`` (needs pyarrow) or ``.npz`` on ``flush`` and
+    reloaded on first use. In ``.npz`` files a datetime index is stored as
+    int64 nanoseconds plus its unit and time zone name, so no pickling is
+    needed.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root
+        self._symbols: Dict[str, _SymbolFeatures] = {}
+        self._dirty = set()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def bars_from_frame(data: pd.DataFrame) -> pd.DataFrame:
+        """Bars indexed by their 'timestamp' or 'date' column when present, else by the frame index"""
+        for column in ('timestamp', 'date'):
+            if column in data:
+                return data.set_index(pd.to_datetime(data[column])).drop(columns=column)
+        return data
+
+    def append(self, symbol: str, bars: pd.DataFrame) -> int:
+        """Store new and revised bars and bring every feature up to date; returns rows added or revised
+
+        Bars older than the last stored one (backfills) are merged into
+        place, and bars at stored timestamps whose values changed (e.g. an
+        updated last bar) overwrite the stored ones. Features are
+        recomputed from the earliest added or revised row. Numeric columns
+        not stored before are added for the whole stored history, aligned
+        on the index.
+        """
+        bars = self.bars_from_frame(bars).sort_index()
+        bars = bars[~bars.index.duplicated(keep='last')]
+        columns = [column for column in bars.columns if pd.api.types.is_numeric_dtype(bars[column])]
+        with self._lock:
+            state = self._load(symbol)
+            if state is None:
+                state = self._symbols[symbol] = _SymbolFeatures(bars.index.to_numpy()[:0])
+
+            for column in columns:
+                if column not in state.inputs:
+                    aligned = bars[column].reindex(pd.Index(state.index)) if len(state.index) else bars[column].iloc[:0]
+                    state.inputs[column] = aligned.to_numpy(dtype=np.float64)
+
+            stored = pd.Index(state.index)
+            is_stored = bars.index.isin(stored)
+            new = bars[~is_stored]
+            # Rows before ``start`` are unchanged; later ones may be revised or shift when bars are backfilled
+            start = len(stored)
+            revised = self._revise(state, bars[is_stored], stored)
+            if len(revised):
+                start = revised.min()
+            if new.empty and not len(revised):
+                return 0
+            first_new = stored.searchsorted(new.index.min()) if len(new) else len(stored)
+            start = min(start, first_new)
+            order = None if first_new == len(stored) else np.argsort(stored.append(new.index), kind='stable')
+            state.index = np.concatenate([state.index, new.index.to_numpy()])
+            for column in state.inputs:
+                values = new[column].to_numpy(dtype=np.float64) if column in new else np.full(len(new), np.nan)
+                state.inputs[column] = np.concatenate([state.inputs[column], values])
+            if order is not None:
+                state.index = state.index[order]
+                state.inputs = {column: values[order] for column, values in state.inputs.items()}
+            for key in state.features:
+                state.features[key] = np.concatenate([state.features[key][:start], self._extend(state, key, start)])
+            self._dirty.add(symbol)
+            return len(new) + len(revised)
+
+    @staticmethod
+    def _revise(state: _SymbolFeatures, bars: pd.DataFrame, stored: pd.Index) -> np.ndarray:
+        """Overwrite stored inputs that ``bars`` (all at stored timestamps) changed; returns the changed rows"""
+        if bars.empty:
+            return np.array([], dtype=np.intp)
+        positions = stored.get_indexer(bars.index)
+        columns = [column for column in state.inputs if column in bars]
+        changed = np.zeros(len(bars), dtype=bool)
+        for column in columns:
+            values, previous = bars[column].to_numpy(dtype=np.float64), state.inputs[column][positions]
+            changed |= ~((values == previous) | (np.isnan(values) & np.isnan(previous)))
+        rows = positions[changed]
+        if len(rows):
+            for column in columns:
+                state.inputs[column] = state.inputs[column].copy()
+                state.inputs[column][rows] = bars[column].to_numpy(dtype=np.float64)[changed]
+        return rows
+
+    def get(self, symbol: str, name: str, column: str = 'close', **params) -> pd.Series:
+        """One feature column over the stored history, computing and registering it on first use"""
+        if name in DERIVED_FEATURES:
+            params = {**DERIVED_FEATURES[name], **params}
+            return (self.get(symbol, 'ema', column, span=params['fast'])
+                    - self.get(symbol, 'ema', column, span=params['slow'])).rename(f'{name}|{column}')
+
+        key = feature_key(name, column, **params)
+        with self._lock:
+            state = self._load(symbol)
+            if state is None or column not in state.inputs:
+                raise KeyError(f"No {column} data stored for {symbol}")
+            if key not in state.features:
+                state.features[key] = self._extend(state, key, 0)
+                self._dirty.add(symbol)
+            return pd.Series(state.features[key], index=pd.Index(state.index), name=key)
+
+    def frame(self, symbol: str, features: List[Tuple[str, Dict]]) -> pd.DataFrame:
+        """Several features as one frame, from (name, params) pairs (params may set 'column')"""
+        columns = {}
+        for name, params in features:
+            series = self.get(symbol, name, **params)
+            columns[series.name] = series
+        return pd.DataFrame(columns)
+
+    def _extend(self, state: _SymbolFeatures, key: str, start: int) -> np.ndarray:
+        """Values of feature ``key`` for rows ``start`` onwards"""
+        name, column, params = _parse_key(key)
+        values = state.inputs[column]
+        if name in RECURSIVE_FEATURES:
+            previous = state.features[key][start - 1] if start > 0 else None
+            return _ema(values[start:], previous=previous, **params)
+        function, lookback, _ = WINDOWED_FEATURES[name]
+        first = max(start - lookback(**params), 0)
+        return function(values[first:], **params)[start - first:]
+
+    def flush(self, symbol: Optional[str] = None):
+        """Write changed symbols (or one symbol) to ``root``"""
+        if self.root is None:
+            return
+        with self._lock:
+            for name in ([symbol] if symbol is not None else list(self._dirty)):
+                if name in self._symbols:
+                    self._write(name, self._symbols[name])
+                    self._dirty.discard(name)
+
+    def _path(self, symbol: str, extension: str) -> str:
+        return os.path.join(self.root, f'{symbol}.{extension}')
+
+    def _write(self, symbol: str, state: _SymbolFeatures):
+        os.makedirs(self.root, exist_ok=True)
+        columns = {f'input:{column}': values for column, values in state.inputs.items()}
+        columns.update(state.features)
+        index = pd.Index(state.index)
+        if pyarrow is not None:
+            frame = pd.DataFrame(columns)
+            frame.insert(0, 'index', index)
+            frame.to_parquet(self._path(symbol, 'parquet'), index=False)
+        elif isinstance(index, pd.DatetimeIndex):
+            np.savez(self._path(symbol, 'npz'), index=index.as_unit('ns').asi8, index_unit=np.array(index.unit),
+                     index_tz=np.array(str(index.tz or '')), **columns)
+        else:
+            np.savez(self._path(symbol, 'npz'), index=state.index, **columns)
+
+    def _load(self, symbol: str) -> Optional[_SymbolFeatures]:
+        """In-memory features of a symbol, read from ``root`` on first use"""
+        if symbol in self._symbols or self.root is None:
+            return self._symbols.get(symbol)
+        if pyarrow is not None and os.path.exists(self._path(symbol, 'parquet')):
+            frame = pd.read_parquet(self._path(symbol, 'parquet'))
+            columns = {name: frame[name].to_numpy() for name in frame.columns}
+        elif os.path.exists(self._path(symbol, 'npz')):
+            with np.load(self._path(symbol, 'npz'), allow_pickle=False) as data:
+                columns = {name: data[name] for name in data.files}
+        else:
+            return None
+
+        index = columns.pop('index')
+        if 'index_tz' in columns:
+            tz, unit = str(columns.pop('index_tz')), str(columns.pop('index_unit'))
+            index = pd.DatetimeIndex(index.view('datetime64[ns]')).as_unit(unit)
+            index = (index.tz_localize('UTC').tz_convert(tz) if tz else index).to_numpy()
+        state = _SymbolFeatures(index)
+        for name, values in columns.items():
+            if name.startswith('input:'):
+                state.inputs[name[len('input:'):]] = values
+            else:
+                state.features[name] = values
+        self._symbols[symbol] = state
+        return state
@@ -1,8 +1,13 @@
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Optional
 import pandas as pd
 import numpy as np
 from dataclasses import dataclass
 
+from analysis.feature_kernel import FeatureKernel
+from analysis.feature_store import FeatureStore
+
 @dataclass
 class TechnicalSignal:
     indicator: str
@@ -12,18 +17,181 @@ class TechnicalSignal:
     limitations: List[str]
 
 class TechnicalAnalyzer:
-    def __init__(self):
+    def __init__(self, cache_size: int = 256, feature_store: Optional[FeatureStore] = None):
         self.trend_threshold = 0.02  # 2% threshold for trend confirmation
         self.stop_loss_default = 0.05  # 5% default stop loss
+        self.cache_size = cache_size
+        self.feature_store = feature_store  # moving averages and RSI of named symbols come from here
+        self._cache: OrderedDict = OrderedDict()  # (symbol, last timestamp, bars) -> analysis
+        self._local = threading.local()  # kernel of the analysis running on this thread
         
-    def analyze_stock(self, data: pd.DataFrame, include_fundamentals: bool = True) -> Dict:
+    def analyze_stock(self, data: pd.DataFrame, include_fundamentals: bool = True,
+                      symbol: Optional[str] = None) -> Dict:
         """
         Multi-factor technical analysis with risk management
         
         Args:
             data: DataFrame with OHLCV data
             include_fundamentals: Whether to include fundamental metrics
+            symbol: Enables memoization per (symbol, last timestamp), so
+                repeated analyses within the same bar are free
         """
+        key = None
+        if symbol is not None and len(data):
+            key = (symbol, self._last_timestamp(data), len(data), include_fundamentals)
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        
+        # Every helper reads its rolling statistics from one shared kernel
+        self._local.kernel = FeatureKernel.from_frame(data)
+        if self.feature_store is not None and symbol is not None:
+            self.feature_store.append(symbol, data)
+            self._local.stored = (symbol, FeatureStore.bars_from_frame(data).index)
+        try:
+            analysis = self._analyze(data)
+        finally:
+            self._local.kernel = None
+            self._local.stored = None
+        
+        if key is not None:
+            self._cache[key] = analysis
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return analysis
+    
+    def analyze_universe(self, close: pd.DataFrame, high: Optional[pd.DataFrame] = None,
+                         low: Optional[pd.DataFrame] = None,
+                         volume: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """Rank a whole universe from dates x symbols panels in one vectorized pass.
+        
+        Applies the same trend, signal, risk and stop-loss rules as
+        ``analyze_stock`` to every column at once through a panel
+        FeatureKernel. Windows count panel rows, so symbols with a shorter
+        history simply stay in warm-up longer.
+        
+        Returns one row per symbol sorted by ``score`` (the confidence-weighted
+        signal strength, positive for buy), best first.
+        """
+        kernel = FeatureKernel(close.to_numpy(dtype=np.float64),
+                               None if high is None else high.reindex_like(close).to_numpy(dtype=np.float64),
+                               None if low is None else low.reindex_like(close).to_numpy(dtype=np.float64),
+                               None if volume is None else volume.reindex_like(close).to_numpy(dtype=np.float64))
+        prices = kernel.values('close')
+        n_bars = len(close)
+        
+        # Trend alignment across 20/50/200-bar windows
+        directions, consistencies = [], []
+        for window in (20, 50, 200):
+            ma = kernel.rolling_mean(window)
+            slope = np.full(ma.shape, np.nan)
+            slope[5:] = (ma[5:] - ma[:-5]) / ma[:-5]
+            recent = slope[-20:]
+            valid = ~np.isnan(recent)
+            agree = (np.sign(recent) == np.sign(slope[-1])) & valid
+            directions.append(slope[-1] > self.trend_threshold)
+            consistencies.append(np.divide(agree.sum(axis=0), valid.sum(axis=0),
+                                           out=np.zeros(close.shape[1]), where=valid.any(axis=0)))
+        aligned = (directions[0] == directions[1]) & (directions[1] == directions[2])
+        primary_up = directions[2]
+        
+        # Individual signals, as in the _analyze_* helpers
+        short_ma, long_ma = kernel.rolling_mean(50)[-1], kernel.rolling_mean(200)[-1]
+        short_only = np.isnan(long_ma)
+        if short_only.any():
+            short_ma = np.where(short_only, kernel.rolling_mean(20)[-1], short_ma)
+            long_ma = np.where(short_only, kernel.rolling_mean(min(50, n_bars))[-1], long_ma)
+        spread = np.nan_to_num((short_ma - long_ma) / long_ma)
+        ma_strength = np.clip(spread / self.trend_threshold, -1, 1)
+        
+        rsi_strength = np.nan_to_num((50 - kernel.rsi(14)[-1]) / 50)
+        
+        volume_confidence = 0.4 if volume is not None else 0.0
+        volume_strength = np.zeros(close.shape[1])
+        if volume is not None:
+            average = kernel.rolling_mean(20, 'volume')[-1]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                surge = np.where(np.isnan(average) | (average == 0), 0.0, kernel.values('volume')[-1] / average - 1)
+            volume_strength = np.sign(np.nan_to_num(kernel.returns[-1])) * np.clip(np.nan_to_num(surge), 0, 1)
+        
+        mean, std = kernel.rolling_mean(20)[-1], kernel.rolling_std(20)[-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percent_b = np.where(np.isnan(std) | (std == 0), 0.5, (prices[-1] - (mean - 2 * std)) / (4 * std))
+        bb_strength = np.clip((0.5 - percent_b) * 2, -1, 1)
+        
+        # Confidence-weighted combination; the alignment multiplier cancels out
+        score = ((0.6 * ma_strength + 0.5 * rsi_strength + volume_confidence * volume_strength + 0.4 * bb_strength)
+                 / (0.6 + 0.5 + volume_confidence + 0.4))
+        
+        # Risk metrics
+        returns = kernel.returns
+        valid_returns = ~np.isnan(returns)
+        volatility = self._nan_std(returns) * np.sqrt(252)
+        gains = np.where(returns > 0, returns, 0.0)
+        losses = np.where(returns < 0, returns, 0.0)
+        gain_count, loss_count = (returns > 0).sum(axis=0), (returns < 0).sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            risk_reward = np.where((gain_count > 0) & (loss_count > 0),
+                                   (gains.sum(axis=0) / gain_count) / np.abs(losses.sum(axis=0) / loss_count), 0.0)
+        var_95 = np.full(close.shape[1], np.nan)
+        complete = valid_returns[1:].all(axis=0)
+        var_95[complete] = np.quantile(returns[1:, complete], 0.05, axis=0)
+        partial = ~complete & valid_returns.any(axis=0)
+        if partial.any():
+            var_95[partial] = np.nanquantile(returns[:, partial], 0.05, axis=0)
+        
+        # Stop levels
+        atr = kernel.atr(14)[-1]
+        missing = np.isnan(atr)
+        if missing.any():
+            true_range = kernel.values('true_range')[:, missing]
+            atr[missing] = np.nansum(true_range, axis=0) / np.maximum((~np.isnan(true_range)).sum(axis=0), 1)
+        atr = atr / prices[-1]
+        volatility_based = atr * 2
+        recent_high = np.where(np.isnan(prices[-20:]), -np.inf, prices[-20:]).max(axis=0)
+        
+        result = pd.DataFrame({
+            'score': score,
+            'signal': np.where(score > 0, 'buy', 'sell'),
+            'strength': np.abs(score),
+            'confidence': (consistencies[0] + consistencies[1] + consistencies[2]) / 3,
+            'aligned': aligned,
+            'primary_trend': np.where(primary_up, 'up', 'down'),
+            'against_trend': ((score > 0) & ~primary_up) | ((score < 0) & primary_up),
+            'ma_strength': ma_strength,
+            'rsi_strength': rsi_strength,
+            'volume_strength': volume_strength,
+            'bollinger_strength': bb_strength,
+            'volatility': volatility,
+            'max_drawdown': kernel.max_drawdown,
+            'var_95': var_95,
+            'risk_reward_ratio': risk_reward,
+            'atr': atr,
+            'technical_stop': np.minimum(volatility_based, self.stop_loss_default),
+            'risk_adjusted_stop': np.clip(np.maximum(volatility_based, 2 * np.nan_to_num(volatility / np.sqrt(252))),
+                                          0.01, 0.2),
+            'trailing_stop': np.where(np.isinf(recent_high), np.nan, recent_high) * (1 - 2 * atr),
+        }, index=pd.Index(close.columns, name='symbol'))
+        return result.sort_values('score', ascending=False, kind='stable')
+    
+    @staticmethod
+    def _nan_std(values: np.ndarray) -> np.ndarray:
+        """Column standard deviation skipping NaN (ddof=1), NaN below two values"""
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=0)
+        mean = np.where(valid, values, 0.0).sum(axis=0) / np.maximum(count, 1)
+        squares = np.where(valid, (values - mean) ** 2, 0.0).sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(count > 1, np.sqrt(squares / (count - 1)), np.nan)
+    
+    @staticmethod
+    def _last_timestamp(data: pd.DataFrame):
+        for column in ('timestamp', 'date'):
+            if column in data:
+                return data[column].iloc[-1]
+        return data.index[-1]
+        
+    def _analyze(self, data: pd.DataFrame) -> Dict:
         signals = []
         
         # Multiple timeframe analysis
@@ -56,10 +224,35 @@ class TechnicalAnalyzer:
             'limitations': self._get_analysis_limitations(data)
         }
         
+    def _kernel_for(self, data: pd.DataFrame) -> FeatureKernel:
+        """Kernel of the analysis in progress, or a fresh one for direct helper calls"""
+        kernel = getattr(self._local, 'kernel', None)
+        if kernel is None or kernel.n != len(data):
+            kernel = FeatureKernel.from_frame(data)
+        return kernel
+        
+    def _stored(self, data: pd.DataFrame, name: str, **params) -> Optional[np.ndarray]:
+        """A feature store column aligned with ``data``, when the analysis in progress is store-backed"""
+        context = getattr(self._local, 'stored', None)
+        if context is None or len(context[1]) != len(data):
+            return None
+        symbol, index = context
+        return self.feature_store.get(symbol, name, **params).reindex(index).to_numpy()
+        
+    def _rolling_mean(self, data: pd.DataFrame, window: int) -> np.ndarray:
+        stored = self._stored(data, 'sma', window=window)
+        return stored if stored is not None else self._kernel_for(data).rolling_mean(window)
+        
+    def _rsi(self, data: pd.DataFrame, period: int = 14) -> np.ndarray:
+        stored = self._stored(data, 'rsi', period=period)
+        return stored if stored is not None else self._kernel_for(data).rsi(period)
+        
     def _analyze_trend(self, data: pd.DataFrame, window: int) -> Dict:
         """Analyze trend with multiple confirmation factors"""
-        ma = data['close'].rolling(window=window).mean()
-        slope = (ma - ma.shift(5)) / ma.shift(5)
+        ma = self._rolling_mean(data, window)
+        slope = np.full(len(ma), np.nan)
+        slope[5:] = (ma[5:] - ma[:-5]) / ma[:-5]
+        slope = pd.Series(slope)
         
         return {
             'direction': 'up' if slope.iloc[-1] > self.trend_threshold else 'down',
@@ -78,11 +271,12 @@ class TechnicalAnalyzer:
         
     def _calculate_risk_metrics(self, data: pd.DataFrame) -> Dict:
         """Calculate comprehensive risk metrics"""
-        returns = data['close'].pct_change()
+        kernel = self._kernel_for(data)
+        returns = pd.Series(kernel.returns)
         
         return {
             'volatility': returns.std() * np.sqrt(252),  # Annualized volatility
-            'max_drawdown': self._calculate_max_drawdown(data['close']),
+            'max_drawdown': kernel.max_drawdown,
             'var_95': returns.quantile(0.05),  # 95% VaR
             'risk_reward_ratio': self._calculate_risk_reward_ratio(returns)
         }
@@ -133,4 +327,103 @@ class TechnicalAnalyzer:
     def _check_against_trend(self, signal_score: float, trend_alignment: Dict) -> bool:
         """Detect if trading against the main trend"""
         return (signal_score > 0 and trend_alignment['primary_trend'] == 'down') or \
-               (signal_score < 0 and trend_alignment['primary_trend'] == 'up')
\ No newline at end of file
+               (signal_score < 0 and trend_alignment['primary_trend'] == 'up')
+        
+    def _calculate_trend_consistency(self, slope: pd.Series, lookback: int = 20) -> float:
+        """Share of recent slope readings agreeing with the latest direction"""
+        recent = slope.dropna().iloc[-lookback:]
+        if recent.empty:
+            return 0.0
+        return float((np.sign(recent) == np.sign(recent.iloc[-1])).mean())
+        
+    def _analyze_moving_averages(self, data: pd.DataFrame) -> TechnicalSignal:
+        """Golden/death cross: 50-day versus 200-day moving average"""
+        short_ma, long_ma = self._rolling_mean(data, 50)[-1], self._rolling_mean(data, 200)[-1]
+        limitations = ["Moving averages lag price"]
+        if np.isnan(long_ma):
+            short_ma, long_ma = self._rolling_mean(data, 20)[-1], self._rolling_mean(data, min(50, len(data)))[-1]
+            limitations.append("Fewer than 200 bars, using 20/50-day averages")
+        spread = 0.0 if np.isnan(short_ma) or np.isnan(long_ma) else (short_ma - long_ma) / long_ma
+        return TechnicalSignal(
+            indicator='moving_averages',
+            signal='buy' if spread > 0 else 'sell',
+            strength=float(np.clip(spread / self.trend_threshold, -1, 1)),
+            confidence=0.6,
+            limitations=limitations
+        )
+        
+    def _analyze_momentum(self, data: pd.DataFrame) -> TechnicalSignal:
+        """RSI(14): oversold readings argue for buying, overbought for selling"""
+        rsi = self._rsi(data, 14)[-1]
+        strength = 0.0 if np.isnan(rsi) else (50 - rsi) / 50
+        return TechnicalSignal(
+            indicator='rsi',
+            signal='buy' if strength > 0 else 'sell',
+            strength=float(strength),
+            confidence=0.5,
+            limitations=["RSI can stay overbought or oversold in strong trends"]
+        )
+        
+    def _analyze_volume(self, data: pd.DataFrame) -> TechnicalSignal:
+        """Volume surge relative to its 20-day average, signed by the day's move"""
+        kernel = self._kernel_for(data)
+        if not kernel.has('volume'):
+            return TechnicalSignal('volume', 'hold', 0.0, 0.0, ["No volume data"])
+        average = kernel.rolling_mean(20, 'volume')[-1]
+        surge = 0.0 if np.isnan(average) or average == 0 else kernel.values('volume')[-1] / average - 1
+        direction = np.sign(np.nan_to_num(kernel.returns[-1]))
+        strength = float(direction * np.clip(surge, 0, 1))
+        return TechnicalSignal(
+            indicator='volume',
+            signal='buy' if strength > 0 else 'sell',
+            strength=strength,
+            confidence=0.4,
+            limitations=["Volume spikes can come from one-off events"]
+        )
+        
+    def _analyze_volatility(self, data: pd.DataFrame) -> TechnicalSignal:
+        """Bollinger %B(20, 2): closes near the lower band argue for buying"""
+        kernel = self._kernel_for(data)
+        mean, std = kernel.rolling_mean(20)[-1], kernel.rolling_std(20)[-1]
+        if np.isnan(std) or std == 0:
+            percent_b = 0.5
+        else:
+            percent_b = (kernel.values('close')[-1] - (mean - 2 * std)) / (4 * std)
+        strength = float(np.clip((0.5 - percent_b) * 2, -1, 1))
+        return TechnicalSignal(
+            indicator='bollinger_bands',
+            signal='buy' if strength > 0 else 'sell',
+            strength=strength,
+            confidence=0.4,
+            limitations=["Band touches are not signals on their own in trending markets"]
+        )
+        
+    def _calculate_max_drawdown(self, prices: pd.Series) -> float:
+        """Largest peak-to-trough decline as a negative fraction"""
+        return FeatureKernel(prices.to_numpy(dtype=np.float64)).max_drawdown
+        
+    def _calculate_risk_reward_ratio(self, returns: pd.Series) -> float:
+        """Average gain over average loss"""
+        gains = returns[returns > 0]
+        losses = returns[returns < 0]
+        if gains.empty or losses.empty:
+            return 0.0
+        return float(gains.mean() / abs(losses.mean()))
+        
+    def _calculate_atr(self, data: pd.DataFrame, window: int = 14) -> float:
+        """Latest ATR as a fraction of the close"""
+        kernel = self._kernel_for(data)
+        atr = kernel.atr(window)[-1]
+        if np.isnan(atr):
+            atr = np.nanmean(kernel.values('true_range'))
+        return float(atr / kernel.values('close')[-1])
+        
+    def _adjust_stop_loss(self, stop: float, risk_metrics: Dict) -> float:
+        """Widen the stop to at least two days of volatility, capped at 20%"""
+        daily_volatility = risk_metrics['volatility'] / np.sqrt(252)
+        return float(np.clip(max(stop, 2 * np.nan_to_num(daily_volatility)), 0.01, 0.2))
+        
+    def _calculate_trailing_stop(self, data: pd.DataFrame, atr: float, lookback: int = 20) -> float:
+        """Price level two ATRs below the highest recent close"""
+        recent_high = self._kernel_for(data).values('close')[-lookback:].max()
+        return float(recent_high * (1 - 2 * atr))
@@ -0,0 +1,128 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Set, Tuple
+
+
+class MicroBatcher:
+    """Groups concurrent async requests into batches run in worker threads.
+
+    ``submit`` queues an item and awaits its result. A collector task takes
+    the first queued item, waits at most ``max_wait_ms`` for more (up to
+    ``max_batch_size``) and hands the batch to ``handler`` in a thread pool,
+    so the event loop never blocks on inference. ``handler`` receives the
+    list of items and returns one result per item (any other count fails
+    the whole batch); a result that is an exception is raised to that
+    item's caller only. Up to ``workers``
+    batches run at once while the next one is being collected.
+    """
+
+    def __init__(self, handler: Callable[[List[Any]], List[Any]], max_batch_size: int = 64,
+                 max_wait_ms: float = 5.0, workers: int = 1):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.workers = workers
+        self.batches = 0
+        self.items = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._dispatches: Set[asyncio.Task] = set()
+
+    def start(self):
+        """Start collecting; must be called from the event loop that submits"""
+        if self._collector is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='micro-batch')
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.workers)
+            self._collector = asyncio.get_running_loop().create_task(self._collect())
+
+    async def stop(self):
+        """Stop collecting, finish the batches in flight and release the worker threads
+
+        Requests not yet dispatched to a worker, whether still queued or
+        collected into a batch waiting for a free worker, fail with a
+        RuntimeError instead of waiting forever.
+        """
+        if self._collector is None:
+            return
+        self._collector.cancel()
+        try:
+            await self._collector
+        except asyncio.CancelledError:
+            pass
+        while not self._queue.empty():
+            self._fail([self._queue.get_nowait()])
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+        self._collector = None
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                await self._slots.acquire()
+                task = loop.create_task(self._dispatch(batch))
+                self._dispatches.add(task)
+                task.add_done_callback(self._dispatches.discard)
+                batch = []
+        except asyncio.CancelledError:
+            self._fail(batch)
+            raise
+
+    @staticmethod
+    def _fail(batch: List[Tuple[Any, asyncio.Future]]):
+        """Fail the callers of requests that will never be dispatched"""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(RuntimeError("Batcher stopped before the request was dispatched"))
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        try:
+            items = [item for item, _ in batch]
+            self.batches += 1
+            self.items += len(items)
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(self._executor, self.handler, items)
+                results = list(results)
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Batch handler returned {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                results = [e] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if future.done():   # caller went away
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        finally:
+            self._slots.release()
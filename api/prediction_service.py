@@ -1,6 +1,6 @@
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Tuple
 from datetime import datetime
 import uvicorn
 import logging
@@ -11,18 +11,62 @@ import os
 # Add the project root to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from api.micro_batcher import MicroBatcher
 from models.price_predictor import PricePredictor
+from models.serving_registry import ServingRegistry
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="StockIntel Prediction API")
-predictor = PricePredictor()
+# Models are loaded once into the shared registry and only read by requests
+registry = ServingRegistry(
+    loader=PricePredictor.load_entry,
+    memory_budget_mb=float(os.getenv('MODEL_MEMORY_BUDGET_MB', '1024')),
+    poll_interval=float(os.getenv('MODEL_POLL_SECONDS', '30'))
+)
+# Symbols trained into the multi-symbol model are served from it once it is written;
+# the registry picks up (and hot-swaps) it like any per-symbol model
+predictor = PricePredictor(registry=registry, shared_model=True)
+
+MAX_PREDICTION_DAYS = int(os.getenv('MAX_PREDICTION_DAYS', '30'))
+
+def _predict_horizon(symbols: List[str], days: int) -> Dict[str, Any]:
+    """Predictions of several symbols for one horizon, or the exception of each symbol that failed
+
+    ``predict_many`` already reports symbols it cannot predict one by one;
+    anything it raises (e.g. the database being down) fails every symbol.
+    """
+    try:
+        return predictor.predict_many(symbols, days=days)
+    except Exception as e:
+        return {symbol: e for symbol in symbols}
+
+def run_prediction_batch(requests: List[Tuple[str, int]]) -> List[Any]:
+    """Predict a micro-batch of (symbol, days) requests with one batched inference per horizon
+
+    Requests are grouped by ``days`` so a long horizon only costs the
+    requests that asked for it.
+    """
+    horizons: Dict[int, List[str]] = {}
+    for symbol, days in requests:
+        horizons.setdefault(days, [])
+        if symbol not in horizons[days]:
+            horizons[days].append(symbol)
+    predictions = {days: _predict_horizon(symbols, days) for days, symbols in horizons.items()}
+    return [predictions[days][symbol] for symbol, days in requests]
+
+batcher = MicroBatcher(
+    run_prediction_batch,
+    max_batch_size=int(os.getenv('PREDICT_MAX_BATCH_SIZE', '64')),
+    max_wait_ms=float(os.getenv('PREDICT_MAX_WAIT_MS', '5')),
+    workers=int(os.getenv('PREDICT_WORKERS', '2'))
+)
 
 class PredictionRequest(BaseModel):
     symbol: str
-    days: int = 5
+    days: int = Field(5, ge=1, le=MAX_PREDICTION_DAYS)
 
 class PredictionResponse(BaseModel):
     symbol: str
@@ -31,6 +75,16 @@ class PredictionResponse(BaseModel):
     model_version: str = "1.0.0"
 
 
+@app.on_event("startup")
+async def start_serving():
+    registry.start()
+    batcher.start()
+
+@app.on_event("shutdown")
+async def stop_serving():
+    await batcher.stop()
+    registry.stop()
+
 @app.get("/")
 async def root():
     logger.info("Health check endpoint called")
@@ -40,8 +94,10 @@ async def root():
 async def get_prediction(request: PredictionRequest):
     try:
         logger.info(f"Prediction requested for symbol: {request.symbol}")
+        if not predictor.serves(request.symbol):
+            raise HTTPException(status_code=404, detail=f"No model available for {request.symbol}")
         # Get predictions
-        predictions_df = predictor.predict(request.symbol, days=request.days)
+        predictions_df = await batcher.submit((request.symbol, request.days))
         
         # Format predictions
         predictions = [
@@ -58,6 +114,8 @@ async def get_prediction(request: PredictionRequest):
             predictions=predictions,
             timestamp=datetime.now()
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating predictions for {request.symbol}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -65,8 +123,7 @@ async def get_prediction(request: PredictionRequest):
 @app.get("/symbols")
 async def get_available_symbols():
     try:
-        model_files = os.listdir('models/saved_models')
-        symbols = list(set([f.split('_')[0] for f in model_files if f.endswith('_model.h5')]))
+        symbols = predictor.served_symbols()
         logger.info(f"Found {len(symbols)} available symbols")
         return {"symbols": symbols}
     except Exception as e:
@@ -0,0 +1,54 @@
+"""Update latency of ARIMAPredictor as the history grows.
+
+Fits on ``--history`` synthetic prices per size, then times single-point
+``update`` calls with the incremental filter against a full refit per point
+(the previous behaviour).
+
+    python benchmarks/arima_update_benchmark.py --history 500 2000 8000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.arima_predictor import ARIMAPredictor
+
+
+def price_records(n, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    dates = pd.bdate_range('2000-01-03', periods=n)
+    return [{'timestamp': date, 'price': price} for date, price in zip(dates, prices)]
+
+
+def time_updates(predictor, records, refit):
+    latencies = []
+    for record in records:
+        start = time.perf_counter()
+        predictor.update([record], refit=refit)
+        latencies.append(time.perf_counter() - start)
+    return np.median(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--history', type=int, nargs='+', default=[500, 2000, 8000])
+    parser.add_argument('--updates', type=int, default=50)
+    parser.add_argument('--refit-updates', type=int, default=3)
+    args = parser.parse_args()
+
+    for n in args.history:
+        records = price_records(n + args.updates + args.refit_updates)
+        predictor = ARIMAPredictor(refit_every=None, drift_threshold=None).fit(records[:n])
+        incremental = time_updates(predictor, records[n:n + args.updates], refit=False)
+        refit = time_updates(predictor, records[n + args.updates:], refit=True)
+        print(f"history {n:>6}: incremental update p50 {incremental:7.2f} ms, full refit {refit:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Payload size and latency of the portfolio dashboard callback.
+
+Compares the full rebuild the callback used to send on every interval with
+the no_update and Patch paths of build_portfolio_update.
+
+    python benchmarks/dashboard_update_benchmark.py --positions 500
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import dash
+from plotly.utils import PlotlyJSONEncoder
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from portfolio.portfolio_analyzer import PortfolioAnalyzer
+from dashboard.portfolio_updates import build_portfolio_update
+
+
+def payload_bytes(outputs) -> int:
+    """Size of the JSON Dash would send for the outputs that are not no_update"""
+    sent = [output for output in outputs if output is not dash.no_update]
+    return len(json.dumps(sent, cls=PlotlyJSONEncoder))
+
+
+def timed(analyzer, state, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        outputs = build_portfolio_update(analyzer, state)
+    elapsed = (time.perf_counter() - start) / repeats
+    return outputs, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--positions', type=int, default=500)
+    parser.add_argument('--changed', type=int, default=5, help='positions whose price moves per tick')
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    analyzer = PortfolioAnalyzer()
+    for i in range(args.positions):
+        analyzer.add_position(f'SYM{i}', float(rng.integers(1, 500)), float(rng.uniform(10, 500)))
+
+    full, full_time = timed(analyzer, None, args.repeats)
+    state = full[-1]
+
+    unchanged, unchanged_time = timed(analyzer, state, args.repeats)
+
+    moved = {f'SYM{i}': analyzer.prices[f'SYM{i}'] * 1.01 for i in range(args.changed)}
+    analyzer.update_prices(moved)
+    patched, patch_time = timed(analyzer, state, args.repeats)
+
+    print(f"{'path':<12}{'payload (bytes)':>18}{'latency (ms)':>16}")
+    for name, outputs, elapsed in [
+        ('full', full, full_time),
+        ('unchanged', unchanged, unchanged_time),
+        ('patch', patched, patch_time),
+    ]:
+        print(f"{name:<12}{payload_bytes(outputs):>18,}{elapsed * 1000:>16.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Tick-batch latency of the streaming P&L engine.
+
+Books ``--portfolios`` portfolios with ``--positions`` random positions each
+over a ``--symbols`` universe, then times ``on_ticks`` for batches of
+``--batch`` symbol ticks.
+
+    python benchmarks/pnl_engine_benchmark.py --portfolios 10000 --positions 20
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from portfolio.pnl_engine import PnLEngine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--portfolios', type=int, default=10000)
+    parser.add_argument('--positions', type=int, default=20)
+    parser.add_argument('--symbols', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=500)
+    parser.add_argument('--batches', type=int, default=200)
+    parser.add_argument('--threshold', type=float, default=100.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    symbols = np.array([f'SYM{i}' for i in range(args.symbols)])
+    prices = rng.uniform(10, 500, args.symbols)
+
+    engine = PnLEngine(threshold=args.threshold)
+    start = time.perf_counter()
+    for p in range(args.portfolios):
+        for s in rng.choice(args.symbols, args.positions, replace=False):
+            engine.apply_fill(p, symbols[s], float(rng.integers(1, 100)), prices[s])
+    engine.on_ticks([], [])
+    print(f"booked {args.portfolios * args.positions:,} positions in {time.perf_counter() - start:.2f}s")
+
+    latencies = []
+    published = 0
+    for _ in range(args.batches):
+        moved = rng.choice(args.symbols, args.batch, replace=False)
+        prices[moved] *= rng.normal(1, 0.002, args.batch)
+        start = time.perf_counter()
+        published += len(engine.on_ticks(symbols[moved].tolist(), prices[moved]))
+        latencies.append(time.perf_counter() - start)
+
+    latencies = np.array(latencies) * 1000
+    print(f"{args.batch} ticks/batch: p50 {np.percentile(latencies, 50):.2f} ms, "
+          f"p99 {np.percentile(latencies, 99):.2f} ms, {published / args.batches:.0f} events/batch")
+
+
+if __name__ == '__main__':
+    main()
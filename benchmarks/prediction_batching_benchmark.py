@@ -0,0 +1,84 @@
+"""Latency and throughput of prediction requests with and without micro-batching.
+
+Fires ``--requests`` concurrent requests at a simulated model whose batched
+call costs a fixed ``--overhead-ms`` (dispatch, graph launch) plus
+``--per-item-ms`` per request, then reports p50/p99 latency and throughput
+when each request runs its own inference against ``MicroBatcher`` batches.
+It measures the batcher only: the service's ``run_prediction_batch`` and
+the real models are never called, so the numbers say nothing about
+TensorFlow inference cost or the per-horizon grouping of real batches.
+
+    python benchmarks/prediction_batching_benchmark.py --requests 500 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.micro_batcher import MicroBatcher
+
+
+def simulated_model(overhead, per_item):
+    def predict(items):
+        time.sleep(overhead + per_item * len(items))
+        return list(items)
+    return predict
+
+
+async def load_test(submit, requests, concurrency):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def request(item):
+        async with semaphore:
+            start = time.perf_counter()
+            await submit(item)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(request(item) for item in range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return np.percentile(latencies, 50), np.percentile(latencies, 99), requests / elapsed
+
+
+async def run(args):
+    model = simulated_model(args.overhead_ms / 1000, args.per_item_ms / 1000)
+
+    # One inference per request, run in the default thread pool
+    async def unbatched(item):
+        return (await asyncio.get_running_loop().run_in_executor(None, model, [item]))[0]
+
+    results = {'unbatched': await load_test(unbatched, args.requests, args.concurrency)}
+    for max_wait_ms in args.max_wait_ms:
+        batcher = MicroBatcher(model, max_batch_size=args.max_batch_size, max_wait_ms=max_wait_ms,
+                               workers=args.workers)
+        batcher.start()
+        results[f'batched wait {max_wait_ms:g} ms'] = await load_test(batcher.submit, args.requests, args.concurrency)
+        await batcher.stop()
+        print(f"wait {max_wait_ms:g} ms: mean batch size {batcher.mean_batch_size:.1f}")
+
+    for name, (p50, p99, throughput) in results.items():
+        print(f"{name:>20}: p50 {p50:7.1f} ms, p99 {p99:7.1f} ms, {throughput:7.0f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--overhead-ms', type=float, default=10.0)
+    parser.add_argument('--per-item-ms', type=float, default=0.2)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, nargs='+', default=[1.0, 5.0])
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Universe-wide technical ranking versus per-symbol analyze_stock.
+
+Times TechnicalAnalyzer.analyze_universe on a synthetic dates x symbols
+panel and extrapolates the per-symbol loop from a sample of symbols.
+
+    python benchmarks/universe_analysis_benchmark.py --symbols 5000 --days 756
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analysis.technical_analyzer import TechnicalAnalyzer
+
+
+def synthetic_panel(n_symbols: int, n_days: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2020-01-01', periods=n_days)
+    symbols = [f'SYM{i}' for i in range(n_symbols)]
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (n_days, n_symbols)), axis=0))
+    spread = np.abs(rng.normal(0, 0.01, (n_days, n_symbols)))
+    frame = lambda values: pd.DataFrame(values, index=dates, columns=symbols)
+    return (frame(close), frame(close * (1 + spread)), frame(close * (1 - spread)),
+            frame(rng.integers(1e5, 1e7, (n_days, n_symbols)).astype(float)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=756)
+    parser.add_argument('--sample', type=int, default=100, help='Symbols timed with analyze_stock')
+    args = parser.parse_args()
+
+    close, high, low, volume = synthetic_panel(args.symbols, args.days)
+    analyzer = TechnicalAnalyzer()
+
+    start = time.perf_counter()
+    ranking = analyzer.analyze_universe(close, high, low, volume)
+    batch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for symbol in close.columns[:args.sample]:
+        analyzer.analyze_stock(pd.DataFrame({'close': close[symbol], 'high': high[symbol],
+                                             'low': low[symbol], 'volume': volume[symbol]}))
+    loop_seconds = (time.perf_counter() - start) / args.sample * args.symbols
+
+    print(f"{args.symbols} symbols x {args.days} days")
+    print(f"analyze_universe:         {batch_seconds:8.2f} s")
+    print(f"analyze_stock loop (est): {loop_seconds:8.2f} s")
+    print(ranking.head(5)[['score', 'signal', 'volatility', 'max_drawdown', 'trailing_stop']])
+
+
+if __name__ == '__main__':
+    main()
@@ -20,4 +20,8 @@ PREDICTION_STEPS = int(os.getenv('PREDICTION_STEPS', '7'))
 
 # Scraper Configuration
 REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', '10'))
-MAX_RETRIES = int(os.getenv('MAX_RETRIES', '3'))
\ No newline at end of file
+MAX_RETRIES = int(os.getenv('MAX_RETRIES', '3'))
+
+# Shared Market Snapshot Configuration
+SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', '/tmp/stockintel_snapshots')
+SNAPSHOT_REFRESH_SECONDS = int(os.getenv('SNAPSHOT_REFRESH_SECONDS', '300'))
@@ -0,0 +1,87 @@
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+import plotly.graph_objs as go
+
+from data_ingestion.snapshot_service import MarketSnapshot, filter_timeframe
+
+
+class AnalysisPipeline:
+    """Builds the four analysis charts from a single market snapshot read.
+
+    Indicators come precomputed from the snapshot (one vectorized pass per
+    refresh by the writer), so switching timeframes only slices the shared
+    arrays. Finished figures are memoized per (symbol, timeframe, last bar)
+    and invalidate themselves as soon as a new bar is published. Callers get
+    copies, so mutating a returned figure never changes the memo.
+    """
+
+    def __init__(self, snapshot: MarketSnapshot, max_entries: int = 128):
+        self.snapshot = snapshot
+        self.max_entries = max_entries
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_figures(self, symbol: str, timeframe: str) -> Optional[List[go.Figure]]:
+        """Return [price, volume, rsi, macd] figures, or None if there is no data."""
+        symbol = symbol.upper()
+        bars = self.snapshot.get(symbol)
+        if bars is None or len(bars) == 0:
+            return None
+
+        key = (symbol, timeframe, int(bars['timestamp'][-1]))
+        with self._lock:
+            figures = self._cache.get(key)
+            if figures is not None:
+                self._cache.move_to_end(key)
+
+        if figures is None:
+            figures = self._build_figures(symbol, filter_timeframe(bars, timeframe))
+            with self._lock:
+                self._cache[key] = figures
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return [go.Figure(fig) for fig in figures]
+
+    def _build_figures(self, symbol: str, bars: np.ndarray) -> List[go.Figure]:
+        dates = bars['timestamp'].astype('datetime64[ms]')
+        close = bars['close']
+        # Up/down bar colouring shared by the volume and MACD histogram charts
+        rising = np.r_[True, close[1:] >= close[:-1]]
+
+        price = go.Figure([
+            go.Candlestick(x=dates, open=bars['open'], high=bars['high'],
+                           low=bars['low'], close=close, name='OHLC'),
+            go.Scatter(x=dates, y=bars['bb_upper'], line=dict(color='red', dash='dash', width=1), name='Upper Band'),
+            go.Scatter(x=dates, y=bars['bb_middle'], line=dict(color='#4287f5', width=1), name='Middle Band'),
+            go.Scatter(x=dates, y=bars['bb_lower'], line=dict(color='red', dash='dash', width=1), name='Lower Band')
+        ])
+        price.update_layout(title=f'{symbol} Price Chart', xaxis_rangeslider_visible=False)
+
+        volume = go.Figure([
+            go.Bar(x=dates, y=bars['volume'], marker_color=np.where(rising, 'green', 'red'), name='Volume')
+        ])
+        volume.update_layout(title='Volume')
+
+        rsi = go.Figure([
+            go.Scatter(x=dates, y=bars['rsi'], line=dict(color='purple', width=2), name='RSI')
+        ])
+        rsi.add_hline(y=70, line_dash='dash', line_color='red')
+        rsi.add_hline(y=30, line_dash='dash', line_color='green')
+        rsi.update_layout(title='RSI', yaxis_range=[0, 100])
+
+        histogram = bars['macd_hist']
+        macd = go.Figure([
+            go.Scatter(x=dates, y=bars['macd'], line=dict(color='#00BFFF', width=2), name='MACD'),
+            go.Scatter(x=dates, y=bars['macd_signal'], line=dict(color='#FF6347', width=2), name='Signal'),
+            go.Bar(x=dates, y=histogram, marker_color=np.where(histogram >= 0, 'green', 'red'),
+                   opacity=0.5, name='Histogram')
+        ])
+        macd.update_layout(title='MACD')
+
+        figures = [price, volume, rsi, macd]
+        for fig in figures:
+            fig.update_layout(template='plotly_dark', margin=dict(l=40, r=20, t=40, b=20))
+        return figures
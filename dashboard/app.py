@@ -4,12 +4,16 @@ import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State
 import plotly.graph_objs as go
 import pandas as pd
+from functools import partial
 
+import config
 from data_ingestion.api_client import StockDataClient
+from data_ingestion.snapshot_service import MarketSnapshot, SnapshotRefresher
 from portfolio.portfolio_analyzer import PortfolioAnalyzer
 from dashboard.components.technical_indicators import calculate_rsi, calculate_macd, calculate_bollinger_bands
 from flask_login import LoginManager, UserMixin, login_user, logout_user, current_user, login_required
 from dashboard.callbacks import register_callbacks
+from dashboard.portfolio_updates import build_portfolio_update
 
 # Initialize components with dark theme
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.DARKLY], suppress_callback_exceptions=True)
@@ -17,7 +21,13 @@ app.server.secret_key = "secret-key"  # <-- Add this line
 stock_client = StockDataClient()
 portfolio_analyzer = PortfolioAnalyzer()
 
-register_callbacks(app)
+# Market data shared with the Flask app and other workers through memory-mapped snapshots
+market_snapshot = MarketSnapshot(
+    config.SNAPSHOT_DIR,
+    loader=partial(stock_client.get_daily_frame, outputsize='full'),
+    update_loader=stock_client.get_daily_frame,
+    max_age=config.SNAPSHOT_REFRESH_SECONDS
+)
 
 # Initialize sample portfolio data
 portfolio_analyzer.add_position('AAPL', 100, 150.0)
@@ -27,6 +37,24 @@ portfolio_analyzer.add_position('GOOGL', 30, 2800.0)
 # Set default stock symbol
 DEFAULT_SYMBOL = 'AAPL'
 
+snapshot_refresher = SnapshotRefresher(
+    market_snapshot,
+    symbols=[DEFAULT_SYMBOL, *portfolio_analyzer.positions],
+    interval=config.SNAPSHOT_REFRESH_SECONDS
+)
+
+def start_background_services():
+    """Start the snapshot refresher in this process (once); never at import"""
+    if snapshot_refresher.ident is None:
+        snapshot_refresher.start()
+
+def create_server():
+    """WSGI factory, e.g. ``gunicorn 'dashboard.app:create_server()'`` (without --preload)"""
+    start_background_services()
+    return app.server
+
+register_callbacks(app, market_snapshot)
+
 # Create the layout
 app.layout = html.Div([
     dcc.Location(id='url', refresh=True),
@@ -105,6 +133,7 @@ main_layout = dbc.Container([
                 dbc.CardBody([
                     # Add store component for timeframe
                     dcc.Store(id='selected-timeframe', data='1D'),
+                    dbc.Alert(id="analysis-error", color="warning", is_open=False),
                     dcc.Graph(id="price-chart"),
                     dcc.Graph(id="volume-chart"),
                     dbc.Row([
@@ -196,7 +225,9 @@ main_layout = dbc.Container([
         id='interval-component',
         interval=60*1000,  # Update every minute
         n_intervals=0
-    )
+    ),
+    # Last rendered portfolio rows and state version, used to send only deltas
+    dcc.Store(id='portfolio-state')
 ], fluid=True)
 
 
@@ -366,49 +397,17 @@ app.index_string = '''
     [Output("portfolio-value", "children"),
      Output("portfolio-return", "children"),
      Output("position-distribution", "figure"),
-     Output("positions-table", "children")],
-    Input("interval-component", "n_intervals")
+     Output("positions-table", "children"),
+     Output("portfolio-state", "data")],
+    Input("interval-component", "n_intervals"),
+    State("portfolio-state", "data")
 )
-def update_dashboard(n):
-    # Get portfolio summary
-    summary = portfolio_analyzer.get_portfolio_summary()
-    
-    # Portfolio value
-    portfolio_value = f"${summary['metrics']['total_value']:,.2f}"
-    
-    # Portfolio return
-    portfolio_return = f"{summary['metrics']['return']*100:.2f}%"
-    
-    # Position distribution pie chart
-    positions = pd.DataFrame(summary['positions'])
-    fig = go.Figure(data=[go.Pie(
-        labels=positions['symbol'],
-        values=positions['value'],
-        hole=.3
-    )])
-    
-    # Update layout for better visualization
-    fig.update_layout(
-        margin=dict(l=20, r=20, t=20, b=20),
-        showlegend=True,
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        )
-    )
-    
-    # Positions table
-    table = dbc.Table.from_dataframe(
-        positions[['symbol', 'quantity', 'price', 'value', 'weight', 'return']],
-        striped=True,
-        bordered=True,
-        hover=True
-    )
+def update_dashboard(n, previous_state):
+    # Pick up the latest closes published by the snapshot refresher
+    portfolio_analyzer.update_prices(market_snapshot.latest_closes(portfolio_analyzer.positions))
     
-    return portfolio_value, portfolio_return, fig, table
+    # Unchanged state returns no_update, price moves return Patch objects
+    return build_portfolio_update(portfolio_analyzer, previous_state)
 
 # Initialize login manager
 login_manager = LoginManager()
@@ -469,5 +468,6 @@ def display_page(pathname):
     return main_layout
 
 if __name__ == '__main__':
+    start_background_services()
     app.run(debug=True)
 
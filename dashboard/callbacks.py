@@ -1,29 +1,52 @@
+import logging
+
+import dash
+from dash import ctx
 from dash.dependencies import Input, Output, State
 import plotly.graph_objs as go
 from datetime import datetime, timedelta
 
-def register_callbacks(app):
+from dashboard.analysis_pipeline import AnalysisPipeline
+
+logger = logging.getLogger(__name__)
+
+# Timeframe buttons in the main layout and the timeframe each one selects
+TIMEFRAME_BUTTONS = {'1d-btn': '1D', '1w-btn': '1W', '1m-btn': '1M', '1y-btn': '1Y'}
+
+def register_callbacks(app, market_snapshot):
+    pipeline = AnalysisPipeline(market_snapshot)
+
+    @app.callback(
+        Output('selected-timeframe', 'data'),
+        [Input(button_id, 'n_clicks') for button_id in TIMEFRAME_BUTTONS],
+        prevent_initial_call=True
+    )
+    def select_timeframe(*clicks):
+        return TIMEFRAME_BUTTONS.get(ctx.triggered_id, dash.no_update)
+
     @app.callback(
         [Output('price-chart', 'figure'),
          Output('volume-chart', 'figure'),
          Output('rsi-chart', 'figure'),
-         Output('macd-chart', 'figure')],
-        [Input('analyze-button', 'n_clicks'),
-         Input('timeframe-selector', 'value')],
-        [State('stock-input', 'value')]
+         Output('macd-chart', 'figure'),
+         Output('analysis-error', 'children'),
+         Output('analysis-error', 'is_open')],
+        [Input('search-button', 'n_clicks'),
+         Input('selected-timeframe', 'data')],
+        [State('stock-search', 'value')]
     )
     def update_analysis(n_clicks, timeframe, symbol):
         if not symbol:
-            return [{}, {}, {}, {}]
+            return [{}, {}, {}, {}, None, False]
         
-        # Get market data
-        market_data = get_market_data(symbol, timeframe)
-        print(f"Market data for {symbol}: {market_data}")  # Debugging line
+        # One snapshot read feeds all four charts; repeat views hit the memo
+        try:
+            figures = pipeline.get_figures(symbol, timeframe)
+        except ValueError as e:
+            logger.warning("Invalid symbol %s: %s", symbol, e)
+            return [{}, {}, {}, {}, f"Invalid symbol: {symbol}", True]
         
-        # Create visualizations for each chart
-        price_chart = create_price_chart(market_data)
-        volume_chart = create_volume_chart(market_data)
-        rsi_chart = create_rsi_chart(market_data)
-        macd_chart = create_macd_chart(market_data)
+        if figures is None:
+            return [{}, {}, {}, {}, f"No market data available for {symbol.upper()}", True]
         
-        return [price_chart, volume_chart, rsi_chart, macd_chart]
\ No newline at end of file
+        return figures + [None, False]
@@ -1,11 +1,28 @@
 import dash
+import numpy as np
 from dash import dcc, html
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from dashboard.downsampling import aggregate_ohlc, downsample_line, parse_relayout_range, visible_range
+
 class CoreDashboardComponents:
-    def create_stock_chart(self, data, indicators=None):
-        """Create main stock chart with optional indicators"""
+    # Horizontal pixels per candle and line points per pixel when downsampling
+    PIXELS_PER_CANDLE = 3
+    POINTS_PER_PIXEL = 2
+    
+    def create_stock_chart(self, data, indicators=None, x_range=None, width=1200):
+        """Create main stock chart with optional indicators
+        
+        Only the visible ``x_range`` is sent, downsampled to what ``width``
+        pixels can show: candles are merged into OHLC-preserving buckets and
+        indicator lines are reduced with LTTB. Zooming in therefore re-queries
+        a narrower range at a higher resolution (see update_for_relayout).
+        """
+        mask = visible_range(data, x_range)
+        candles = aggregate_ohlc(data[mask].reset_index(drop=True), max(width // self.PIXELS_PER_CANDLE, 1))
+        line_points = width * self.POINTS_PER_PIXEL
+        
         # Create figure with secondary y-axis for volume
         fig = make_subplots(
             rows=2, cols=1, 
@@ -17,11 +34,11 @@ class CoreDashboardComponents:
         # Add candlestick chart
         fig.add_trace(
             go.Candlestick(
-                x=data['date'],
-                open=data['open'],
-                high=data['high'],
-                low=data['low'],
-                close=data['close'],
+                x=candles['date'],
+                open=candles['open'],
+                high=candles['high'],
+                low=candles['low'],
+                close=candles['close'],
                 name="OHLC"
             ),
             row=1, col=1
@@ -30,8 +47,8 @@ class CoreDashboardComponents:
         # Add volume bar chart
         fig.add_trace(
             go.Bar(
-                x=data['date'],
-                y=data['volume'],
+                x=candles['date'],
+                y=candles['volume'],
                 name="Volume"
             ),
             row=2, col=1
@@ -40,10 +57,11 @@ class CoreDashboardComponents:
         # Add indicators if provided
         if indicators:
             if 'sma_50' in indicators:
+                x, y = downsample_line(data['date'][mask], np.asarray(indicators['sma_50'])[mask], line_points)
                 fig.add_trace(
                     go.Scatter(
-                        x=data['date'],
-                        y=indicators['sma_50'],
+                        x=x,
+                        y=y,
                         line=dict(color='blue', width=1),
                         name="50-day SMA"
                     ),
@@ -51,10 +69,11 @@ class CoreDashboardComponents:
                 )
             
             if 'sma_200' in indicators:
+                x, y = downsample_line(data['date'][mask], np.asarray(indicators['sma_200'])[mask], line_points)
                 fig.add_trace(
                     go.Scatter(
-                        x=data['date'],
-                        y=indicators['sma_200'],
+                        x=x,
+                        y=y,
                         line=dict(color='red', width=1),
                         name="200-day SMA"
                     ),
@@ -67,7 +86,21 @@ class CoreDashboardComponents:
             xaxis_title="Date",
             yaxis_title="Price",
             xaxis_rangeslider_visible=False,
-            height=600
+            height=600,
+            uirevision='stock-chart'  # Keep the user's zoom across re-renders
         )
         
-        return fig
\ No newline at end of file
+        return fig
+    
+    def update_for_relayout(self, data, relayout_data, indicators=None, width=1200):
+        """Re-render the stock chart for a zoom/pan event from a dcc.Graph.
+        
+        Intended to be called from a callback on the graph's ``relayoutData``;
+        resetting the zoom returns the downsampled full history again.
+        """
+        return self.create_stock_chart(
+            data,
+            indicators=indicators,
+            x_range=parse_relayout_range(relayout_data),
+            width=width
+        )
\ No newline at end of file
@@ -0,0 +1,104 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the indices of ``threshold`` points that best preserve the visual
+    shape of the line. The first and last points are always kept.
+
+    Args:
+        x: Monotonic x values as floats (e.g. epoch milliseconds)
+        y: Values to downsample, same length as ``x``
+        threshold: Number of points to keep
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket boundaries for the n - 2 interior points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket is the third triangle vertex
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        areas = np.abs((x[a] - avg_x) * (bucket_y - y[a]) - (x[a] - bucket_x) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+
+    return selected
+
+
+def aggregate_ohlc(data: pd.DataFrame, buckets: int) -> pd.DataFrame:
+    """Merge consecutive candles into at most ``buckets`` candles.
+
+    Each bucket keeps the first open, highest high, lowest low, last close and
+    summed volume, so price extremes survive the downsampling.
+    """
+    n = len(data)
+    if buckets >= n or buckets < 1:
+        return data
+
+    starts = np.linspace(0, n, buckets, endpoint=False).astype(np.int64)
+    ends = np.r_[starts[1:], n] - 1
+
+    aggregated = {
+        'date': data['date'].values[starts],
+        'open': data['open'].values[starts],
+        'high': np.maximum.reduceat(data['high'].values, starts),
+        'low': np.minimum.reduceat(data['low'].values, starts),
+        'close': data['close'].values[ends],
+    }
+    if 'volume' in data:
+        aggregated['volume'] = np.add.reduceat(data['volume'].values, starts)
+    return pd.DataFrame(aggregated)
+
+
+def downsample_line(dates: Sequence, values: Sequence, threshold: int) -> Tuple[np.ndarray, np.ndarray]:
+    """LTTB-downsample a date-indexed line, skipping NaN warm-up values"""
+    dates = pd.to_datetime(pd.Series(dates)).values
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    dates, values = dates[valid], values[valid]
+
+    x = dates.astype('datetime64[ms]').astype(np.float64)
+    keep = lttb_indices(x, values, threshold)
+    return dates[keep], values[keep]
+
+
+def visible_range(data: pd.DataFrame, x_range: Optional[Tuple]) -> np.ndarray:
+    """Boolean mask of the rows inside an (start, end) date range"""
+    if not x_range:
+        return np.ones(len(data), dtype=bool)
+    dates = pd.to_datetime(data['date'])
+    start, end = pd.to_datetime(x_range[0]), pd.to_datetime(x_range[1])
+    return ((dates >= start) & (dates <= end)).values
+
+
+def parse_relayout_range(relayout_data: Optional[Dict]) -> Optional[Tuple]:
+    """Extract the zoomed x range from Plotly relayoutData.
+
+    Returns None when the user reset the zoom (autorange) or the event was
+    not a zoom, which callers treat as "show everything".
+    """
+    if not relayout_data:
+        return None
+    for axis in ('xaxis', 'xaxis2'):
+        if f'{axis}.range[0]' in relayout_data:
+            return relayout_data[f'{axis}.range[0]'], relayout_data[f'{axis}.range[1]']
+        if f'{axis}.range' in relayout_data:
+            return tuple(relayout_data[f'{axis}.range'])
+    return None
@@ -2,7 +2,7 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Optional
 from portfolio.portfolio_analyzer import PortfolioAnalyzer
 
 class PortfolioDashboard:
@@ -60,7 +60,7 @@ class PortfolioDashboard:
         return fig
     
     def create_sector_exposure_chart(self, portfolio: Dict[str, float], 
-                                   sector_data: Dict[str, str]) -> go.Figure:
+                                   sector_data: Optional[Dict[str, str]] = None) -> go.Figure:
         """Create a pie chart showing sector exposure"""
         sector_exposure = self.analyzer.analyze_sector_exposure(portfolio, sector_data)
         
@@ -80,13 +80,9 @@ class PortfolioDashboard:
     
     def create_efficient_frontier(self, returns: pd.DataFrame) -> go.Figure:
         """Create a chart showing the efficient frontier"""
-        target_returns = np.linspace(returns.mean().min() * 252, 
-                                   returns.mean().max() * 252, 20)
-        volatilities = []
-        
-        for target in target_returns:
-            weights, metrics = self.analyzer.optimize_portfolio(returns, target)
-            volatilities.append(metrics['volatility'])
+        frontier = self.analyzer.calculate_efficient_frontier(returns, n_points=100)
+        volatilities = frontier['volatilities']
+        target_returns = frontier['returns']
         
         fig = go.Figure()
         fig.add_trace(go.Scatter(
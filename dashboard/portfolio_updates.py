@@ -0,0 +1,90 @@
+from typing import Dict, List, Optional, Tuple
+
+import dash
+from dash import html, Patch
+import dash_bootstrap_components as dbc
+import plotly.graph_objs as go
+
+from portfolio.portfolio_analyzer import PortfolioAnalyzer
+
+POSITION_COLUMNS = ['symbol', 'quantity', 'price', 'value', 'weight', 'return']
+VALUE_COLUMN = POSITION_COLUMNS.index('value')
+
+
+def create_position_pie(symbols: List[str], values: List[float]) -> go.Figure:
+    """Create the position distribution pie chart"""
+    fig = go.Figure(data=[go.Pie(
+        labels=symbols,
+        values=values,
+        hole=.3
+    )])
+
+    # Update layout for better visualization
+    fig.update_layout(
+        margin=dict(l=20, r=20, t=20, b=20),
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+
+    return fig
+
+
+def create_positions_table(rows: List[list]) -> dbc.Table:
+    """Create the positions table with one cell per column so cells can be patched"""
+    return dbc.Table([
+        html.Thead(html.Tr([html.Th(col) for col in POSITION_COLUMNS])),
+        html.Tbody([html.Tr([html.Td(cell) for cell in row]) for row in rows])
+    ], striped=True, bordered=True, hover=True)
+
+
+def _patch_changes(previous_rows: List[list], rows: List[list]) -> Tuple[Patch, Patch]:
+    """Build figure and table patches touching only the cells and slices that changed"""
+    figure_patch = Patch()
+    table_patch = Patch()
+
+    for i, (old_row, row) in enumerate(zip(previous_rows, rows)):
+        if old_row[VALUE_COLUMN] != row[VALUE_COLUMN]:
+            figure_patch['data'][0]['values'][i] = row[VALUE_COLUMN]
+        for j, (old_cell, cell) in enumerate(zip(old_row, row)):
+            if old_cell != cell:
+                # Table -> Tbody -> Tr[i] -> Td[j] -> text
+                table_patch['props']['children'][1]['props']['children'][i]['props']['children'][j]['props']['children'] = cell
+
+    return figure_patch, table_patch
+
+
+def build_portfolio_update(analyzer: PortfolioAnalyzer, previous_state: Optional[Dict]) -> tuple:
+    """Compute the portfolio card outputs relative to what the client already shows.
+
+    Returns (value, return, figure, table, state). When the analyzer's state
+    version matches ``previous_state`` every output is ``dash.no_update``;
+    when only prices moved the figure and table are ``Patch`` objects that
+    rewrite just the changed cells; otherwise everything is rebuilt.
+    """
+    version = analyzer.get_state_version()
+    if previous_state and previous_state.get('version') == version:
+        return (dash.no_update,) * 5
+
+    summary = analyzer.get_portfolio_summary()
+    rows = [[position[col] for col in POSITION_COLUMNS] for position in summary['positions']]
+    state = {'version': version, 'rows': rows}
+
+    portfolio_value = f"${summary['metrics']['total_value']:,.2f}"
+    portfolio_return = f"{summary['metrics']['return']*100:.2f}%"
+
+    previous_rows = previous_state.get('rows') if previous_state else None
+    symbols = [row[0] for row in rows]
+    if previous_rows is None or [row[0] for row in previous_rows] != symbols:
+        # Positions were added, removed or reordered, so patch paths no longer line up
+        figure = create_position_pie(symbols, [row[VALUE_COLUMN] for row in rows])
+        table = create_positions_table(rows)
+    else:
+        figure, table = _patch_changes(previous_rows, rows)
+
+    return portfolio_value, portfolio_return, figure, table, state
@@ -1,5 +1,6 @@
 import requests
 import os
+import pandas as pd
 
 class StockDataClient:
     """
@@ -26,4 +27,18 @@ class StockDataClient:
         print(f"Fetched data for {symbol}: {data}")  # Add this line for debugging
         return data
 
+    def get_daily_frame(self, symbol, outputsize="compact"):
+        """
+        Fetch daily time series data as an OHLCV DataFrame indexed by date.
+        """
+        data = self.get_daily_time_series(symbol, outputsize=outputsize)
+        time_series = data.get('Time Series (Daily)', {})
+        if not time_series:
+            return pd.DataFrame(columns=['open', 'high', 'low', 'close', 'volume'])
+
+        df = pd.DataFrame.from_dict(time_series, orient='index').apply(pd.to_numeric)
+        df.columns = ['open', 'high', 'low', 'close', 'volume']
+        df.index = pd.to_datetime(df.index)
+        return df.sort_index()
+
     # Add more methods as needed for your project
\ No newline at end of file
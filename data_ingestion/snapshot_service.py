@@ -0,0 +1,312 @@
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from dashboard.components.technical_indicators import calculate_rsi, calculate_macd, calculate_bollinger_bands
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks are process-local, so run a single worker there
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+OHLCV_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+SNAPSHOT_FIELDS = OHLCV_FIELDS + [
+    'bb_upper', 'bb_middle', 'bb_lower',
+    'rsi', 'macd', 'macd_signal', 'macd_hist'
+]
+
+# One record per bar: epoch-millisecond timestamp followed by float64 columns
+SNAPSHOT_DTYPE = np.dtype([('timestamp', '<i8')] + [(field, '<f8') for field in SNAPSHOT_FIELDS])
+
+_SYMBOL_PATTERN = re.compile(r'^[A-Z0-9.\-]{1,16}$')
+
+# Number of daily bars shown for each dashboard timeframe (None = full history,
+# 'YTD' = bars since January 1st of the latest bar's year)
+TIMEFRAME_BARS = {
+    '1D': 1,
+    '3D': 3,
+    '1W': 5,
+    '1M': 21,
+    '3M': 63,
+    '6M': 126,
+    'YTD': 'YTD',
+    '1Y': 252,
+    '3Y': 756,
+    'All': None
+}
+
+
+def build_snapshot(df: pd.DataFrame) -> np.ndarray:
+    """Convert an OHLCV DataFrame into a snapshot record array with indicators.
+
+    Indicators are computed over the full history so values at the start of
+    any later window are already warmed up.
+    """
+    close = df['close']
+    upper, middle, lower = calculate_bollinger_bands(close)
+    macd_line, signal_line, histogram = calculate_macd(close)
+
+    columns = {
+        'open': df['open'],
+        'high': df['high'],
+        'low': df['low'],
+        'close': close,
+        'volume': df['volume'],
+        'bb_upper': upper,
+        'bb_middle': middle,
+        'bb_lower': lower,
+        'rsi': calculate_rsi(close),
+        'macd': macd_line,
+        'macd_signal': signal_line,
+        'macd_hist': histogram
+    }
+
+    bars = np.empty(len(df), dtype=SNAPSHOT_DTYPE)
+    bars['timestamp'] = pd.DatetimeIndex(df.index).as_unit('ms').asi8
+    for field, values in columns.items():
+        bars[field] = np.asarray(values, dtype=np.float64)
+    return bars
+
+
+def filter_timeframe(bars, timeframe: str):
+    """Keep only the bars covered by the requested timeframe"""
+    count = TIMEFRAME_BARS.get(timeframe)
+    if count is None or len(bars) == 0:
+        return bars
+    if count == 'YTD':
+        latest = pd.Timestamp(int(bars['timestamp'][-1]), unit='ms')
+        year_start = pd.Timestamp(year=latest.year, month=1, day=1).value // 10**6
+        return bars[np.searchsorted(bars['timestamp'], year_start):]
+    return bars[-count:]
+
+
+class MarketSnapshot:
+    """Latest bars and indicators shared by every worker process.
+
+    Each symbol is stored as ``<snapshot_dir>/<SYMBOL>.npy`` and replaced
+    atomically on refresh. Readers memory-map the file read-only, so all
+    workers on a host share the same page-cache pages instead of holding
+    their own copy, and only one process calls the upstream API per refresh.
+    Cross-process locking uses ``fcntl.flock``; where it is unavailable the
+    locks only coordinate threads of the current process.
+
+    ``loader`` fetches a symbol's full history for the first snapshot. With
+    an ``update_loader`` (e.g. the last 100 bars), refreshes fetch only
+    recent bars and merge them onto the stored history, falling back to
+    ``loader`` when they no longer overlap it.
+    """
+
+    def __init__(self, snapshot_dir: str, loader: Callable[[str], pd.DataFrame],
+                 max_age: float = 300, update_loader: Optional[Callable[[str], pd.DataFrame]] = None):
+        self.snapshot_dir = snapshot_dir
+        self.loader = loader
+        self.update_loader = update_loader
+        self.max_age = max_age
+        self._maps: Dict[str, tuple] = {}  # symbol -> ((inode, mtime_ns), memmap)
+        self._maps_lock = threading.Lock()
+        self._symbol_locks: Dict[str, threading.Lock] = {}
+        os.makedirs(snapshot_dir, exist_ok=True)
+
+    def get(self, symbol: str) -> Optional[np.ndarray]:
+        """Return the read-only bar array for a symbol, loading it on first use."""
+        symbol = self._normalize(symbol)
+        bars = self._open(symbol)
+        if bars is None:
+            # Single-flight across processes: the first worker fetches, the
+            # others block on the lock and then read what it published
+            with self._lock(symbol):
+                bars = self._open(symbol)
+                if bars is None and self._fetch_and_publish(symbol):
+                    bars = self._open(symbol)
+        return bars
+
+    def get_frame(self, symbol: str) -> pd.DataFrame:
+        """Return a symbol's snapshot as a DataFrame indexed by date (copies)."""
+        bars = self.get(symbol)
+        if bars is None:
+            return pd.DataFrame(columns=SNAPSHOT_FIELDS)
+        return self._frame(bars)
+
+    def latest_closes(self, symbols: Iterable[str]) -> Dict[str, float]:
+        """Latest close for each symbol that already has a snapshot.
+
+        Never triggers an upstream fetch, so it is safe to call from
+        frequently firing callbacks.
+        """
+        closes = {}
+        for symbol in symbols:
+            bars = self._open(self._normalize(symbol))
+            if bars is not None and len(bars):
+                closes[symbol] = float(bars['close'][-1])
+        return closes
+
+    def publish(self, symbol: str, df: pd.DataFrame):
+        """Write a symbol's snapshot and atomically replace the previous one."""
+        symbol = self._normalize(symbol)
+        bars = build_snapshot(df)
+        path = self._path(symbol)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, bars)
+        os.replace(tmp_path, path)
+
+    def refresh(self, symbol: str, force: bool = False) -> bool:
+        """Re-fetch a symbol if its snapshot is stale. Returns True if rewritten."""
+        symbol = self._normalize(symbol)
+        with self._lock(symbol):
+            if not force and self.age(symbol) < self.max_age:
+                return False
+            return self._fetch_and_publish(symbol)
+
+    def age(self, symbol: str) -> float:
+        """Seconds since the snapshot was written (inf if there is none)."""
+        try:
+            return time.time() - os.stat(self._path(self._normalize(symbol))).st_mtime
+        except FileNotFoundError:
+            return float('inf')
+
+    def symbols(self) -> List[str]:
+        """Symbols that currently have a snapshot on disk."""
+        return sorted(name[:-4] for name in os.listdir(self.snapshot_dir) if name.endswith('.npy'))
+
+    def _fetch_and_publish(self, symbol: str) -> bool:
+        try:
+            df = self._fetch(symbol)
+        except Exception as e:
+            logger.error("Error fetching snapshot data for %s: %s", symbol, e)
+            return False
+        if df is None or df.empty:
+            return False
+        self.publish(symbol, df)
+        return True
+
+    def _fetch(self, symbol: str) -> Optional[pd.DataFrame]:
+        """Full history for a new snapshot, else recent bars merged onto the stored ones"""
+        bars = self._open(symbol) if self.update_loader is not None else None
+        if bars is None or len(bars) == 0:
+            return self.loader(symbol)
+        recent = self.update_loader(symbol)
+        if recent is None or recent.empty:
+            return None
+        stored = self._frame(bars)[OHLCV_FIELDS]
+        if recent.index.min() > stored.index[-1]:
+            # A gap since the last snapshot: recent bars alone would leave a hole
+            return self.loader(symbol)
+        merged = pd.concat([stored, recent[OHLCV_FIELDS]])
+        return merged[~merged.index.duplicated(keep='last')].sort_index()
+
+    @staticmethod
+    def _frame(bars: np.ndarray) -> pd.DataFrame:
+        df = pd.DataFrame(bars[SNAPSHOT_FIELDS])
+        df.index = pd.to_datetime(bars['timestamp'], unit='ms')
+        return df
+
+    def _open(self, symbol: str) -> Optional[np.ndarray]:
+        """Map the current snapshot file, reusing the mapping until it is replaced."""
+        path = self._path(symbol)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        version = (stat.st_ino, stat.st_mtime_ns)
+
+        with self._maps_lock:
+            cached = self._maps.get(symbol)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            try:
+                bars = np.load(path, mmap_mode='r')
+            except FileNotFoundError:
+                # Replaced between stat and open; the next call maps the new file
+                return cached[1] if cached is not None else None
+            self._maps[symbol] = (version, bars)
+            return bars
+
+    @contextmanager
+    def _lock(self, symbol: str):
+        if fcntl is None:
+            with self._maps_lock:
+                lock = self._symbol_locks.setdefault(symbol, threading.Lock())
+            with lock:
+                yield
+            return
+        with open(os.path.join(self.snapshot_dir, f"{symbol}.lock"), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.snapshot_dir, f"{symbol}.npy")
+
+    @staticmethod
+    def _normalize(symbol: str) -> str:
+        symbol = symbol.upper()
+        if not _SYMBOL_PATTERN.match(symbol):
+            raise ValueError(f"Invalid symbol: {symbol}")
+        return symbol
+
+
+class SnapshotRefresher(threading.Thread):
+    """Background thread that keeps snapshots fresh.
+
+    Every process may start one, but only the process holding the leader
+    lock refreshes, so upstream calls do not scale with the worker count.
+    Symbols are the configured universe plus any symbol a worker has
+    already loaded on demand.
+    """
+
+    def __init__(self, snapshot: MarketSnapshot, symbols: Iterable[str], interval: float = 300):
+        super().__init__(daemon=True, name='snapshot-refresher')
+        self.snapshot = snapshot
+        self.universe = {symbol.upper() for symbol in symbols}
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._leader_file = None
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                if self._acquire_leadership():
+                    self._refresh_all()
+            except Exception:
+                # Keep the thread alive; the next pass retries
+                logger.exception("Snapshot refresh pass failed")
+            self._stop_event.wait(self.interval)
+
+    def _refresh_all(self):
+        """Refresh every symbol, so one failing symbol does not hold back the rest"""
+        for symbol in sorted(self.universe | set(self.snapshot.symbols())):
+            try:
+                self.snapshot.refresh(symbol)
+            except Exception:
+                logger.exception("Error refreshing snapshot for %s", symbol)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _acquire_leadership(self) -> bool:
+        if self._leader_file is not None:
+            return True
+        if fcntl is None:
+            # No cross-process lock to compete for, so every process refreshes
+            return True
+        leader_file = open(os.path.join(self.snapshot.snapshot_dir, 'refresher.lock'), 'w')
+        try:
+            fcntl.flock(leader_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            leader_file.close()
+            return False
+        # Held for the lifetime of the process; released by the OS on exit
+        self._leader_file = leader_file
+        return True
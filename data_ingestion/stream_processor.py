@@ -1,6 +1,6 @@
 from kafka import KafkaConsumer, KafkaProducer
 import json
-from typing import Callable
+from typing import Callable, Iterator, List
 
 class StreamProcessor:
     def __init__(self, bootstrap_servers: List[str]):
@@ -18,4 +18,17 @@ class StreamProcessor:
         """Process streaming data in real-time"""
         for message in self.consumer:
             processed_data = processor_func(message.value)
-            self.producer.send('processed_data', processed_data)
\ No newline at end of file
+            self.producer.send('processed_data', processed_data)
+
+    def consume_batches(self, max_records: int = 5000, timeout_ms: int = 100) -> Iterator[List[dict]]:
+        """Yield market data messages in batches instead of one at a time"""
+        while True:
+            records = self.consumer.poll(timeout_ms=timeout_ms, max_records=max_records)
+            batch = [message.value for messages in records.values() for message in messages]
+            if batch:
+                yield batch
+
+    def publish(self, topic: str, messages: List[dict]):
+        """Send a list of messages to a topic"""
+        for message in messages:
+            self.producer.send(topic, message)
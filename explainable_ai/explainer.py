@@ -1,27 +1,46 @@
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import shap
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 
+from analysis.feature_store import FeatureStore
+
 class StockExplainer:
-    def __init__(self):
+    def __init__(self, feature_store: Optional[FeatureStore] = None):
         self.model = RandomForestRegressor(n_estimators=100, random_state=42)
         self.scaler = StandardScaler()
+        self.feature_store = feature_store
         self.feature_names = [
             'price_momentum', 'volume_trend', 'rsi', 'macd',
             'pe_ratio', 'market_cap', 'sector_performance'
         ]
     
-    def prepare_features(self, historical_data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
-        """Prepare features for model training and explanation"""
+    def prepare_features(self, historical_data: pd.DataFrame,
+                         symbol: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Prepare features for model training and explanation
+        
+        With a feature store and a symbol the indicators are read from (and
+        incrementally extended in) the store instead of being recomputed.
+        """
         # Calculate technical indicators
         data = historical_data.copy()
-        data['price_momentum'] = data['price'].pct_change(periods=5)
-        data['volume_trend'] = data['volume'].pct_change(periods=5)
-        data['rsi'] = self._calculate_rsi(data['price'])
-        data['macd'] = self._calculate_macd(data['price'])
+        if self.feature_store is not None and symbol is not None:
+            self.feature_store.append(symbol, data)
+            index = FeatureStore.bars_from_frame(data).index
+            for name, (feature, params) in {
+                'price_momentum': ('returns', {'column': 'price', 'periods': 5}),
+                'volume_trend': ('returns', {'column': 'volume', 'periods': 5}),
+                'rsi': ('rsi', {'column': 'price', 'period': 14}),
+                'macd': ('macd', {'column': 'price'}),
+            }.items():
+                data[name] = self.feature_store.get(symbol, feature, **params).reindex(index).to_numpy()
+        else:
+            data['price_momentum'] = data['price'].pct_change(periods=5)
+            data['volume_trend'] = data['volume'].pct_change(periods=5)
+            data['rsi'] = self._calculate_rsi(data['price'])
+            data['macd'] = self._calculate_macd(data['price'])
         
         # Normalize features
         features = data[['price_momentum', 'volume_trend', 'rsi', 'macd']].values
@@ -1,19 +1,21 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import seaborn as sns
+from flask import Flask, render_template, request, jsonify, redirect, url_for, make_response
 import pandas as pd
-import numpy as np
 import io
-import base64
-from datetime import datetime, timedelta
+import json
+import hashlib
 import os
 import secrets
+from functools import partial
 
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow output is optional, JSON is always available
+    pa = None
+
+import config
 from data_ingestion.api_client import StockDataClient
+from data_ingestion.snapshot_service import MarketSnapshot, SnapshotRefresher, TIMEFRAME_BARS, filter_timeframe
 from portfolio.portfolio_analyzer import PortfolioAnalyzer
-from dashboard.components.technical_indicators import calculate_rsi, calculate_macd, calculate_bollinger_bands
 
 app = Flask(__name__)
 app.secret_key = secrets.token_hex(16)  # Generate a secure secret key
@@ -22,6 +24,14 @@ app.secret_key = secrets.token_hex(16)  # Generate a secure secret key
 stock_client = StockDataClient()
 portfolio_analyzer = PortfolioAnalyzer()
 
+# Market data shared with other workers through memory-mapped snapshots
+market_snapshot = MarketSnapshot(
+    config.SNAPSHOT_DIR,
+    loader=partial(stock_client.get_daily_frame, outputsize='full'),
+    update_loader=stock_client.get_daily_frame,
+    max_age=config.SNAPSHOT_REFRESH_SECONDS
+)
+
 # Initialize sample portfolio data
 portfolio_analyzer.add_position('AAPL', 100, 150.0)
 portfolio_analyzer.add_position('MSFT', 50, 300.0)
@@ -32,6 +42,31 @@ portfolio_analyzer.add_position('TSLA', 40, 800.0)
 # Default symbol
 DEFAULT_SYMBOL = 'AAPL'
 
+snapshot_refresher = SnapshotRefresher(
+    market_snapshot,
+    symbols=[DEFAULT_SYMBOL, *portfolio_analyzer.positions],
+    interval=config.SNAPSHOT_REFRESH_SECONDS
+)
+
+def start_background_services():
+    """Start the snapshot refresher in this process (once).
+
+    Called from ``create_app`` or the ``__main__`` entry point rather than
+    at import, so importing the module from tests or tooling starts no threads.
+    """
+    if snapshot_refresher.ident is None:
+        snapshot_refresher.start()
+
+def create_app():
+    """App factory for WSGI servers, e.g. ``gunicorn 'flask_app:create_app()'``.
+
+    Each worker calls it after forking and starts its own refresher; only
+    the one holding the leader lock fetches. Don't combine it with
+    ``--preload``, which would start the thread in the master only.
+    """
+    start_background_services()
+    return app
+
 # Market indices data (sample)
 market_indices = {
     'S&P 500': {'value': '4,567.31', 'change': '+0.65%', 'color': 'green'},
@@ -66,182 +101,21 @@ news_items = [
     {'title': 'Fed Announcement', 'description': 'Interest rates remain unchanged', 'time': '5 hours ago'}
 ]
 
-def fig_to_base64(fig):
-    """Convert matplotlib figure to base64 string for HTML display"""
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', bbox_inches='tight', dpi=100, facecolor='#1a1a1a')
-    buf.seek(0)
-    img_str = base64.b64encode(buf.read()).decode('utf-8')
-    plt.close(fig)
-    return img_str
-
-def prepare_stock_data(symbol, timeframe="1D"):
-    """Fetch and prepare stock data for visualization"""
-    try:
-        # Fetch data from Alpha Vantage
-        data = stock_client.get_daily_time_series(symbol, outputsize="compact")
-        
-        # Extract time series data
-        time_series = data.get('Time Series (Daily)', {})
-        
-        # Convert to DataFrame
-        df = pd.DataFrame.from_dict(time_series, orient='index')
-        
-        # Convert string values to float
-        for col in df.columns:
-            df[col] = pd.to_numeric(df[col])
-            
-        # Rename columns
-        df.columns = ['open', 'high', 'low', 'close', 'volume']
-        
-        # Sort by date
-        df.index = pd.to_datetime(df.index)
-        df = df.sort_index()
-        
-        # Filter based on timeframe
-        if timeframe == "1D":
-            df = df.iloc[-1:]
-        elif timeframe == "1W":
-            df = df.iloc[-5:]
-        elif timeframe == "1M":
-            df = df.iloc[-21:]
-        elif timeframe == "3M":
-            df = df.iloc[-63:]
-        elif timeframe == "6M":
-            df = df.iloc[-126:]
-        elif timeframe == "1Y":
-            df = df.iloc[-252:]
-        
-        return df
-    except Exception as e:
-        print(f"Error preparing stock data: {e}")
-        return pd.DataFrame()
-
-def create_price_chart(df, symbol):
-    """Create price chart with Matplotlib"""
-    if df.empty:
-        return None
-    
-    # Set the style to dark background
-    plt.style.use('dark_background')
-    
-    fig, ax = plt.subplots(figsize=(12, 6))
-    fig.patch.set_facecolor('#1a1a1a')
-    ax.set_facecolor('#1a1a1a')
-    
-    # Plot the close price
-    ax.plot(df.index, df['close'], color='#00ff00', linewidth=2)
-    
-    # Add Bollinger Bands
-    upper, middle, lower = calculate_bollinger_bands(df['close'])
-    ax.plot(df.index, upper, 'r--', linewidth=1, alpha=0.7)
-    ax.plot(df.index, middle, color='#4287f5', linewidth=1, alpha=0.7)
-    ax.plot(df.index, lower, 'r--', linewidth=1, alpha=0.7)
-    
-    # Add volume as bars at the bottom
-    volume_ax = ax.twinx()
-    volume_ax.set_ylim(0, df['volume'].max() * 3)
-    volume_ax.bar(df.index, df['volume'], color='#4287f5', alpha=0.3, width=0.8)
-    volume_ax.set_ylabel('Volume', color='#4287f5')
-    volume_ax.tick_params(axis='y', colors='#4287f5')
-    volume_ax.spines['right'].set_color('#4287f5')
-    
-    # Set title and labels
-    ax.set_title(f'{symbol} Price Chart', color='white', fontsize=14)
-    ax.set_xlabel('Date', color='white')
-    ax.set_ylabel('Price ($)', color='white')
-    
-    # Style the grid
-    ax.grid(True, linestyle='--', alpha=0.3)
-    
-    # Style the ticks
-    ax.tick_params(axis='x', colors='white')
-    ax.tick_params(axis='y', colors='white')
-    
-    # Style the spines
-    for spine in ax.spines.values():
-        spine.set_color('#333333')
-    
-    return fig
-
-def create_technical_indicators_chart(df, symbol):
-    """Create a chart with RSI and MACD"""
-    if df.empty:
-        return None
-    
-    # Set the style to dark background
-    plt.style.use('dark_background')
-    
-    # Create figure with subplots
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 6), gridspec_kw={'height_ratios': [1, 1]})
-    fig.patch.set_facecolor('#1a1a1a')
-    
-    # RSI Plot
-    ax1.set_facecolor('#1a1a1a')
-    rsi = calculate_rsi(df['close'])
-    ax1.plot(df.index, rsi, color='purple', linewidth=2)
-    ax1.axhline(y=70, color='red', linestyle='--', alpha=0.5)
-    ax1.axhline(y=30, color='green', linestyle='--', alpha=0.5)
-    ax1.set_title('RSI', color='white')
-    ax1.set_ylim(0, 100)
-    ax1.tick_params(axis='x', colors='white')
-    ax1.tick_params(axis='y', colors='white')
-    ax1.grid(True, linestyle='--', alpha=0.3)
-    
-    # MACD Plot
-    ax2.set_facecolor('#1a1a1a')
-    macd_line, signal_line, histogram = calculate_macd(df['close'])
-    ax2.plot(df.index, macd_line, color='#00BFFF', linewidth=2, label='MACD')
-    ax2.plot(df.index, signal_line, color='#FF6347', linewidth=2, label='Signal')
-    
-    # Plot histogram as bar chart
-    for i, value in enumerate(histogram):
-        color = 'green' if value >= 0 else 'red'
-        ax2.bar(df.index[i], value, color=color, width=1, alpha=0.5)
-    
-    ax2.set_title('MACD', color='white')
-    ax2.tick_params(axis='x', colors='white')
-    ax2.tick_params(axis='y', colors='white')
-    ax2.grid(True, linestyle='--', alpha=0.3)
-    ax2.legend(loc='upper left')
-    
-    # Adjust layout
-    plt.tight_layout()
-    
-    return fig
-
-def create_portfolio_pie_chart():
-    """Create portfolio distribution pie chart"""
-    summary = portfolio_analyzer.get_portfolio_summary()
-    positions = pd.DataFrame(summary['positions'])
-    
-    # Set the style to dark background
-    plt.style.use('dark_background')
-    
-    fig, ax = plt.subplots(figsize=(8, 8))
-    fig.patch.set_facecolor('#1a1a1a')
-    ax.set_facecolor('#1a1a1a')
-    
-    # Create pie chart
-    wedges, texts, autotexts = ax.pie(
-        positions['value'], 
-        labels=positions['symbol'], 
-        autopct='%1.1f%%',
-        textprops={'color': 'white'},
-        colors=plt.cm.tab10.colors,
-        wedgeprops={'edgecolor': '#1a1a1a', 'linewidth': 1}
-    )
-    
-    # Style the text
-    for text in texts:
-        text.set_color('white')
-    for autotext in autotexts:
-        autotext.set_color('white')
-        autotext.set_fontweight('bold')
-    
-    ax.set_title('Portfolio Distribution', color='white', fontsize=14)
-    
-    return fig
+def serialize_chart_series(series, fmt):
+    """Serialize chart columns as JSON or an Arrow IPC stream"""
+    if fmt == 'arrow':
+        sink = io.BytesIO()
+        table = pa.Table.from_pandas(series, preserve_index=False)
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue(), 'application/vnd.apache.arrow.stream'
+    
+    # NaN is not valid JSON, so indicator warm-up values are sent as null
+    columns = {
+        col: series[col].astype(object).where(series[col].notna(), None).tolist()
+        for col in series.columns
+    }
+    return json.dumps(columns, separators=(',', ':')).encode('utf-8'), 'application/json'
 
 @app.route('/')
 def index():
@@ -249,29 +123,18 @@ def index():
     symbol = request.args.get('symbol', DEFAULT_SYMBOL)
     timeframe = request.args.get('timeframe', '1D')
     
-    # Get stock data
-    df = prepare_stock_data(symbol, timeframe)
-    
-    # Create charts
-    charts = {}
-    if not df.empty:
-        charts['price_chart'] = fig_to_base64(create_price_chart(df, symbol))
-        charts['technical_chart'] = fig_to_base64(create_technical_indicators_chart(df, symbol))
-    
     # Get portfolio data
     portfolio_summary = portfolio_analyzer.get_portfolio_summary()
-    portfolio_chart = fig_to_base64(create_portfolio_pie_chart())
     
     # Prepare template data
     template_data = {
         'symbol': symbol,
         'timeframe': timeframe,
-        'charts': charts,
+        'timeframe_bars': TIMEFRAME_BARS,
         'portfolio': {
             'value': f"${portfolio_summary['metrics']['total_value']:,.2f}",
             'return': f"{portfolio_summary['metrics']['return']*100:.2f}%",
-            'positions': portfolio_summary['positions'],
-            'chart': portfolio_chart
+            'positions': portfolio_summary['positions']
         },
         'market_indices': market_indices,
         'market_signals': market_signals,
@@ -281,6 +144,48 @@ def index():
     
     return render_template('dashboard.html', **template_data)
 
+@app.route('/api/chart-data/<symbol>')
+def chart_data(symbol):
+    """Serve OHLCV and indicator series for client-side charting.
+
+    Query parameters:
+        timeframe: One of TIMEFRAME_BARS (default 1D)
+        since: Epoch milliseconds; only bars at or after this timestamp are
+            returned so clients can merge deltas into what they already have
+        format: 'json' (default) or 'arrow'
+    """
+    timeframe = request.args.get('timeframe', '1D')
+    since = request.args.get('since', type=int)
+    fmt = request.args.get('format', 'json')
+    
+    if timeframe not in TIMEFRAME_BARS:
+        return jsonify({'error': f'Unknown timeframe: {timeframe}'}), 400
+    if fmt not in ('json', 'arrow'):
+        return jsonify({'error': f'Unknown format: {fmt}'}), 400
+    if fmt == 'arrow' and pa is None:
+        return jsonify({'error': 'Arrow output requires pyarrow'}), 406
+    
+    try:
+        bars = market_snapshot.get(symbol)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if bars is None or len(bars) == 0:
+        return jsonify({'error': f'No data available for {symbol}'}), 404
+    
+    # Slice the shared mapping first so only the requested window is copied
+    bars = filter_timeframe(bars, timeframe)
+    if since is not None:
+        bars = bars[bars['timestamp'] >= since]
+    
+    body, mimetype = serialize_chart_series(pd.DataFrame(bars), fmt)
+    
+    response = make_response(body)
+    response.mimetype = mimetype
+    response.set_etag(hashlib.sha1(body).hexdigest())
+    # Always revalidate; unchanged data costs a 304 with an empty body
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     """Handle login functionality"""
@@ -299,4 +204,5 @@ def login():
 if __name__ == '__main__':
     # Create templates directory if it doesn't exist
     os.makedirs('templates', exist_ok=True)
+    start_background_services()
     app.run(debug=True)
\ No newline at end of file
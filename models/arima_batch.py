@@ -0,0 +1,198 @@
+"""Fit ARIMA models for a whole symbol universe.
+
+Symbols are fanned out over worker processes, each optionally searching a
+bounded grid of (p, d, q) orders and keeping the lowest-AIC fit. Every
+candidate fit runs under a wall-clock limit and fits that time out or do not
+converge are skipped. Fitted parameters and a short tail of each series go
+into one .npz file; ``ARIMAFitStore`` serves forecasts from it by
+re-running the Kalman filter over the tail, without re-estimating.
+
+    python -m models.arima_batch prices.csv fits.npz --search --jobs 8
+"""
+import argparse
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.arima.model import ARIMA
+
+from config import ARIMA_ORDER
+from models.arima_predictor import ARIMAPredictor
+
+# Observations kept per symbol to rebuild the filter state when serving
+TAIL_LENGTH = 250
+
+
+def candidate_orders(order: Tuple[int, int, int] = ARIMA_ORDER, search: bool = False,
+                     max_p: int = 3, max_q: int = 3) -> List[Tuple[int, int, int]]:
+    """The configured order alone, or every (p, d, q) with p <= max_p, q <= max_q at its d"""
+    if not search:
+        return [tuple(order)]
+    d = order[1]
+    return [(p, d, q) for p in range(max_p + 1) for q in range(max_q + 1)]
+
+
+@contextmanager
+def _time_limit(seconds: Optional[float]):
+    """Raise TimeoutError in the block after ``seconds`` (SIGALRM, main thread only)"""
+    if not seconds or not hasattr(signal, 'SIGALRM') or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def _expire(signum, frame):
+        raise TimeoutError
+
+    previous = signal.signal(signal.SIGALRM, _expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def fit_symbol(symbol: str, prices: np.ndarray, orders: Sequence[Tuple[int, int, int]],
+               timeout: Optional[float] = 30.0, tail: int = TAIL_LENGTH) -> Dict:
+    """Fit every candidate order to one price series and keep the lowest AIC
+
+    Returns a dict with symbol, order, params, aic, nobs, tail and status
+    ('ok', or 'failed' when no candidate converged in time). A candidate
+    that raises anything else is counted in 'errors' and its message kept
+    in 'error', so one degenerate series never aborts the whole batch.
+    """
+    values = np.asarray(prices, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    fit = {'symbol': symbol, 'order': None, 'params': None, 'aic': np.nan,
+           'nobs': len(values), 'tail': values[-tail:], 'status': 'failed',
+           'timeouts': 0, 'not_converged': 0, 'errors': 0, 'error': None}
+
+    for order in orders:
+        try:
+            with _time_limit(timeout):
+                result = ARIMA(values, order=order).fit()
+        except TimeoutError:
+            fit['timeouts'] += 1
+            continue
+        except (ValueError, np.linalg.LinAlgError):
+            fit['not_converged'] += 1
+            continue
+        except Exception as e:
+            fit['errors'] += 1
+            fit['error'] = f"{type(e).__name__}: {e}"
+            continue
+        if not result.mle_retvals.get('converged', True) or not np.isfinite(result.aic):
+            fit['not_converged'] += 1
+            continue
+        if fit['order'] is None or result.aic < fit['aic']:
+            fit.update(order=tuple(order), params=np.asarray(result.params), aic=float(result.aic), status='ok')
+    return fit
+
+
+def _fit_chunk(items: List[Tuple[str, np.ndarray]], orders: Sequence[Tuple[int, int, int]],
+               timeout: Optional[float], tail: int) -> List[Dict]:
+    return [fit_symbol(symbol, prices, orders, timeout, tail) for symbol, prices in items]
+
+
+def fit_universe(prices: pd.DataFrame, order: Tuple[int, int, int] = ARIMA_ORDER, search: bool = False,
+                 max_p: int = 3, max_q: int = 3, timeout: Optional[float] = 30.0,
+                 n_jobs: int = 1, chunk_size: int = 16, tail: int = TAIL_LENGTH) -> List[Dict]:
+    """Fit one model per column of a (dates x symbols) price frame
+
+    With ``n_jobs > 1`` symbols go to worker processes in chunks of
+    ``chunk_size``. Results keep the column order.
+    """
+    orders = candidate_orders(order, search, max_p, max_q)
+    items = [(str(symbol), prices[symbol].to_numpy(dtype=np.float64)) for symbol in prices.columns]
+    chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+    if n_jobs > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            parts = list(executor.map(_fit_chunk, chunks, [orders] * len(chunks),
+                                      [timeout] * len(chunks), [tail] * len(chunks)))
+    else:
+        parts = [_fit_chunk(chunk, orders, timeout, tail) for chunk in chunks]
+    return [fit for part in parts for fit in part]
+
+
+def save_fits(fits: List[Dict], path: str):
+    """Write fits as padded arrays to one .npz file (params and tails NaN-padded)"""
+    n = len(fits)
+    width = max((len(fit['params']) for fit in fits if fit['params'] is not None), default=0)
+    tail = max((len(fit['tail']) for fit in fits), default=0)
+    orders = np.full((n, 3), -1, dtype=np.int64)
+    params = np.full((n, width), np.nan)
+    tails = np.full((n, tail), np.nan)
+    for i, fit in enumerate(fits):
+        if fit['params'] is not None:
+            orders[i] = fit['order']
+            params[i, :len(fit['params'])] = fit['params']
+        if len(fit['tail']):
+            tails[i, -len(fit['tail']):] = fit['tail']
+
+    np.savez(path, symbols=np.array([fit['symbol'] for fit in fits]), orders=orders, params=params,
+             aic=np.array([fit['aic'] for fit in fits]), nobs=np.array([fit['nobs'] for fit in fits]),
+             status=np.array([fit['status'] for fit in fits]), tails=tails)
+
+
+class ARIMAFitStore:
+    """Serves forecasts from fits written by ``save_fits`` without refitting"""
+
+    def __init__(self, path: str):
+        with np.load(path) as data:
+            self.symbols = data['symbols'].tolist()
+            self.orders = data['orders']
+            self.params = data['params']
+            self.aic = data['aic']
+            self.status = data['status']
+            self.tails = data['tails']
+        self._symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._predictors: Dict[str, ARIMAPredictor] = {}
+
+    def __contains__(self, symbol: str) -> bool:
+        index = self._symbol_index.get(symbol)
+        return index is not None and self.status[index] == 'ok'
+
+    def predictor(self, symbol: str) -> ARIMAPredictor:
+        """ARIMAPredictor for a symbol, filtered once over its stored tail and cached"""
+        if symbol not in self._predictors:
+            if symbol not in self:
+                raise KeyError(f"No fitted ARIMA model for {symbol}")
+            i = self._symbol_index[symbol]
+            order = tuple(int(k) for k in self.orders[i])
+            params = self.params[i][~np.isnan(self.params[i])]
+            tail = self.tails[i][~np.isnan(self.tails[i])]
+            self._predictors[symbol] = ARIMAPredictor.from_params(order, params, pd.Series(tail))
+        return self._predictors[symbol]
+
+    def forecast(self, symbol: str, steps: int = 7) -> np.ndarray:
+        return self.predictor(symbol).predict(steps).to_numpy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fit ARIMA models for a symbol universe')
+    parser.add_argument('prices', help='CSV of close prices, one column per symbol')
+    parser.add_argument('output', help='Output .npz path')
+    parser.add_argument('--search', action='store_true', help='AIC search over orders up to --max-p/--max-q')
+    parser.add_argument('--max-p', type=int, default=3)
+    parser.add_argument('--max-q', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=30.0, help='Seconds allowed per candidate fit')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    prices = pd.read_csv(args.prices, index_col=0)
+    fits = fit_universe(prices, search=args.search, max_p=args.max_p, max_q=args.max_q,
+                        timeout=args.timeout, n_jobs=args.jobs)
+    save_fits(fits, args.output)
+    failed = [fit['symbol'] for fit in fits if fit['status'] != 'ok']
+    print(f"Fitted {len(fits) - len(failed)} of {len(fits)} symbols to {args.output}")
+    if failed:
+        print(f"No usable model for: {', '.join(failed)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,13 +3,32 @@ import numpy as np
 from statsmodels.tsa.arima.model import ARIMA
 from sklearn.metrics import mean_absolute_error
 import warnings
+from collections import deque
 warnings.filterwarnings('ignore')
 
 class ARIMAPredictor:
-    def __init__(self, order=(5,1,0)):
+    """ARIMA forecaster that absorbs new observations without refitting.
+
+    ``update`` runs the Kalman filter over the new points only (the fitted
+    parameters stay fixed), so its cost does not grow with the history.
+    Parameters are re-estimated every ``refit_every`` new observations, or
+    earlier when the mean squared standardized one-step forecast error over
+    the last ``drift_window`` updates exceeds ``drift_threshold`` (1 when the
+    model still fits). Either trigger can be disabled with None.
+
+    The model works on positions rather than timestamps, since trading days
+    carry no regular frequency for statsmodels to forecast along.
+    """
+    def __init__(self, order=(5,1,0), refit_every=250, drift_window=20, drift_threshold=3.0):
         self.order = order
+        self.refit_every = refit_every
+        self.drift_window = drift_window
+        self.drift_threshold = drift_threshold
         self.model = None
         self.history = None
+        self.updates_since_fit = 0
+        self.last_refit_reason = None
+        self._recent_errors = deque(maxlen=drift_window)
         
     def prepare_data(self, data):
         """Prepare time series data for ARIMA model"""
@@ -21,10 +40,21 @@ class ARIMAPredictor:
     def fit(self, data):
         """Fit ARIMA model to historical data"""
         self.history = self.prepare_data(data)
-        self.model = ARIMA(self.history, order=self.order)
-        self.model = self.model.fit()
+        self._refit('initial')
         return self
-    
+
+    @classmethod
+    def from_params(cls, order, params, history, **kwargs):
+        """Predictor from already estimated parameters, e.g. loaded from an ARIMAFitStore
+
+        Only runs the Kalman filter over ``history`` (a price Series), no estimation.
+        """
+        predictor = cls(order=tuple(order), **kwargs)
+        predictor.history = history
+        predictor.model = ARIMA(cls._positional(history), order=predictor.order).filter(np.asarray(params))
+        predictor.last_refit_reason = 'loaded'
+        return predictor
+
     def predict(self, steps=7):
         """Make predictions for the next n days"""
         if self.model is None:
@@ -44,10 +74,55 @@ class ARIMAPredictor:
             'actual': test_series.tolist()
         }
     
-    def update(self, new_data):
-        """Update model with new data points"""
+    def update(self, new_data, refit=None):
+        """Update model with new data points
+        
+        Args:
+            new_data: Records with timestamp and price, later than the history
+            refit: True to re-estimate parameters now, False to only filter
+                the new points, None to let the schedule and drift check decide
+        """
+        if self.model is None:
+            raise ValueError("Model not fitted. Call fit() first.")
+        
         new_series = self.prepare_data(new_data)
+        if new_series.empty:
+            return self
+        
+        n_before = len(self.history)
         self.history = pd.concat([self.history, new_series])
-        self.model = ARIMA(self.history, order=self.order)
-        self.model = self.model.fit()
-        return self 
\ No newline at end of file
+        self.model = self.model.extend(self._positional(new_series, start=n_before))
+        self.updates_since_fit += len(new_series)
+        
+        errors = self.model.filter_results.standardized_forecasts_error[0]
+        self._recent_errors.extend(errors[np.isfinite(errors)])
+        
+        if refit is None:
+            if self.refit_every is not None and self.updates_since_fit >= self.refit_every:
+                refit = 'schedule'
+            elif self.drift_detected():
+                refit = 'drift'
+        elif refit:
+            refit = 'manual'
+        if refit:
+            self._refit(refit)
+        return self
+    
+    def drift_detected(self):
+        """Whether recent one-step forecast errors are too large for the fitted parameters"""
+        if self.drift_threshold is None or len(self._recent_errors) < self.drift_window:
+            return False
+        return float(np.mean(np.square(self._recent_errors))) > self.drift_threshold
+    
+    def _refit(self, reason):
+        """Re-estimate parameters on the full history, warm-started from the current fit"""
+        start_params = self.model.params if self.model is not None else None
+        self.model = ARIMA(self._positional(self.history), order=self.order).fit(start_params=start_params)
+        self.updates_since_fit = 0
+        self.last_refit_reason = reason
+        self._recent_errors.clear()
+    
+    @staticmethod
+    def _positional(series, start=0):
+        """Prices indexed by observation number, continuing from ``start``"""
+        return pd.Series(series.to_numpy(dtype=np.float64), index=pd.RangeIndex(start, start + len(series)))
@@ -3,6 +3,8 @@ import numpy as np
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_absolute_percentage_error
 
+from models.windowing import sliding_windows
+
 class BaselineModels:
     def __init__(self):
         self.models = {}
@@ -28,16 +30,8 @@ class BaselineModels:
         
     def train_linear_model(self, data: pd.DataFrame, target_col: str = 'close', window: int = 5):
         """Train a simple linear regression model"""
-        # Create features (last n days)
-        X = []
-        y = []
-        
-        for i in range(len(data) - window):
-            X.append(data[target_col].iloc[i:i+window].values)
-            y.append(data[target_col].iloc[i+window])
-            
-        X = np.array(X)
-        y = np.array(y)
+        # Create features (last n days) as strided views of the column
+        X, y = sliding_windows(data[target_col].to_numpy(dtype=np.float64), window)
         
         # Train model
         model = LinearRegression()
@@ -0,0 +1,23 @@
+"""Data fingerprints that tell whether a symbol's training data changed.
+
+Kept free of TensorFlow so the training driver can fingerprint symbols in
+the parent process before it spawns its workers.
+"""
+import hashlib
+
+from sqlalchemy import func
+
+from data_ingestion.database import StockData, get_db
+
+
+def data_fingerprint(symbol: str, sequence_length: int) -> str:
+    """Digest of a symbol's row count, last timestamp and price sum, to detect new or changed data"""
+    db = next(get_db())
+    try:
+        summary = (db.query(func.count(StockData.id), func.max(StockData.timestamp), func.sum(StockData.price))
+                   .filter(StockData.symbol == symbol)
+                   .one())
+    finally:
+        db.close()
+    key = f"{sequence_length}|{summary[0]}|{summary[1]}|{summary[2]!r}"
+    return hashlib.sha1(key.encode()).hexdigest()
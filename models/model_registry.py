@@ -0,0 +1,70 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import joblib
+
+
+class ModelRegistry:
+    """Versioned model artifacts on disk.
+
+    Each model name gets a directory holding one ``v<version>.joblib``
+    artifact per registered version and a ``manifest.json`` listing the
+    versions with their metrics and metadata, newest last.
+    """
+
+    def __init__(self, root: str = 'models/registry'):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def register(self, name: str, model: Any, metrics: Optional[Dict] = None,
+                 metadata: Optional[Dict] = None) -> int:
+        """Save a new version of ``name`` and return its version number"""
+        with self._lock:
+            manifest = self.versions(name)
+            version = manifest[-1]['version'] + 1 if manifest else 1
+            directory = os.path.join(self.root, name)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f'v{version}.joblib')
+            joblib.dump(model, path)
+
+            manifest.append({
+                'version': version,
+                'path': path,
+                'created_at': datetime.now().isoformat(),
+                'metrics': metrics or {},
+                'metadata': metadata or {},
+            })
+            # Write the manifest atomically so readers never see a partial file
+            manifest_path = os.path.join(directory, 'manifest.json')
+            with open(manifest_path + '.tmp', 'w') as f:
+                json.dump(manifest, f, indent=2, default=str)
+            os.replace(manifest_path + '.tmp', manifest_path)
+            return version
+
+    def versions(self, name: str) -> List[Dict]:
+        """Manifest entries of a model, oldest first"""
+        manifest_path = os.path.join(self.root, name, 'manifest.json')
+        if not os.path.exists(manifest_path):
+            return []
+        with open(manifest_path) as f:
+            return json.load(f)
+
+    def latest_version(self, name: str) -> Optional[int]:
+        manifest = self.versions(name)
+        return manifest[-1]['version'] if manifest else None
+
+    def load(self, name: str, version: Optional[int] = None) -> Any:
+        """Load a version of a model (the latest by default)"""
+        manifest = self.versions(name)
+        if not manifest:
+            raise KeyError(f"No registered versions of {name}")
+        if version is None:
+            entry = manifest[-1]
+        else:
+            entry = next((entry for entry in manifest if entry['version'] == version), None)
+            if entry is None:
+                raise KeyError(f"{name} has no version {version}")
+        return joblib.load(entry['path'])
@@ -1,20 +1,52 @@
 from typing import Dict, List, Optional, Tuple
+import hashlib
+import logging
 import numpy as np
 import pandas as pd
+from sklearn.base import clone
 from sklearn.model_selection import TimeSeriesSplit
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.metrics import mean_squared_error, mean_absolute_percentage_error
 import joblib
+from joblib import Parallel, delayed
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 
+from analysis.feature_store import FeatureStore
+from models.model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+def _score_fold(model, X_train: np.ndarray, y_train: np.ndarray, X_val: np.ndarray, y_val: np.ndarray) -> float:
+    """Fit a fresh copy of the model on one fold and return its validation MAPE"""
+    model = clone(model).fit(X_train, y_train)
+    return mean_absolute_percentage_error(y_val, model.predict(X_val))
+
 class PredictionManager:
-    def __init__(self):
+    def __init__(self, n_jobs: int = -1, registry: Optional[ModelRegistry] = None,
+                 feature_store: Optional[FeatureStore] = None):
+        """
+        Args:
+            n_jobs: joblib workers for cross-validation (-1 for all CPUs)
+            registry: Where refitted models are saved as new versions
+            feature_store: Shared store that features of named symbols are
+                read from, extended incrementally as new bars arrive
+        """
         self.models = {}
         self.model_metrics = {}
+        self.model_versions = {}
         self.last_training_date = {}
         self.retraining_interval = timedelta(days=30)  # Retrain monthly
-        
-    def prepare_data(self, data: pd.DataFrame, target_col: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        self.n_jobs = n_jobs
+        self.registry = registry
+        self.feature_store = feature_store
+        self._fold_cache: Dict[str, List[Tuple[np.ndarray, ...]]] = {}
+        self._refit_executor = ThreadPoolExecutor(max_workers=1)
+        self._refit_future: Optional[Future] = None
+        self.refit_error: Optional[Exception] = None  # failure of the latest refit, if it failed
+        
+    def prepare_data(self, data: pd.DataFrame, target_col: str,
+                     symbol: Optional[str] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
         Prepare data with proper time series splitting
         """
@@ -22,7 +54,7 @@ class PredictionManager:
         data = data.sort_index()
         
         # Create features without looking ahead
-        features = self._create_features(data)
+        features = self._create_features(data, symbol)
         
         # Time-based train/test split
         train_size = int(len(data) * 0.8)
@@ -31,10 +63,26 @@ class PredictionManager:
         
         return train_data, test_data
         
-    def _create_features(self, data: pd.DataFrame) -> pd.DataFrame:
+    def _create_features(self, data: pd.DataFrame, symbol: Optional[str] = None) -> pd.DataFrame:
         """
         Create features without future data leakage
+        
+        With a feature store and a symbol, the new bars are appended to the
+        store and the columns read from it instead of being recomputed.
         """
+        if self.feature_store is not None and symbol is not None:
+            self.feature_store.append(symbol, data)
+            bars = FeatureStore.bars_from_frame(data)
+            stored = {
+                'returns': self.feature_store.get(symbol, 'returns'),
+                'volatility': self.feature_store.get(symbol, 'volatility', window=20),
+                'ma_50': self.feature_store.get(symbol, 'sma', window=50),
+                'ma_200': self.feature_store.get(symbol, 'sma', window=200),
+            }
+            features = pd.DataFrame({name: series.reindex(bars.index).to_numpy()
+                                     for name, series in stored.items()}, index=data.index)
+            return features.dropna()
+        
         features = pd.DataFrame()
         
         # Use only past data for feature creation
@@ -48,42 +96,108 @@ class PredictionManager:
         
         return features
         
-    def train_models(self, train_data: pd.DataFrame, target_col: str):
+    def _model_specs(self) -> Dict:
+        """Unfitted models of the ensemble"""
+        return {
+            'rf': RandomForestRegressor(n_estimators=100, n_jobs=1, random_state=42),
+            'gb': GradientBoostingRegressor(n_estimators=100, random_state=42)
+        }
+        
+    def _fold_matrices(self, train_data: pd.DataFrame, target_col: str,
+                       n_splits: int) -> List[Tuple[np.ndarray, ...]]:
+        """(X_train, y_train, X_val, y_val) per TimeSeriesSplit fold, cached by data content
+        
+        TimeSeriesSplit folds are contiguous, so every matrix is a slice of
+        one feature array; repeated calls on the same data reuse them.
+        """
+        X = train_data.drop(target_col, axis=1).to_numpy(dtype=np.float64)
+        y = train_data[target_col].to_numpy(dtype=np.float64)
+        digest = hashlib.sha1(X.tobytes() + y.tobytes()).hexdigest()
+        key = f"{digest}:{target_col}:{n_splits}"
+        if key not in self._fold_cache:
+            folds = []
+            for train_idx, val_idx in TimeSeriesSplit(n_splits=n_splits).split(X):
+                train_rows = slice(train_idx[0], train_idx[-1] + 1)
+                val_rows = slice(val_idx[0], val_idx[-1] + 1)
+                folds.append((X[train_rows], y[train_rows], X[val_rows], y[val_rows]))
+            self._fold_cache = {key: folds}   # only the latest dataset is kept
+        return self._fold_cache[key]
+        
+    def train_models(self, train_data: pd.DataFrame, target_col: str, n_splits: int = 5,
+                     background_refit: bool = True):
         """
         Train ensemble of models with cross-validation
+        
+        Every (model, fold) pair is scored concurrently with joblib. Each
+        model is then refitted on all of ``train_data``, in a background
+        thread unless ``background_refit`` is False, and registered as a
+        new version when a registry is configured. Predictions wait for the
+        refit to finish. The new models and their metrics replace the
+        current ones only once the whole refit succeeded; a failed refit
+        is raised once by ``wait_for_refit`` and the previous models keep
+        serving.
         """
         # Time series cross-validation
-        tscv = TimeSeriesSplit(n_splits=5)
-        
-        models = {
-            'rf': RandomForestRegressor(n_estimators=100),
-            'gb': GradientBoostingRegressor(n_estimators=100)
-        }
-        
-        for name, model in models.items():
-            cv_scores = []
-            
-            for train_idx, val_idx in tscv.split(train_data):
-                X_train = train_data.iloc[train_idx].drop(target_col, axis=1)
-                y_train = train_data.iloc[train_idx][target_col]
-                X_val = train_data.iloc[val_idx].drop(target_col, axis=1)
-                y_val = train_data.iloc[val_idx][target_col]
-                
-                # Train model
-                model.fit(X_train, y_train)
-                
-                # Validate
-                predictions = model.predict(X_val)
-                mape = mean_absolute_percentage_error(y_val, predictions)
-                cv_scores.append(mape)
-            
-            self.models[name] = model
-            self.model_metrics[name] = {
+        folds = self._fold_matrices(train_data, target_col, n_splits)
+        specs = self._model_specs()
+        tasks = [(name, fold) for name in specs for fold in folds]
+        scores = Parallel(n_jobs=self.n_jobs)(
+            delayed(_score_fold)(specs[name], *fold) for name, fold in tasks
+        )
+        
+        metrics = {}
+        for name in specs:
+            cv_scores = [score for (task_name, _), score in zip(tasks, scores) if task_name == name]
+            metrics[name] = {
                 'cv_mape': np.mean(cv_scores),
                 'cv_std': np.std(cv_scores)
             }
-            
-        self.last_training_date = datetime.now()
+        
+        X = train_data.drop(target_col, axis=1)
+        y = train_data[target_col]
+        try:
+            self.wait_for_refit()
+        except Exception as e:
+            logger.warning("Previous background refit failed: %s", e)
+        self._refit_future = self._refit_executor.submit(self._refit, specs, X, y, metrics, datetime.now())
+        if not background_refit:
+            self.wait_for_refit()
+        
+    def _refit(self, specs: Dict, X: pd.DataFrame, y: pd.Series, metrics: Dict, trained_at: datetime):
+        """Fit every model on the full training data, register it and publish all of them together"""
+        models, versions = {}, {}
+        for name, model in specs.items():
+            if 'n_jobs' in model.get_params():
+                model.set_params(n_jobs=self.n_jobs)
+            models[name] = model.fit(X, y)
+            if self.registry is not None:
+                versions[name] = self.registry.register(
+                    name, models[name], metrics[name],
+                    {'rows': len(X), 'features': list(X.columns), 'trained_at': trained_at}
+                )
+        self.models, self.model_metrics, self.last_training_date = models, metrics, trained_at
+        self.model_versions.update(versions)
+        self.refit_error = None
+        
+    def wait_for_refit(self, timeout: Optional[float] = None):
+        """Block until the background full-data refit (if any) has finished
+        
+        A failed refit is raised here once (and kept in ``refit_error``);
+        later calls return normally and the previous models stay in use.
+        """
+        future = self._refit_future
+        if future is None:
+            return
+        try:
+            future.result(timeout)
+        except FutureTimeoutError:
+            raise
+        except Exception as e:
+            self.refit_error = e
+            raise
+        finally:
+            if future.done() and self._refit_future is future:
+                self._refit_future = None
         
     def get_ensemble_prediction(self, features: pd.DataFrame) -> Dict:
         """
@@ -91,6 +205,12 @@ class PredictionManager:
         """
         predictions = {}
         weights = {}
+        try:
+            self.wait_for_refit()
+        except Exception as e:
+            logger.error("Background refit failed, serving the previous models: %s", e)
+        if not self.models:
+            return {'error': 'No trained models available', 'refit_error': str(self.refit_error)}
         
         # Check if retraining is needed
         if datetime.now() - self.last_training_date > self.retraining_interval:
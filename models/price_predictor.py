@@ -1,35 +1,83 @@
 import numpy as np
 import pandas as pd
-from typing import Tuple, Dict
+from collections import OrderedDict
+from typing import Callable, Iterator, Tuple, Dict, List, Optional, Union
+import threading
 import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
+from tensorflow.keras.models import Model, Sequential
+from tensorflow.keras.layers import LSTM, Concatenate, Dense, Dropout, Embedding, Input, RepeatVector
 from sklearn.preprocessing import MinMaxScaler
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from data_ingestion.database import StockData, get_db
+from models.fingerprint import data_fingerprint
+from models.serving_registry import ServingRegistry
+from models.windowing import sliding_windows, stream_windows
 import joblib
 import os
 
+# The multi-symbol model is saved as ``shared_model.h5``, so a ServingRegistry
+# indexes it under this name and hot-swaps it like a per-symbol model
+SHARED_KEY = 'shared'
+SHARED_MODEL_PATH = f'models/saved_models/{SHARED_KEY}_model.h5'
+SHARED_SCALERS_PATH = f'models/saved_models/{SHARED_KEY}_scalers.pkl'
+
+class WindowBatches(tf.keras.utils.Sequence):
+    """Feeds Keras one contiguous batch at a time, copied from strided window views"""
+    def __init__(self, X: np.ndarray, y: np.ndarray, batch_size: int, shuffle: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.X, self.y = X, y
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.order = np.arange(len(X))
+        self.on_epoch_end()
+        
+    def __len__(self):
+        return -(-len(self.X) // self.batch_size)
+    
+    def __getitem__(self, index):
+        # Sorted rows keep reads sequential when the views are memory-mapped
+        rows = np.sort(self.order[index * self.batch_size:(index + 1) * self.batch_size])
+        return np.ascontiguousarray(self.X[rows]), np.ascontiguousarray(self.y[rows])
+    
+    def on_epoch_end(self):
+        if self.shuffle:
+            np.random.shuffle(self.order)
 
 
 class PricePredictor:
-    def __init__(self, sequence_length: int = 60):
+    def __init__(self, sequence_length: int = 60, memmap_dir: Optional[str] = None, max_cached_models: int = 32,
+                 shared_model: bool = False, registry: Optional[ServingRegistry] = None):
+        """
+        Args:
+            shared_model: Serve predictions from the single multi-symbol model
+                written by ``train_shared`` once it exists (falling back to
+                per-symbol models for symbols it was not trained on)
+            registry: Serve per-symbol models, and the shared model, from
+                this shared registry instead of the predictor's own cache
+        """
         self.sequence_length = sequence_length
+        self.memmap_dir = memmap_dir
+        self.max_cached_models = max_cached_models
+        self.shared_model = shared_model
+        self.registry = registry
         self.scaler = MinMaxScaler(feature_range=(0, 1))
         self.model = None
+        self._model_cache: OrderedDict = OrderedDict()   # symbol -> (model, scaler, rollout)
+        self._shared = None                              # (model, {symbol: (id, scaler)}, rollout)
+        self._cache_lock = threading.Lock()
+        
+    def prepare_data(self, data: pd.DataFrame, memmap_path: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Prepare data for LSTM model
         
-    def prepare_data(self, data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
-        """Prepare data for LSTM model"""
+        Returns read-only strided views over the scaled prices (memory-mapped
+        from ``memmap_path`` when given) rather than an n x sequence_length copy.
+        """
         # Scale the data
         scaled_data = self.scaler.fit_transform(data[['price']].values)
         
         # Create sequences
-        X, y = [], []
-        for i in range(len(scaled_data) - self.sequence_length):
-            X.append(scaled_data[i:(i + self.sequence_length)])
-            y.append(scaled_data[i + self.sequence_length])
-            
-        return np.array(X), np.array(y)
+        return sliding_windows(scaled_data, self.sequence_length, memmap_path=memmap_path)
     
     def build_model(self):
         """Build LSTM model"""
@@ -61,7 +109,8 @@ class PricePredictor:
                 raise ValueError(f"Not enough data for {symbol}")
             
             # Prepare data
-            X, y = self.prepare_data(data)
+            memmap_path = os.path.join(self.memmap_dir, f'{symbol}_scaled.npy') if self.memmap_dir else None
+            X, y = self.prepare_data(data, memmap_path=memmap_path)
             
             # Split into train and test
             train_size = int(len(X) * 0.8)
@@ -71,10 +120,9 @@ class PricePredictor:
             # Build and train model
             self.build_model()
             history = self.model.fit(
-                X_train, y_train,
+                WindowBatches(X_train, y_train, batch_size, shuffle=True),
                 epochs=epochs,
-                batch_size=batch_size,
-                validation_data=(X_test, y_test),
+                validation_data=WindowBatches(X_test, y_test, batch_size),
                 verbose=1
             )
             
@@ -90,61 +138,359 @@ class PricePredictor:
         finally:
             db.close()
     
+    def train_streaming(self, symbol: str, epochs: int = 50, batch_size: int = 32,
+                        chunk_size: int = 50000, shuffle_buffer: int = 10000) -> Dict:
+        """Train the model for a symbol without loading its history into memory
+        
+        The scaler is fitted from the price range computed in the database.
+        Each epoch then streams rows through a server-side cursor in chunks
+        of ``chunk_size``, cuts windows per chunk and feeds them to Keras
+        through a shuffled, prefetched tf.data pipeline. Memory is bounded by
+        the chunk size and shuffle buffer rather than the history length.
+        """
+        count, low, high = self._price_range(symbol)
+        if count < self.sequence_length * 2:
+            raise ValueError(f"Not enough data for {symbol}")
+        self.scaler = MinMaxScaler(feature_range=(0, 1)).fit([[low], [high]])
+        
+        # Split into train and test by row, the test windows starting one sequence early
+        split = int((count - self.sequence_length) * 0.8) + self.sequence_length
+        train = (self.streaming_dataset(symbol, 0, split, chunk_size)
+                 .shuffle(shuffle_buffer).batch(batch_size).prefetch(tf.data.AUTOTUNE))
+        test = (self.streaming_dataset(symbol, split - self.sequence_length, count, chunk_size)
+                .batch(batch_size).prefetch(tf.data.AUTOTUNE))
+        
+        self.build_model()
+        history = self.model.fit(train, epochs=epochs, validation_data=test, verbose=1)
+        self._save_model(symbol)
+        
+        return {
+            'train_loss': history.history['loss'][-1],
+            'val_loss': history.history['val_loss'][-1],
+            'data_points': count
+        }
+    
+    def streaming_dataset(self, symbol: str, start: int, stop: int, chunk_size: int = 50000) -> tf.data.Dataset:
+        """Unbatched (window, next price) pairs of rows [start, stop), scaled with the current scaler"""
+        def generate():
+            chunks = (self.scaler.transform(chunk.reshape(-1, 1)).astype(np.float32)
+                      for chunk in self._stream_prices(symbol, start, stop, chunk_size))
+            yield from stream_windows(chunks, self.sequence_length)
+            
+        signature = (tf.TensorSpec(shape=(None, self.sequence_length, 1), dtype=tf.float32),
+                     tf.TensorSpec(shape=(None, 1), dtype=tf.float32))
+        return tf.data.Dataset.from_generator(generate, output_signature=signature).unbatch()
+    
+    def data_fingerprint(self, symbol: str) -> str:
+        """Digest of a symbol's row count, last timestamp and price sum, to detect new or changed data"""
+        return data_fingerprint(symbol, self.sequence_length)
+    
+    def _price_range(self, symbol: str) -> Tuple[int, float, float]:
+        """Row count, min and max price of a symbol, aggregated by the database"""
+        db = next(get_db())
+        try:
+            count, low, high = (db.query(func.count(StockData.price), func.min(StockData.price),
+                                         func.max(StockData.price))
+                                .filter(StockData.symbol == symbol)
+                                .one())
+            return count, low, high
+        finally:
+            db.close()
+    
+    def _stream_prices(self, symbol: str, start: int, stop: int, chunk_size: int) -> Iterator[np.ndarray]:
+        """Prices of rows [start, stop) in time order, fetched chunk by chunk from a server-side cursor"""
+        db = next(get_db())
+        try:
+            statement = (db.query(StockData.price)
+                         .filter(StockData.symbol == symbol)
+                         .order_by(StockData.timestamp)
+                         .offset(start)
+                         .limit(stop - start)
+                         .statement
+                         .execution_options(yield_per=chunk_size))
+            for partition in db.execute(statement).partitions():
+                yield np.fromiter((row[0] for row in partition), dtype=np.float64, count=len(partition))
+        finally:
+            db.close()
+    
+    def build_shared_model(self, n_symbols: int, embedding_dim: int = 8) -> tf.keras.Model:
+        """LSTM over (price window, symbol id) with a learned symbol embedding
+        
+        The embedding is repeated along the window and concatenated to the
+        scaled prices, so one network can learn symbol-specific dynamics.
+        """
+        window = Input(shape=(self.sequence_length, 1), name='window')
+        symbol_id = Input(shape=(), dtype='int32', name='symbol_id')
+        embedding = Embedding(n_symbols, embedding_dim)(symbol_id)
+        features = Concatenate()([window, RepeatVector(self.sequence_length)(embedding)])
+        x = LSTM(50, return_sequences=True)(features)
+        x = Dropout(0.2)(x)
+        x = LSTM(50, return_sequences=False)(x)
+        x = Dropout(0.2)(x)
+        x = Dense(25)(x)
+        model = Model(inputs=[window, symbol_id], outputs=Dense(1)(x))
+        model.compile(optimizer='adam', loss='mean_squared_error')
+        return model
+    
+    def train_shared(self, symbols: List[str], epochs: int = 50, batch_size: int = 256,
+                     shuffle_buffer: int = 10000) -> Dict:
+        """Train one model on all symbols, each scaled by its own MinMaxScaler
+        
+        Windows are cut by a tf.data pipeline from each symbol's scaled
+        series and interleaved across symbols; the first 80% of every series
+        trains and the rest validates.
+        """
+        history_data = self._price_history(symbols)
+        vocabulary, scalers, train_sets, val_sets = [], {}, [], []
+        for symbol in symbols:
+            data = history_data.get(symbol)
+            if data is None or len(data) < self.sequence_length * 2:
+                print(f"Skipping {symbol}: not enough data")
+                continue
+            scaler = MinMaxScaler(feature_range=(0, 1))
+            scaled = scaler.fit_transform(data[['price']].values).astype(np.float32)
+            symbol_id = len(vocabulary)
+            vocabulary.append(symbol)
+            scalers[symbol] = scaler
+            
+            split = int((len(scaled) - self.sequence_length) * 0.8) + self.sequence_length
+            train_sets.append(self._window_dataset(scaled[:split], symbol_id))
+            val_sets.append(self._window_dataset(scaled[split - self.sequence_length:], symbol_id))
+            
+        if not vocabulary:
+            raise ValueError("Not enough data for any symbol")
+        
+        train = (tf.data.Dataset.sample_from_datasets(train_sets)
+                 .shuffle(shuffle_buffer).batch(batch_size).prefetch(tf.data.AUTOTUNE))
+        val = tf.data.Dataset.sample_from_datasets(val_sets).batch(batch_size).prefetch(tf.data.AUTOTUNE)
+        
+        model = self.build_shared_model(len(vocabulary))
+        history = model.fit(train, epochs=epochs, validation_data=val, verbose=1)
+        
+        os.makedirs('models/saved_models', exist_ok=True)
+        # Written aside and renamed like per-symbol models, scalers first
+        joblib.dump({'symbols': vocabulary, 'scalers': scalers}, f'models/saved_models/.{SHARED_KEY}_scalers.tmp.pkl')
+        os.replace(f'models/saved_models/.{SHARED_KEY}_scalers.tmp.pkl', SHARED_SCALERS_PATH)
+        model.save(f'models/saved_models/.{SHARED_KEY}_model.tmp.h5')
+        os.replace(f'models/saved_models/.{SHARED_KEY}_model.tmp.h5', SHARED_MODEL_PATH)
+        with self._cache_lock:
+            self._shared = None
+        
+        return {
+            'train_loss': history.history['loss'][-1],
+            'val_loss': history.history['val_loss'][-1],
+            'symbols': vocabulary,
+            'data_points': {symbol: len(history_data[symbol]) for symbol in vocabulary}
+        }
+    
+    def _window_dataset(self, scaled: np.ndarray, symbol_id: int) -> tf.data.Dataset:
+        """((window, symbol id), next value) pairs over one scaled series, cut lazily"""
+        length = self.sequence_length + 1
+        return (tf.data.Dataset.from_tensor_slices(scaled)
+                .window(length, shift=1, drop_remainder=True)
+                .flat_map(lambda window: window.batch(length))
+                .map(lambda window: ((window[:-1], symbol_id), window[-1]),
+                     num_parallel_calls=tf.data.AUTOTUNE))
+    
+    def _price_history(self, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+        """Full price history of each symbol from one query, oldest first"""
+        db = next(get_db())
+        try:
+            data = pd.read_sql(
+                db.query(StockData.symbol, StockData.timestamp, StockData.price)
+                .filter(StockData.symbol.in_(symbols))
+                .order_by(StockData.symbol, StockData.timestamp)
+                .statement,
+                db.bind
+            )
+        finally:
+            db.close()
+        return {symbol: group for symbol, group in data.groupby('symbol', sort=False)}
+    
     def predict(self, symbol: str, days: int = 5) -> pd.DataFrame:
         """Make predictions for a symbol"""
-        # Load model and scaler
-        self._load_model(symbol)
+        prediction = self.predict_many([symbol], days)[symbol]
+        if isinstance(prediction, Exception):
+            raise prediction
+        return prediction
+    
+    def predict_many(self, symbols: List[str], days: int = 5) -> Dict[str, Union[pd.DataFrame, Exception]]:
+        """Make predictions for several symbols with one database query
+        
+        Symbols served by the same model (e.g. a shared multi-symbol model)
+        are stacked into one batch, so each forecast day is a single forward
+        pass for all of them. A symbol that cannot be predicted (too little
+        data, no model) maps to its exception instead of failing the others.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        recent_data = self._recent_prices(symbols)
         
-        # Get recent data
+        # Group input windows by model
+        results = {}
+        groups: Dict[int, Tuple[Callable, List]] = {}
+        for symbol in symbols:
+            try:
+                data = recent_data.get(symbol)
+                if data is None or len(data) < self.sequence_length:
+                    raise ValueError(f"Not enough recent data for {symbol}")
+                scaler, rollout, symbol_id = self._serving_entry(symbol)
+                window = scaler.transform(data[['price']].values)
+            except Exception as e:
+                results[symbol] = e
+                continue
+            groups.setdefault(id(rollout), (rollout, []))[1].append(
+                (symbol, scaler, window, symbol_id, data['timestamp'].iloc[-1]))
+            
+        for rollout, members in groups.values():
+            windows = np.stack([member[2] for member in members]).astype(np.float32)
+            symbol_ids = np.array([member[3] for member in members], dtype=np.int32)
+            try:
+                scaled = rollout(tf.constant(windows), tf.constant(symbol_ids), tf.constant(days)).numpy()
+            except Exception as e:
+                results.update((member[0], e) for member in members)
+                continue
+            for (symbol, scaler, _, _, last_date), row in zip(members, scaled):
+                # Inverse transform predictions
+                predictions = scaler.inverse_transform(row.reshape(-1, 1))
+                dates = pd.date_range(start=last_date, periods=days+1, freq='D')[1:]
+                results[symbol] = pd.DataFrame({
+                    'date': dates,
+                    'predicted_price': predictions.flatten()
+                })
+        return {symbol: results[symbol] for symbol in symbols}
+    
+    def _recent_prices(self, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+        """Last sequence_length prices of each symbol, oldest first"""
         db = next(get_db())
         try:
-            recent_data = pd.read_sql(
-                db.query(StockData)
-                .filter(StockData.symbol == symbol)
-                .order_by(StockData.timestamp.desc())
-                .limit(self.sequence_length)
+            rank = func.row_number().over(partition_by=StockData.symbol,
+                                          order_by=StockData.timestamp.desc()).label('rank')
+            ranked = (db.query(StockData.symbol, StockData.timestamp, StockData.price, rank)
+                      .filter(StockData.symbol.in_(symbols))
+                      .subquery())
+            data = pd.read_sql(
+                db.query(ranked)
+                .filter(ranked.c.rank <= self.sequence_length)
+                .order_by(ranked.c.symbol, ranked.c.timestamp)
                 .statement,
                 db.bind
             )
-            
-            if len(recent_data) < self.sequence_length:
-                raise ValueError(f"Not enough recent data for {symbol}")
-            
-            # Prepare data for prediction
-            scaled_data = self.scaler.transform(recent_data[['price']].values)
-            X = np.array([scaled_data])
-            
-            # Make predictions
-            predictions = []
-            current_sequence = X[0]
-            
-            for _ in range(days):
-                pred = self.model.predict(current_sequence.reshape(1, self.sequence_length, 1))
-                predictions.append(pred[0][0])
-                current_sequence = np.append(current_sequence[1:], pred)
-            
-            # Inverse transform predictions
-            predictions = self.scaler.inverse_transform(np.array(predictions).reshape(-1, 1))
-            
-            # Create prediction dates
-            last_date = recent_data['timestamp'].iloc[0]
-            dates = pd.date_range(start=last_date, periods=days+1, freq='D')[1:]
-            
-            return pd.DataFrame({
-                'date': dates,
-                'predicted_price': predictions.flatten()
-            })
-            
         finally:
             db.close()
+        return {symbol: group for symbol, group in data.groupby('symbol', sort=False)}
+    
+    def serves(self, symbol: str) -> bool:
+        """Whether a model is available for a symbol, either the shared model or its own"""
+        shared = self._shared_entry()
+        if shared is not None and symbol in shared[1]:
+            return True
+        if self.registry is not None:
+            return symbol != SHARED_KEY and symbol in self.registry
+        return os.path.exists(f'models/saved_models/{symbol}_model.h5')
+    
+    def served_symbols(self) -> List[str]:
+        """Symbols with a model available, either the shared model or their own"""
+        shared = self._shared_entry()
+        symbols = set(shared[1]) if shared is not None else set()
+        if self.registry is not None:
+            symbols.update(symbol for symbol in self.registry.symbols() if symbol != SHARED_KEY)
+        return sorted(symbols)
+    
+    def _serving_entry(self, symbol: str) -> Tuple[MinMaxScaler, Callable, int]:
+        """Scaler, rollout and symbol id serving a symbol, preferring the shared model"""
+        shared = self._shared_entry()
+        if shared is not None and symbol in shared[1]:
+            _, symbols, rollout = shared
+            symbol_id, scaler = symbols[symbol]
+            return scaler, rollout, symbol_id
+        _, scaler, rollout = self._cached_model(symbol)
+        return scaler, rollout, 0
+    
+    def _shared_entry(self) -> Optional[Tuple[tf.keras.Model, Dict[str, Tuple[int, MinMaxScaler]], Callable]]:
+        """The multi-symbol model if enabled and written, from the registry (hot-swapped) or loaded once"""
+        if not self.shared_model:
+            return None
+        if self.registry is not None:
+            return self.registry.get(SHARED_KEY) if SHARED_KEY in self.registry else None
+        if not os.path.exists(SHARED_MODEL_PATH):
+            return None
+        return self._load_shared()
+    
+    def _load_shared(self) -> Tuple[tf.keras.Model, Dict[str, Tuple[int, MinMaxScaler]], Callable]:
+        """The resident multi-symbol model, loaded once"""
+        with self._cache_lock:
+            if self._shared is None:
+                self._shared, _ = self._read_shared('models/saved_models')
+            return self._shared
+    
+    @classmethod
+    def _read_shared(cls, directory: str) -> Tuple[Tuple[tf.keras.Model, Dict, Callable], int]:
+        """Load the multi-symbol (model, {symbol: (id, scaler)}, rollout) and its approximate size in bytes"""
+        model = tf.keras.models.load_model(os.path.join(directory, f'{SHARED_KEY}_model.h5'))
+        saved = joblib.load(os.path.join(directory, f'{SHARED_KEY}_scalers.pkl'))
+        symbols = {symbol: (i, saved['scalers'][symbol]) for i, symbol in enumerate(saved['symbols'])}
+        nbytes = sum(int(np.prod(weight.shape)) * weight.dtype.size for weight in model.weights)
+        return (model, symbols, cls._compile_rollout(model, with_symbol_ids=True)), nbytes
+    
+    def _cached_model(self, symbol: str) -> Tuple[tf.keras.Model, MinMaxScaler, Callable]:
+        """Model, scaler and compiled rollout for a symbol, from the serving registry, the LRU or disk"""
+        if self.registry is not None:
+            return self.registry.get(symbol)
+        with self._cache_lock:
+            if symbol in self._model_cache:
+                self._model_cache.move_to_end(symbol)
+                return self._model_cache[symbol]
+            
+        entry, _ = self.load_entry('models/saved_models', symbol)
+        with self._cache_lock:
+            self._model_cache[symbol] = entry
+            while len(self._model_cache) > self.max_cached_models:
+                self._model_cache.popitem(last=False)
+        return entry
+    
+    @classmethod
+    def load_entry(cls, directory: str, symbol: str) -> Tuple[Tuple[tf.keras.Model, MinMaxScaler, Callable], int]:
+        """Load a symbol's (model, scaler, rollout) and its approximate size in bytes
+        
+        Usable as the loader of a ServingRegistry, where ``SHARED_KEY``
+        loads the multi-symbol model entry instead.
+        """
+        if symbol == SHARED_KEY:
+            return cls._read_shared(directory)
+        model = tf.keras.models.load_model(os.path.join(directory, f'{symbol}_model.h5'))
+        scaler = joblib.load(os.path.join(directory, f'{symbol}_scaler.pkl'))
+        nbytes = sum(int(np.prod(weight.shape)) * weight.dtype.size for weight in model.weights)
+        return (model, scaler, cls._compile_rollout(model)), nbytes
+    
+    @staticmethod
+    def _compile_rollout(model: tf.keras.Model, with_symbol_ids: bool = False) -> Callable:
+        """Autoregressive forecast as one traced graph: (batch, sequence, 1) windows -> (batch, days)
+        
+        Symbol ids are only fed to shared models; per-symbol models ignore them.
+        """
+        @tf.function(reduce_retracing=True)
+        def rollout(windows, symbol_ids, days):
+            predictions = tf.TensorArray(tf.float32, size=days)
+            for step in tf.range(days):
+                inputs = [windows, symbol_ids] if with_symbol_ids else windows
+                pred = model(inputs, training=False)
+                predictions = predictions.write(step, pred[:, 0])
+                windows = tf.concat([windows[:, 1:, :], pred[:, tf.newaxis, :]], axis=1)
+            return tf.transpose(predictions.stack())
+        return rollout
     
     def _save_model(self, symbol: str):
         """Save model and scaler for a symbol"""
         os.makedirs('models/saved_models', exist_ok=True)
-        self.model.save(f'models/saved_models/{symbol}_model.h5')
-        joblib.dump(self.scaler, f'models/saved_models/{symbol}_scaler.pkl')
+        # Write aside and rename so serving processes never read a partial file.
+        # The scaler goes first: the model file's timestamp is the served version.
+        joblib.dump(self.scaler, f'models/saved_models/.{symbol}_scaler.tmp.pkl')
+        os.replace(f'models/saved_models/.{symbol}_scaler.tmp.pkl', f'models/saved_models/{symbol}_scaler.pkl')
+        self.model.save(f'models/saved_models/.{symbol}_model.tmp.h5')
+        os.replace(f'models/saved_models/.{symbol}_model.tmp.h5', f'models/saved_models/{symbol}_model.h5')
+        with self._cache_lock:
+            self._model_cache.pop(symbol, None)
     
     def _load_model(self, symbol: str):
         """Load model and scaler for a symbol"""
-        self.model = tf.keras.models.load_model(f'models/saved_models/{symbol}_model.h5')
-        self.scaler = joblib.load(f'models/saved_models/{symbol}_scaler.pkl') 
\ No newline at end of file
+        self.model, self.scaler, _ = self._cached_model(symbol) 
\ No newline at end of file
@@ -0,0 +1,140 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+MODEL_SUFFIX = '_model.h5'
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry(NamedTuple):
+    value: Any
+    version: int
+    nbytes: int
+
+
+class ServingRegistry:
+    """Read-only models for concurrent serving, loaded lazily under a memory budget.
+
+    Available symbols are indexed in memory from the ``<symbol>_model.h5``
+    files in ``directory`` (versioned by modification time), so listing them
+    never touches the disk. ``get`` loads a model on first use through
+    ``loader(directory, symbol) -> (value, nbytes)`` and keeps it in an LRU
+    evicted once the loaded models exceed ``memory_budget_mb``.
+
+    ``refresh`` (run every ``poll_interval`` seconds once ``start`` is
+    called) rescans the directory and hot-swaps symbols whose files
+    changed: the new version is loaded aside and replaces the old entry in
+    one assignment, so requests already holding the old model finish on it.
+    Loaded values are shared between threads and must not be mutated.
+    """
+
+    def __init__(self, loader: Callable[[str, str], Tuple[Any, int]], directory: str = 'models/saved_models',
+                 memory_budget_mb: float = 1024, poll_interval: float = 30.0):
+        self.loader = loader
+        self.directory = directory
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.poll_interval = poll_interval
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self._index: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.refresh()
+
+    def symbols(self) -> List[str]:
+        return sorted(self._index)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._index
+
+    @property
+    def loaded_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.nbytes for entry in self._entries.values())
+
+    def get(self, symbol: str) -> Any:
+        """The current version of a symbol's model, loading it on first use"""
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is not None:
+                self._entries.move_to_end(symbol)
+                return entry.value
+        if symbol not in self._index:
+            raise KeyError(f"No model available for {symbol}")
+        return self._load(symbol)
+
+    def refresh(self) -> List[str]:
+        """Rescan the directory and swap in new versions of loaded symbols; returns the swapped symbols"""
+        index = self._scan()
+        with self._lock:
+            self._index = index
+            stale = [symbol for symbol, entry in self._entries.items() if index.get(symbol) != entry.version]
+            for symbol in stale:
+                if symbol not in index:
+                    del self._entries[symbol]
+        swapped = []
+        for symbol in stale:
+            if symbol in index:
+                try:
+                    self._load(symbol)
+                    swapped.append(symbol)
+                except Exception as e:
+                    # Keep serving the previous version, e.g. while a write is still in progress
+                    logger.error("Error reloading model for %s: %s", symbol, e)
+        return swapped
+
+    def start(self):
+        """Poll the directory for new model versions in a daemon thread"""
+        if self._watcher is None:
+            self._stop.clear()
+            self._watcher = threading.Thread(target=self._watch, daemon=True)
+            self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.refresh()
+
+    def _scan(self) -> Dict[str, int]:
+        if not os.path.isdir(self.directory):
+            return {}
+        index = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(MODEL_SUFFIX) and not entry.name.startswith('.'):
+                    index[entry.name[:-len(MODEL_SUFFIX)]] = entry.stat().st_mtime_ns
+        return index
+
+    def _load(self, symbol: str) -> Any:
+        """Load the indexed version of a symbol once, however many threads ask for it"""
+        with self._lock:
+            load_lock = self._load_locks.setdefault(symbol, threading.Lock())
+        with load_lock:
+            version = self._index.get(symbol)
+            with self._lock:
+                entry = self._entries.get(symbol)
+                if entry is not None and entry.version == version:
+                    return entry.value
+
+            value, nbytes = self.loader(self.directory, symbol)
+            with self._lock:
+                self._entries[symbol] = _Entry(value, version, nbytes)
+                self._entries.move_to_end(symbol)
+                self._evict()
+            return value
+
+    def _evict(self):
+        """Drop least recently used models beyond the memory budget, always keeping the newest"""
+        total = sum(entry.nbytes for entry in self._entries.values())
+        while total > self.memory_budget and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            total -= entry.nbytes
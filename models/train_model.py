@@ -2,64 +2,215 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from price_predictor import PricePredictor
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
 
-def train_and_evaluate(symbols: list, sequence_length: int = 60, epochs: int = 50):
-    """Train and evaluate models for multiple symbols"""
+# PricePredictor (and with it TensorFlow) is imported inside functions: the
+# workers import it to train, the parent only once the pool has finished (for
+# plots), and fingerprints come from the TensorFlow-free models.fingerprint.
+RESULTS_PATH = 'models/training_results.csv'
+RESULT_COLUMNS = ['symbol', 'status', 'train_loss', 'val_loss', 'data_points', 'fingerprint', 'trained_at', 'error']
+THREAD_VARIABLES = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+
+@contextmanager
+def _thread_limits(threads: int):
+    """Set the BLAS/OpenMP thread caps in this environment while worker processes are spawned
+
+    Spawned workers import numpy and pandas while unpickling this module,
+    before any initializer runs, and BLAS sizes its thread pool on import,
+    so the caps have to be in the environment the workers inherit.
+    """
+    previous = {variable: os.environ.get(variable) for variable in THREAD_VARIABLES}
+    os.environ.update({variable: str(threads) for variable in THREAD_VARIABLES})
+    try:
+        yield
+    finally:
+        for variable, value in previous.items():
+            if value is None:
+                os.environ.pop(variable, None)
+            else:
+                os.environ[variable] = value
+
+
+def _init_worker(threads: int):
+    """Cap TensorFlow's threads in each training process so workers don't oversubscribe the CPUs"""
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def train_symbol(symbol: str, sequence_length: int, epochs: int, fingerprint: str) -> Dict:
+    """Train and save one symbol's model in a worker process"""
+    from models.price_predictor import PricePredictor
+    row = {'symbol': symbol, 'fingerprint': fingerprint, 'trained_at': datetime.now().isoformat()}
+    try:
+        metrics = PricePredictor(sequence_length=sequence_length).train(symbol, epochs=epochs)
+        row.update(status='trained', **metrics)
+    except Exception as e:
+        row.update(status='failed', error=str(e))
+    return row
+
+
+def load_results(path: str = RESULTS_PATH) -> pd.DataFrame:
+    """Previously checkpointed results, one row per symbol (latest wins)"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    results = pd.read_csv(path).reindex(columns=RESULT_COLUMNS)
+    return results.drop_duplicates('symbol', keep='last').reset_index(drop=True)
+
+
+def _checkpoint(row: Dict, path: str = RESULTS_PATH):
+    """Append one result row so finished symbols survive a crash"""
+    write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+    pd.DataFrame([row], columns=RESULT_COLUMNS).to_csv(path, mode='a', header=write_header, index=False)
+
+
+def train_and_evaluate(symbols: list, sequence_length: int = 60, epochs: int = 50,
+                       workers: int = 1, threads_per_worker: Optional[int] = None,
+                       force: bool = False, plots: bool = True) -> pd.DataFrame:
+    """Train and evaluate models for multiple symbols
+
+    Symbols run concurrently in ``workers`` processes, each limited to
+    ``threads_per_worker`` threads. Every finished symbol is appended to the
+    results CSV right away. Symbols whose data fingerprint matches their
+    last successful run (and whose model file still exists) are skipped
+    unless ``force`` is set. Plots are rendered afterwards in a separate
+    stage from the saved models.
+    """
+    from models.fingerprint import data_fingerprint
+    threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+
+    # Compact the checkpoint to one row per symbol before appending to it
+    previous = load_results()
+    previous.to_csv(RESULTS_PATH, index=False)
+    previous = previous.set_index('symbol')
+    fingerprints = {symbol: data_fingerprint(symbol, sequence_length) for symbol in symbols}
+    pending = [symbol for symbol in symbols
+               if force or not _is_current(previous, symbol, fingerprints[symbol])]
+    skipped = len(symbols) - len(pending)
+    if skipped:
+        print(f"Skipping {skipped} symbols with unchanged data")
+
+    trained = []
+    context = multiprocessing.get_context('spawn')   # fresh TensorFlow runtime per worker
+    with _thread_limits(threads_per_worker), \
+            ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                initargs=(threads_per_worker,)) as executor:
+        futures = {executor.submit(train_symbol, symbol, sequence_length, epochs, fingerprints[symbol]): symbol
+                   for symbol in pending}
+        for future in as_completed(futures):
+            row = future.result()
+            _checkpoint(row)
+            if row['status'] == 'trained':
+                trained.append(row['symbol'])
+                print(f"Training completed for {row['symbol']}: "
+                      f"train loss {row['train_loss']:.4f}, val loss {row['val_loss']:.4f}, "
+                      f"{row['data_points']} data points")
+            else:
+                print(f"Error processing {row['symbol']}: {row['error']}")
+
+    if plots and trained:
+        render_plots(trained, sequence_length)
+    print(f"\nTraining results saved to '{RESULTS_PATH}'")
+    return load_results()
+
+
+def _is_current(previous: pd.DataFrame, symbol: str, fingerprint: str) -> bool:
+    if symbol not in previous.index:
+        return False
+    row = previous.loc[symbol]
+    return (row['status'] == 'trained' and row['fingerprint'] == fingerprint
+            and os.path.exists(f'models/saved_models/{symbol}_model.h5'))
+
+
+def render_plots(symbols: List[str], sequence_length: int = 60, days: int = 5):
+    """Post-processing stage: predict from the saved models and plot each symbol"""
+    from models.price_predictor import PricePredictor
+    os.makedirs('models/predictions', exist_ok=True)
     predictor = PricePredictor(sequence_length=sequence_length)
-    results = []
-    
-    for symbol in symbols:
-        print(f"\nTraining model for {symbol}...")
-        try:
-            # Train the model
-            metrics = predictor.train(symbol, epochs=epochs)
-            print(f"Training completed for {symbol}")
-            print(f"Train Loss: {metrics['train_loss']:.4f}")
-            print(f"Validation Loss: {metrics['val_loss']:.4f}")
-            print(f"Data Points Used: {metrics['data_points']}")
-            
-            # Make predictions
-            predictions = predictor.predict(symbol, days=5)
-            
-            # Plot predictions
-            plt.figure(figsize=(12, 6))
-            plt.plot(predictions['date'], predictions['predicted_price'], 'r-', label='Predicted')
-            plt.title(f'{symbol} Price Predictions')
-            plt.xlabel('Date')
-            plt.ylabel('Price')
-            plt.legend()
-            plt.grid(True)
-            plt.savefig(f'models/predictions/{symbol}_predictions.png')
-            plt.close()
-            
-            results.append({
-                'symbol': symbol,
-                'train_loss': metrics['train_loss'],
-                'val_loss': metrics['val_loss'],
-                'data_points': metrics['data_points']
-            })
-            
-        except Exception as e:
-            print(f"Error processing {symbol}: {str(e)}")
-            continue
-    
-    # Save results
-    results_df = pd.DataFrame(results)
-    results_df.to_csv('models/training_results.csv', index=False)
-    print("\nTraining results saved to 'models/training_results.csv'")
+    try:
+        predictions = predictor.predict_many(symbols, days=days)
+    except Exception as e:
+        print(f"Error predicting for plots: {str(e)}")
+        return
+    for symbol, prediction in predictions.items():
+        if isinstance(prediction, Exception):
+            print(f"Error predicting {symbol} for plots: {str(prediction)}")
+        else:
+            plot_predictions(symbol, prediction)
+
+
+def train_shared_and_evaluate(symbols: list, sequence_length: int = 60, epochs: int = 50):
+    """Train one shared model for all symbols and predict each from it"""
+    from models.price_predictor import PricePredictor
+    predictor = PricePredictor(sequence_length=sequence_length, shared_model=True)
+    print(f"\nTraining shared model for {len(symbols)} symbols...")
+    metrics = predictor.train_shared(symbols, epochs=epochs)
+    print(f"Train Loss: {metrics['train_loss']:.4f}")
+    print(f"Validation Loss: {metrics['val_loss']:.4f}")
+
+    predictions = predictor.predict_many(metrics['symbols'], days=5)
+    for symbol in metrics['symbols']:
+        if isinstance(predictions[symbol], Exception):
+            print(f"Error predicting {symbol} for plots: {str(predictions[symbol])}")
+        else:
+            plot_predictions(symbol, predictions[symbol])
+        # Appended like per-symbol runs, so earlier checkpoints are kept
+        _checkpoint({
+            'symbol': symbol,
+            'status': 'trained',
+            'train_loss': metrics['train_loss'],
+            'val_loss': metrics['val_loss'],
+            'data_points': metrics['data_points'][symbol],
+            'fingerprint': predictor.data_fingerprint(symbol),
+            'trained_at': datetime.now().isoformat()
+        })
+    print(f"\nTraining results saved to '{RESULTS_PATH}'")
+
+
+def plot_predictions(symbol: str, predictions: pd.DataFrame):
+    """Save a plot of a symbol's predicted prices"""
+    plt.figure(figsize=(12, 6))
+    plt.plot(predictions['date'], predictions['predicted_price'], 'r-', label='Predicted')
+    plt.title(f'{symbol} Price Predictions')
+    plt.xlabel('Date')
+    plt.ylabel('Price')
+    plt.legend()
+    plt.grid(True)
+    plt.savefig(f'models/predictions/{symbol}_predictions.png')
+    plt.close()
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Train price models for multiple symbols')
+    parser.add_argument('symbols', nargs='*', default=['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'META'])
+    parser.add_argument('--sequence-length', type=int, default=60)
+    parser.add_argument('--epochs', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads-per-worker', type=int)
+    parser.add_argument('--force', action='store_true', help='Retrain symbols whose data is unchanged')
+    parser.add_argument('--no-plots', action='store_true')
+    parser.add_argument('--shared', action='store_true', help='Train one model shared by all symbols')
+    args = parser.parse_args()
+
     # Create necessary directories
-    import os
     os.makedirs('models/predictions', exist_ok=True)
     os.makedirs('models/saved_models', exist_ok=True)
-    
-    # Symbols to train
-    symbols = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'META']
-    
+
     # Train and evaluate models
-    train_and_evaluate(symbols, sequence_length=60, epochs=50) 
\ No newline at end of file
+    if args.shared:
+        train_shared_and_evaluate(args.symbols, sequence_length=args.sequence_length, epochs=args.epochs)
+    else:
+        train_and_evaluate(args.symbols, sequence_length=args.sequence_length, epochs=args.epochs,
+                           workers=args.workers, threads_per_worker=args.threads_per_worker,
+                           force=args.force, plots=not args.no_plots)
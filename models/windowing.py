@@ -0,0 +1,73 @@
+"""Sliding-window training samples as strided views.
+
+``sliding_windows`` returns ``X[i] = values[i:i + window]`` and the matching
+targets as views into ``values`` (``numpy.lib.stride_tricks``), so building
+the n x window design matrix costs no memory. When ``memmap_path`` is given
+the values are first written to a .npy file and memory-mapped, and the views
+then read pages from disk on demand, for series larger than RAM.
+``stream_windows`` does the same for a series read chunk by chunk.
+
+Models still need contiguous input: copy one batch of rows at a time out of
+the views rather than the whole matrix.
+"""
+import os
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def to_memmap(values: np.ndarray, path: str) -> np.ndarray:
+    """Write ``values`` to a .npy file and reopen it read-only as a memmap"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    np.save(path, np.asarray(values))
+    return np.load(path, mmap_mode='r')
+
+
+def sliding_windows(values: np.ndarray, window: int, horizon: int = 1,
+                    memmap_path: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Windows and targets over the first axis of ``values``
+
+    Args:
+        values: (n,) series or (n, features) array
+        window: Observations per sample
+        horizon: Steps ahead of the window's last observation for the target
+        memmap_path: Optional .npy path to back the views with a memmap
+
+    Returns:
+        X of shape (n - window - horizon + 1, window[, features]) and y of
+        shape (n - window - horizon + 1[, features]), both read-only views
+    """
+    values = np.asarray(values) if memmap_path is None else to_memmap(values, memmap_path)
+    count = max(len(values) - window - horizon + 1, 0)
+    if count == 0:
+        return (np.empty((0, window) + values.shape[1:], dtype=values.dtype),
+                np.empty((0,) + values.shape[1:], dtype=values.dtype))
+
+    windows = sliding_window_view(values, window, axis=0)
+    if values.ndim > 1:
+        windows = np.moveaxis(windows, -1, 1)   # (samples, features, window) -> (samples, window, features)
+    return windows[:count], values[window + horizon - 1:]
+
+
+
+def stream_windows(chunks: Iterable[np.ndarray], window: int,
+                   horizon: int = 1) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Windows and targets over a series that arrives in consecutive chunks
+
+    The last ``window + horizon - 1`` values of each chunk are carried into
+    the next one, so the windows yielded across all chunks are exactly
+    those of ``sliding_windows`` over the concatenated series, while memory
+    stays bounded by the chunk size.
+    """
+    carry = None
+    overlap = window + horizon - 1
+    for chunk in chunks:
+        chunk = np.asarray(chunk)
+        values = chunk if carry is None else np.concatenate([carry, chunk])
+        X, y = sliding_windows(values, window, horizon)
+        if len(X):
+            yield X, y
+        carry = values[-overlap:] if overlap else values[:0]
@@ -0,0 +1,181 @@
+"""Nightly analytics for many client portfolios at once.
+
+All portfolios are stacked into one (portfolios x assets) weights matrix, so
+returns, volatility, VaR/CVaR, drawdown and stress results are matrix
+operations against the shared returns matrix rather than one
+``PortfolioAnalyzer`` call per client. Large books are split into chunks
+fanned out over worker processes; each worker memory-maps the returns
+matrix once instead of receiving a pickled copy per task.
+
+    python -m portfolio.batch_analytics returns.csv portfolios.json results.parquet
+"""
+import argparse
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from portfolio.risk_engine import scenario_matrix
+
+try:
+    import pyarrow  # noqa: F401  (needed by DataFrame.to_parquet)
+except ImportError:
+    pyarrow = None
+
+PERIODS_PER_YEAR = 252
+
+# Returns matrix of the current worker process, set once by _init_worker
+_worker_returns: Optional[np.ndarray] = None
+
+
+def weights_matrix(portfolios: Sequence[Dict[str, float]], prices: Dict[str, float],
+                   assets: List[str]) -> np.ndarray:
+    """Market-value weights of {symbol: quantity} portfolios over ``assets``"""
+    values = scenario_matrix(portfolios, assets) * np.array([prices.get(asset, 0.0) for asset in assets])
+    totals = values.sum(axis=1, keepdims=True)
+    return np.divide(values, totals, out=np.zeros_like(values), where=totals != 0)
+
+
+def portfolio_metrics(returns: np.ndarray, weights: np.ndarray,
+                      confidence_levels: Sequence[float] = (0.95, 0.99),
+                      stress: Optional[np.ndarray] = None,
+                      risk_free_rate: float = 0.02) -> Dict[str, np.ndarray]:
+    """Metrics for every row of ``weights`` from one (periods x portfolios) return matrix.
+
+    Args:
+        returns: (periods x assets) asset returns without NaN rows
+        weights: (portfolios x assets) weights
+        confidence_levels: VaR/CVaR levels, computed from a single sort
+        stress: Optional (scenarios x assets) impact matrix, see
+            ``RiskEngine.stress_test``
+
+    Returns:
+        Dict of column name -> array with one value per portfolio
+    """
+    portfolio_returns = returns @ weights.T                        # periods x portfolios
+    mean = portfolio_returns.mean(axis=0)
+    volatility = portfolio_returns.std(axis=0, ddof=1) * np.sqrt(PERIODS_PER_YEAR)
+    annual_return = mean * PERIODS_PER_YEAR
+
+    columns = {
+        'annual_return': annual_return,
+        'volatility': volatility,
+        'sharpe_ratio': np.divide(annual_return - risk_free_rate, volatility,
+                                  out=np.zeros_like(volatility), where=volatility > 0),
+    }
+
+    ordered = np.sort(portfolio_returns, axis=0)
+    tail_means = np.cumsum(ordered, axis=0) / np.arange(1, len(ordered) + 1)[:, np.newaxis]
+    for level in confidence_levels:
+        var = np.percentile(ordered, (1 - level) * 100, axis=0)
+        n_tail = np.maximum((ordered <= var).sum(axis=0), 1)
+        label = f'{level * 100:g}'
+        columns[f'var_{label}'] = var
+        columns[f'cvar_{label}'] = tail_means[n_tail - 1, np.arange(ordered.shape[1])]
+
+    wealth = np.cumprod(1 + portfolio_returns, axis=0)
+    columns['max_drawdown'] = (wealth / np.maximum.accumulate(wealth, axis=0) - 1).min(axis=0)
+
+    if stress is not None:
+        contributions = weights * (returns.mean(axis=0) * PERIODS_PER_YEAR)
+        stressed = contributions @ (1 + stress).T                 # portfolios x scenarios
+        for i in range(stress.shape[0]):
+            columns[f'stress_{i}'] = stressed[:, i]
+    return columns
+
+
+def _init_worker(returns_path: str):
+    global _worker_returns
+    _worker_returns = np.load(returns_path, mmap_mode='r')
+
+
+def _metrics_chunk(weights: np.ndarray, confidence_levels: Sequence[float],
+                   stress: Optional[np.ndarray], risk_free_rate: float) -> Dict[str, np.ndarray]:
+    return portfolio_metrics(np.asarray(_worker_returns), weights, confidence_levels, stress, risk_free_rate)
+
+
+def run_batch(returns: pd.DataFrame, weights: np.ndarray, portfolio_ids: Optional[Sequence] = None,
+              confidence_levels: Sequence[float] = (0.95, 0.99),
+              stress: Optional[np.ndarray] = None, risk_free_rate: float = 0.02,
+              n_jobs: int = 1, chunk_size: int = 2000) -> pd.DataFrame:
+    """Compute metrics for every portfolio, one row per portfolio.
+
+    Portfolios are processed in chunks of ``chunk_size``, which bounds the
+    (periods x portfolios) intermediates. With ``n_jobs > 1`` the chunks run
+    across worker processes; the returns matrix is written once to a
+    temporary .npy file that every worker memory-maps.
+    """
+    matrix = returns.to_numpy(dtype=np.float64)
+    matrix = matrix[~np.isnan(matrix).any(axis=1)]
+    weights = np.asarray(weights, dtype=np.float64)
+
+    chunks = [weights[start:start + chunk_size] for start in range(0, len(weights), chunk_size)] or [weights]
+    if n_jobs > 1 and len(chunks) > 1:
+        with tempfile.TemporaryDirectory() as directory:
+            returns_path = os.path.join(directory, 'returns.npy')
+            np.save(returns_path, matrix)
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                     initargs=(returns_path,)) as executor:
+                parts = list(executor.map(_metrics_chunk, chunks,
+                                          [confidence_levels] * len(chunks),
+                                          [stress] * len(chunks),
+                                          [risk_free_rate] * len(chunks)))
+    else:
+        parts = [portfolio_metrics(matrix, chunk, confidence_levels, stress, risk_free_rate) for chunk in chunks]
+    columns = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+    index = pd.Index(portfolio_ids if portfolio_ids is not None else range(len(weights)), name='portfolio')
+    return pd.DataFrame(columns, index=index)
+
+
+def write_results(results: pd.DataFrame, path: str):
+    """Write results column by column: Parquet (needs pyarrow) or .npz"""
+    if path.endswith('.parquet'):
+        if pyarrow is None:
+            raise ImportError("Parquet output requires pyarrow; use a .npz path instead")
+        results.to_parquet(path)
+    elif path.endswith('.npz'):
+        ids = results.index.to_numpy()
+        if ids.dtype == object:
+            ids = ids.astype(str)   # fixed-width unicode, loadable without allow_pickle
+        np.savez(path, portfolio=ids,
+                 **{name: results[name].to_numpy() for name in results.columns})
+    else:
+        raise ValueError(f"Unsupported output format: {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch portfolio analytics')
+    parser.add_argument('returns', help='CSV of asset returns, one column per symbol')
+    parser.add_argument('portfolios', help='JSON {portfolio_id: {symbol: quantity}}')
+    parser.add_argument('output', help='Output path (.parquet or .npz)')
+    parser.add_argument('--prices', help='JSON {symbol: price}; defaults to equal prices')
+    parser.add_argument('--scenarios', help='JSON list of {symbol: impact} stress scenarios')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    returns = pd.read_csv(args.returns, index_col=0)
+    assets = list(returns.columns)
+    with open(args.portfolios) as f:
+        portfolios = json.load(f)
+    prices = dict.fromkeys(assets, 1.0)
+    if args.prices:
+        with open(args.prices) as f:
+            prices.update(json.load(f))
+    stress = None
+    if args.scenarios:
+        with open(args.scenarios) as f:
+            stress = scenario_matrix(json.load(f), assets)
+
+    weights = weights_matrix(list(portfolios.values()), prices, assets)
+    results = run_batch(returns, weights, list(portfolios.keys()), stress=stress, n_jobs=args.jobs)
+    write_results(results, args.output)
+    print(f"Wrote metrics for {len(results)} portfolios to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
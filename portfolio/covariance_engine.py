@@ -0,0 +1,155 @@
+import hashlib
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class ReturnMoments:
+    """Mean and covariance of asset returns, computed once and updated incrementally.
+
+    The mean and the centered scatter matrix are merged batch by batch with
+    Chan's pairwise update, so appending new rows costs O(k * n^2) for k
+    rows and n assets instead of recomputing over the full history, without
+    the cancellation of raw sums of squares. Ledoit-Wolf's fourth-order
+    sums are accumulated around the first batch's mean for the same reason.
+    Derived matrices are cached until the next update.
+
+    Rows containing NaN (e.g. the first row of ``pct_change``) are skipped.
+    """
+
+    def __init__(self, returns: Optional[pd.DataFrame] = None, periods_per_year: int = 252,
+                 shrinkage: Optional[str] = None, assets: Optional[List[str]] = None):
+        if shrinkage not in (None, 'ledoit_wolf'):
+            raise ValueError(f"Unknown shrinkage method: {shrinkage}")
+        if returns is None and assets is None:
+            raise ValueError("Either returns or assets must be provided")
+
+        self.assets = list(returns.columns if returns is not None else assets)
+        self.periods_per_year = periods_per_year
+        self.shrinkage = shrinkage
+        self.shrinkage_intensity = 0.0
+
+        n_assets = len(self.assets)
+        self.n_observations = 0
+        self._mean = np.zeros(n_assets)
+        self._m2 = np.zeros((n_assets, n_assets))   # sum_t (x_t - mean)(x_t - mean)^T
+        if shrinkage == 'ledoit_wolf':
+            self._shift: Optional[np.ndarray] = None     # z = x - shift for the sums below
+            self._sum_sq_x = np.zeros((n_assets, n_assets))    # sum z_i^2 * z_j
+            self._sum_sq_sq = np.zeros((n_assets, n_assets))   # sum z_i^2 * z_j^2
+        self._cache = {}
+
+        if returns is not None:
+            self.update(returns)
+
+    def update(self, new_returns: pd.DataFrame) -> 'ReturnMoments':
+        """Fold new return rows into the running moments."""
+        x = new_returns[self.assets].to_numpy(dtype=np.float64)
+        x = x[~np.isnan(x).any(axis=1)]
+        if len(x) == 0:
+            return self
+
+        # Chan et al.: merge the batch's own mean and centered scatter
+        n_old, n_new = self.n_observations, len(x)
+        batch_mean = x.mean(axis=0)
+        centered = x - batch_mean
+        delta = batch_mean - self._mean
+        self.n_observations = n_old + n_new
+        self._mean = self._mean + delta * (n_new / self.n_observations)
+        self._m2 += centered.T @ centered + np.outer(delta, delta) * (n_old * n_new / self.n_observations)
+
+        if self.shrinkage == 'ledoit_wolf':
+            if self._shift is None:
+                self._shift = batch_mean
+            z = x - self._shift
+            z_sq = z * z
+            self._sum_sq_x += z_sq.T @ z
+            self._sum_sq_sq += z_sq.T @ z_sq
+        self._cache.clear()
+        return self
+
+    @property
+    def mean(self) -> np.ndarray:
+        """Per-period mean returns"""
+        if 'mean' not in self._cache:
+            self._cache['mean'] = self._mean.copy()
+        return self._cache['mean']
+
+    @property
+    def expected_returns(self) -> np.ndarray:
+        """Annualized mean returns"""
+        return self.mean * self.periods_per_year
+
+    @property
+    def covariance(self) -> np.ndarray:
+        """Annualized covariance matrix, shrunk if a shrinkage method is set"""
+        if 'covariance' not in self._cache:
+            if self.shrinkage == 'ledoit_wolf':
+                cov = self._ledoit_wolf_covariance()
+            else:
+                cov = self._scatter() / (self.n_observations - 1)
+            self._cache['covariance'] = cov * self.periods_per_year
+        return self._cache['covariance']
+
+    @property
+    def cholesky(self) -> np.ndarray:
+        """Lower Cholesky factor of the per-period covariance"""
+        if 'cholesky' not in self._cache:
+            cov = self.covariance / self.periods_per_year
+            # Tiny diagonal jitter keeps singular sample covariances factorizable
+            jitter = 1e-12 * np.trace(cov) / len(cov)
+            self._cache['cholesky'] = np.linalg.cholesky(cov + jitter * np.eye(len(cov)))
+        return self._cache['cholesky']
+
+    def portfolio_return(self, weights: np.ndarray) -> float:
+        """Annualized expected portfolio return"""
+        return float(self.expected_returns @ weights)
+
+    def portfolio_volatility(self, weights: np.ndarray) -> float:
+        """Annualized portfolio volatility"""
+        return float(np.sqrt(weights @ self.covariance @ weights))
+
+    def _scatter(self) -> np.ndarray:
+        """Centered sum of outer products, sum_t (x_t - m)(x_t - m)^T"""
+        return self._m2
+
+    def _ledoit_wolf_covariance(self) -> np.ndarray:
+        """Ledoit-Wolf shrinkage towards a scaled identity (same estimator as sklearn)."""
+        t = self.n_observations
+        n_assets = len(self.assets)
+        emp_cov = self._scatter() / t
+
+        # sum_t y_ti^2 y_tj^2 for centered y = z - m, expanded in sums of the
+        # shifted rows z, whose mean m is close to zero
+        m = self._mean - self._shift
+        s1 = t * m
+        cross = self._m2 + t * np.outer(m, m)
+        sum_sq = np.diag(cross)
+        fourth = (self._sum_sq_sq
+                  - 2 * self._sum_sq_x * m[np.newaxis, :]
+                  - 2 * self._sum_sq_x.T * m[:, np.newaxis]
+                  + np.outer(sum_sq, m ** 2)
+                  + np.outer(m ** 2, sum_sq)
+                  + 4 * np.outer(m, m) * cross
+                  - 2 * np.outer(m * s1, m ** 2)
+                  - 2 * np.outer(m ** 2, m * s1)
+                  + t * np.outer(m ** 2, m ** 2))
+
+        mu = np.trace(emp_cov) / n_assets
+        delta_ = np.sum(emp_cov ** 2)
+        beta = (fourth.sum() / t - delta_) / (n_assets * t)
+        delta = (delta_ - 2 * mu * np.trace(emp_cov) + n_assets * mu ** 2) / n_assets
+        beta = min(beta, delta)
+        self.shrinkage_intensity = 0.0 if beta == 0 else beta / delta
+
+        shrunk = (1 - self.shrinkage_intensity) * emp_cov
+        shrunk.flat[::n_assets + 1] += self.shrinkage_intensity * mu
+        return shrunk
+
+    @staticmethod
+    def fingerprint(returns: pd.DataFrame) -> str:
+        """Content hash used to reuse moments across calls with the same returns"""
+        digest = hashlib.sha1(np.ascontiguousarray(returns.to_numpy(dtype=np.float64)).tobytes())
+        digest.update(repr(list(returns.columns)).encode('utf-8'))
+        return digest.hexdigest()
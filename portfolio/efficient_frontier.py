@@ -0,0 +1,364 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy.optimize import minimize
+
+from portfolio.covariance_engine import ReturnMoments
+
+
+def solve_min_variance(covariance: np.ndarray, expected_returns: np.ndarray,
+                       target_return: Optional[float] = None,
+                       initial_weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """Long-only minimum-variance weights, optionally at a target return.
+
+    Uses SLSQP with analytic gradients for the objective and constraints.
+    Non-negativity is expressed through bounds only, so SLSQP does not carry
+    one inequality constraint per asset.
+    """
+    n_assets = len(expected_returns)
+    if initial_weights is None:
+        initial_weights = np.ones(n_assets) / n_assets
+
+    ones = np.ones(n_assets)
+    constraints = [{'type': 'eq', 'fun': lambda w: w.sum() - 1, 'jac': lambda w: ones}]
+    if target_return is not None:
+        constraints.append({
+            'type': 'eq',
+            'fun': lambda w: expected_returns @ w - target_return,
+            'jac': lambda w: expected_returns
+        })
+
+    # Variance has the same minimizer as volatility and a simpler gradient
+    def variance(w):
+        cov_w = covariance @ w
+        return w @ cov_w, 2 * cov_w
+
+    result = minimize(
+        variance,
+        initial_weights,
+        jac=True,
+        method='SLSQP',
+        bounds=[(0, 1)] * n_assets,
+        constraints=constraints,
+        options={'maxiter': 500, 'ftol': 1e-12}
+    )
+    return result.x
+
+
+def _solve_chain(covariance: np.ndarray, expected_returns: np.ndarray,
+                 targets: np.ndarray, initial_weights: Optional[np.ndarray]) -> np.ndarray:
+    """Solve consecutive targets, warm-starting each from the previous solution"""
+    weights = np.empty((len(targets), len(expected_returns)))
+    previous = initial_weights
+    for i, target in enumerate(targets):
+        previous = solve_min_variance(covariance, expected_returns, target, previous)
+        weights[i] = previous
+    return weights
+
+
+class _CriticalLine:
+    """State of the critical line algorithm for long-only weights in [0, 1].
+
+    Keeps the inverse of the free-asset covariance ``inverse`` and
+    ``projection = inverse @ covariance[free, :]`` up to date with rank-one
+    updates as assets enter and leave the free set, so each corner costs
+    O(k * n) instead of a fresh k x k inversion per candidate asset.
+    """
+
+    # Rank-one updates accumulate round-off, so refactor every so often
+    REFACTOR_EVERY = 64
+
+    def __init__(self, covariance: np.ndarray, mean: np.ndarray):
+        self.covariance = covariance
+        self.mean = mean
+        self.n_assets = len(mean)
+
+        # Start fully invested in the highest-return asset
+        first = int(np.argmax(mean))
+        self.weights = np.zeros(self.n_assets)
+        self.weights[first] = 1.0
+        self.free = [first]
+        self.updates = 0
+        self._terms_cache = None
+        self._refactor()
+
+    def _refactor(self):
+        self.inverse = np.linalg.inv(self.covariance[np.ix_(self.free, self.free)])
+        self.projection = self.inverse @ self.covariance[self.free, :]
+
+    def add(self, asset: int):
+        cov_row = self.covariance[asset]
+        cross = cov_row[self.free]
+        v = self.inverse @ cross
+        s = cov_row[asset] - cross @ v
+        k = len(self.free)
+
+        inverse = np.empty((k + 1, k + 1))
+        inverse[:k, :k] = self.inverse + np.outer(v, v) / s
+        inverse[:k, k] = inverse[k, :k] = -v / s
+        inverse[k, k] = 1 / s
+        residual = (cov_row - cross @ self.projection) / s
+        self.projection = np.vstack([self.projection - np.outer(v, residual), residual])
+        self.inverse = inverse
+        self.free.append(asset)
+        self._count_update()
+
+    def remove(self, position: int, bound: float):
+        keep = np.arange(len(self.free)) != position
+        column = self.inverse[keep, position]
+        pivot = self.inverse[position, position]
+        self.inverse = self.inverse[np.ix_(keep, keep)] - np.outer(column, column) / pivot
+        self.projection = self.projection[keep] - np.outer(column, self.projection[position]) / pivot
+        self.weights[self.free.pop(position)] = bound
+        self._count_update()
+
+    def _count_update(self):
+        self._terms_cache = None
+        self.updates += 1
+        if self.updates % self.REFACTOR_EVERY == 0:
+            self._refactor()
+
+    def _terms(self):
+        """Shared per-corner terms: free/bounded index sets and bounded-weight effects.
+
+        They only depend on the free set and the bounded weights, so they are
+        cached until the next add/remove.
+        """
+        if self._terms_cache is None:
+            self._terms_cache = self._compute_terms()
+        return self._terms_cache
+
+    def _compute_terms(self):
+        free = np.array(self.free)
+        bounded = np.setdiff1d(np.arange(self.n_assets), free)
+        w_b_full = self.weights.copy()
+        w_b_full[free] = 0
+        cov_w_b = self.covariance @ w_b_full       # covariance[:, bounded] @ w_bounded
+        a1 = self.inverse.sum(axis=1)                # inverse @ ones
+        a_mu = self.inverse @ self.mean[free]
+        l3 = self.inverse @ cov_w_b[free]
+        return free, bounded, w_b_full, cov_w_b, a1, a_mu, l3
+
+    def solve_free(self, lam: float):
+        """Set the free weights for a given lambda"""
+        free, _, w_b_full, _, a1, a_mu, l3 = self._terms()
+        gamma = (-lam * a_mu.sum() + 1 - w_b_full.sum() + l3.sum()) / a1.sum()
+        self.weights[free] = -l3 + gamma * a1 + lam * a_mu
+
+    def lambdas_to_bound(self):
+        """Lambda at which each free asset hits the bound it is moving towards"""
+        _, _, w_b_full, _, a1, a_mu, l3 = self._terms()
+        c1, c3 = a1.sum(), a_mu.sum()
+        c = -c1 * a_mu + c3 * a1
+        bound = np.where(c > 0, 1.0, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lam = ((1 - w_b_full.sum() + l3.sum()) * a1 - c1 * (bound + l3)) / c
+        return np.where(c != 0, lam, -np.inf), bound
+
+    def lambdas_to_free(self):
+        """Lambda at which each bounded asset would enter the free set.
+
+        Adding asset i is a rank-one extension of the free covariance, so all
+        candidates are evaluated at once through the Schur complement.
+        """
+        free, bounded, w_b_full, cov_w_b, a1, a_mu, _ = self._terms()
+        c1, c3 = a1.sum(), a_mu.sum()
+        w_b = w_b_full[bounded]
+        mean_b = self.mean[bounded]
+        var_b = np.diag(self.covariance)[bounded]
+
+        u = self.covariance[np.ix_(free, bounded)]   # k x m, one column per candidate
+        v = self.projection[:, bounded]              # inverse @ u
+        with np.errstate(divide='ignore', invalid='ignore'):
+            u_v = np.einsum('ij,ij->j', u, v)
+            s = var_b - u_v
+            v_sum = v.sum(axis=0)
+            v_mu = self.mean[free] @ v
+
+            # Terms for the extended free set F + {i}
+            a1_last = (1 - v_sum) / s
+            c1_new = c1 + (v_sum - 1) ** 2 / s
+            a_mu_last = (mean_b - v_mu) / s
+            c3_new = c3 + (v_mu - mean_b) * (v_sum - 1) / s
+            c = -c1_new * a_mu_last + c3_new * a1_last
+
+            # Bounded weights excluding the candidate itself
+            g = cov_w_b[free]
+            q = cov_w_b[bounded] - var_b * w_b
+            v_h = v.T @ g - u_v * w_b
+            sum_ah = (self.inverse @ g).sum() - v_sum * w_b
+            l3_last = (q - v_h) / s
+            l3_sum = sum_ah + (v_h - q) * (v_sum - 1) / s
+
+            lam = ((1 - (w_b.sum() - w_b) + l3_sum) * a1_last - c1_new * (w_b + l3_last)) / c
+        valid = (c != 0) & (s > 1e-14 * var_b)
+        return np.where(valid, lam, -np.inf), bounded
+
+
+def critical_line(covariance: np.ndarray, expected_returns: np.ndarray) -> np.ndarray:
+    """Corner portfolios of the long-only frontier (Markowitz critical line algorithm).
+
+    Efficient portfolios are linear in the target return between consecutive
+    corners, so the whole frontier follows from these few solves. Returns one
+    row of weights per corner, ordered from highest to lowest return, ending
+    with the global minimum-variance portfolio.
+    """
+    state = _CriticalLine(covariance, expected_returns)
+    corners = [state.weights.copy()]
+    last_lambda = np.inf
+
+    while True:
+        # Lambda must strictly decrease; round-off otherwise lets an asset
+        # that just entered leave again at the same lambda, forever
+        ceiling = last_lambda * (1 - 1e-9)
+
+        # Case a) a free weight moves to one of its bounds
+        lambda_in = -np.inf
+        if len(state.free) > 1:
+            lambdas, bounds = state.lambdas_to_bound()
+            lambdas[lambdas >= ceiling] = -np.inf
+            position_in = int(np.argmax(lambdas))
+            lambda_in, bound_in = lambdas[position_in], bounds[position_in]
+
+        # Case b) a bounded weight becomes free
+        lambda_out = -np.inf
+        if len(state.free) < state.n_assets:
+            lambdas, bounded = state.lambdas_to_free()
+            lambdas[lambdas >= ceiling] = -np.inf
+            j = int(np.argmax(lambdas))
+            lambda_out, asset_out = lambdas[j], int(bounded[j])
+
+        if lambda_in < 0 and lambda_out < 0:
+            # No more corners before lambda = 0, the minimum-variance portfolio
+            last_lambda = 0.0
+        elif lambda_in > lambda_out:
+            last_lambda = lambda_in
+            state.remove(position_in, bound_in)
+        else:
+            last_lambda = lambda_out
+            state.add(asset_out)
+
+        state.solve_free(last_lambda)
+        corners.append(state.weights.copy())
+        if last_lambda == 0:
+            break
+
+    corners = np.clip(np.array(corners), 0, 1)
+    # Drop corners that are not on the efficient (return-decreasing) branch
+    returns = corners @ expected_returns
+    keep = np.zeros(len(corners), dtype=bool)
+    best = -np.inf
+    for i in range(len(corners) - 1, -1, -1):
+        if returns[i] > best:
+            keep[i] = True
+            best = returns[i]
+    return corners[keep]
+
+
+def interpolate_frontier(corners: np.ndarray, expected_returns: np.ndarray,
+                         target_returns: np.ndarray) -> np.ndarray:
+    """Frontier weights at each target return from CLA corner portfolios"""
+    corner_returns = corners @ expected_returns
+    ascending = np.argsort(corner_returns)
+    corner_returns = corner_returns[ascending]
+    corners = corners[ascending]
+
+    targets = np.clip(target_returns, corner_returns[0], corner_returns[-1])
+    upper = np.clip(np.searchsorted(corner_returns, targets), 1, len(corners) - 1)
+    lower = upper - 1
+    span = corner_returns[upper] - corner_returns[lower]
+    t = np.where(span > 0, (targets - corner_returns[lower]) / np.where(span > 0, span, 1), 0.0)
+    return corners[lower] * (1 - t)[:, np.newaxis] + corners[upper] * t[:, np.newaxis]
+
+
+def closed_form_frontier(moments: ReturnMoments, target_returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Analytic frontier when short selling is allowed (budget + target return only).
+
+    Returns (weights, volatilities) with one row of weights per target.
+    """
+    covariance = moments.covariance
+    mu = moments.expected_returns
+    ones = np.ones(len(mu))
+
+    inv_ones = np.linalg.solve(covariance, ones)
+    inv_mu = np.linalg.solve(covariance, mu)
+    a = ones @ inv_ones
+    b = ones @ inv_mu
+    c = mu @ inv_mu
+    d = a * c - b ** 2
+
+    targets = np.asarray(target_returns, dtype=np.float64)
+    lam = (c - b * targets) / d
+    gamma = (a * targets - b) / d
+    weights = np.outer(lam, inv_ones) + np.outer(gamma, inv_mu)
+    volatilities = np.sqrt((a * targets ** 2 - 2 * b * targets + c) / d)
+    return weights, volatilities
+
+
+def efficient_frontier(moments: ReturnMoments, n_points: int = 100,
+                       target_returns: Optional[np.ndarray] = None,
+                       allow_short: bool = False, method: str = 'cla',
+                       n_jobs: int = 1) -> Dict[str, np.ndarray]:
+    """Compute the efficient frontier for the given return moments.
+
+    Args:
+        moments: Precomputed return moments
+        n_points: Number of frontier points when ``target_returns`` is not given;
+            they span the minimum-variance return up to the highest asset return
+        target_returns: Annualized target returns, ascending
+        allow_short: Use the closed-form unconstrained frontier
+        method: 'cla' (critical line corners, default) or 'slsqp' (one
+            warm-started solve per target) for the long-only frontier
+        n_jobs: Worker processes for the SLSQP solver (ignored by 'cla').
+            Targets are split into contiguous chunks solved in parallel;
+            within a chunk each point is warm-started from its neighbour.
+
+    Returns:
+        Dict with 'returns', 'volatilities' and 'weights' (one row per point)
+    """
+    if method not in ('cla', 'slsqp'):
+        raise ValueError(f"Unknown frontier method: {method}")
+
+    mu = moments.expected_returns
+    covariance = moments.covariance
+
+    if allow_short:
+        if target_returns is None:
+            target_returns = np.linspace(mu.min(), mu.max(), n_points)
+        target_returns = np.asarray(target_returns, dtype=np.float64)
+        weights, volatilities = closed_form_frontier(moments, target_returns)
+        return {'returns': target_returns, 'volatilities': volatilities, 'weights': weights}
+
+    if method == 'cla':
+        corners = critical_line(covariance, mu)
+        if target_returns is None:
+            # Efficient branch only: minimum-variance return up to the best asset
+            target_returns = np.linspace(corners[-1] @ mu, mu.max(), n_points)
+        target_returns = np.asarray(target_returns, dtype=np.float64)
+        weights = interpolate_frontier(corners, mu, target_returns)
+
+        # Targets below the minimum-variance return lie on the inefficient
+        # branch, which the corners do not cover; solve those directly,
+        # walking down from the minimum-variance portfolio
+        below = target_returns < corners[-1] @ mu
+        if below.any():
+            targets = target_returns[below][::-1]
+            weights[below] = _solve_chain(covariance, mu, targets, corners[-1])[::-1]
+    else:
+        # The global minimum-variance portfolio is a good starting point for every chain
+        start = solve_min_variance(covariance, mu)
+        if target_returns is None:
+            target_returns = np.linspace(start @ mu, mu.max(), n_points)
+        target_returns = np.asarray(target_returns, dtype=np.float64)
+
+        if n_jobs > 1 and len(target_returns) > n_jobs:
+            chunks = np.array_split(target_returns, n_jobs)
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                parts = executor.map(_solve_chain, [covariance] * n_jobs, [mu] * n_jobs, chunks, [start] * n_jobs)
+                weights = np.vstack(list(parts))
+        else:
+            weights = _solve_chain(covariance, mu, target_returns, start)
+
+    volatilities = np.sqrt(np.einsum('ij,jk,ik->i', weights, covariance, weights))
+    return {'returns': target_returns, 'volatilities': volatilities, 'weights': weights}
@@ -0,0 +1,142 @@
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from models.stock_models import StockMetadata
+
+
+class ExposureModel:
+    """Sparse symbol -> sector/industry/factor loading matrix.
+
+    Columns are named ``sector:<name>``, ``industry:<name>`` or
+    ``factor:<name>``. Sector and industry columns are 0/1 memberships (one
+    per symbol, 'Unknown' when missing) and factor columns hold numeric
+    loadings, so exposures of one or many portfolios are a single sparse
+    product ``W @ B``.
+    """
+
+    def __init__(self, symbols: List[str], columns: List[str], loadings: sparse.csr_matrix):
+        self.symbols = list(symbols)
+        self.columns = list(columns)
+        self.loadings = loadings.tocsr()
+        self._symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.factor_covariance: Optional[np.ndarray] = None
+        self.specific_variance: Optional[np.ndarray] = None
+        self.factor_kind: Optional[str] = None
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._symbol_index
+
+    @classmethod
+    def from_metadata(cls, metadata: Iterable[StockMetadata],
+                      factor_loadings: Optional[pd.DataFrame] = None) -> 'ExposureModel':
+        """Build the matrix from StockMetadata records and optional factor loadings
+
+        Args:
+            metadata: One record per symbol
+            factor_loadings: Optional (symbols x factors) frame of numeric
+                loadings, e.g. betas to style factors
+        """
+        records = list(metadata)
+        symbols = [record['symbol'] for record in records]
+        columns: List[str] = []
+        column_index: Dict[str, int] = {}
+        rows, cols = [], []
+        for row, record in enumerate(records):
+            for kind in ('sector', 'industry'):
+                name = f"{kind}:{record.get(kind) or 'Unknown'}"
+                if name not in column_index:
+                    column_index[name] = len(columns)
+                    columns.append(name)
+                rows.append(row)
+                cols.append(column_index[name])
+
+        memberships = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(symbols), len(columns)))
+        if factor_loadings is not None:
+            factors = factor_loadings.reindex(symbols).fillna(0.0)
+            columns += [f'factor:{name}' for name in factors.columns]
+            memberships = sparse.hstack([memberships, sparse.csr_matrix(factors.to_numpy(dtype=np.float64))])
+        return cls(symbols, columns, memberships)
+
+    def weights_matrix(self, weights: Union[Dict[str, float], np.ndarray]) -> np.ndarray:
+        """Weights as a (portfolios x symbols) matrix in model symbol order.
+
+        Accepts a {symbol: weight} dict (symbols outside the model are
+        ignored), a vector or a matrix already in model order.
+        """
+        if isinstance(weights, dict):
+            vector = np.zeros(len(self.symbols))
+            for symbol, weight in weights.items():
+                index = self._symbol_index.get(symbol)
+                if index is not None:
+                    vector[index] += weight
+            weights = vector
+        return np.atleast_2d(np.asarray(weights, dtype=np.float64))
+
+    def exposures(self, weights: Union[Dict[str, float], np.ndarray], kind: Optional[str] = None) -> pd.DataFrame:
+        """Exposure of each portfolio to each column, optionally only one kind
+
+        Returns a (portfolios x columns) frame; column names drop the kind
+        prefix when ``kind`` is given.
+        """
+        exposures = np.asarray((self.loadings.T @ self.weights_matrix(weights).T).T)
+        frame = pd.DataFrame(exposures, columns=self.columns)
+        if kind is not None:
+            prefix = f'{kind}:'
+            frame = frame.loc[:, [column.startswith(prefix) for column in self.columns]]
+            frame.columns = [column[len(prefix):] for column in frame.columns]
+        return frame
+
+    def sector_exposure(self, weights: Union[Dict[str, float], np.ndarray]) -> Dict[str, float]:
+        """Sector weights of a single portfolio, skipping sectors it does not hold"""
+        row = self.exposures(weights, 'sector').iloc[0]
+        return {sector: float(value) for sector, value in row.items() if value != 0}
+
+    def fit_factor_model(self, returns: pd.DataFrame, kind: str = 'sector') -> 'ExposureModel':
+        """Estimate factor returns by cross-sectional regression on the loadings.
+
+        Each period's asset returns are regressed on the ``kind`` columns
+        (all periods at once through one least-squares solve); the
+        covariance of the resulting factor returns and each asset's residual
+        variance make up the risk model used by ``risk_decomposition``.
+        """
+        exposure = self._kind_loadings(kind).toarray()
+        asset_returns = returns.reindex(columns=self.symbols).fillna(0.0).to_numpy(dtype=np.float64)
+        factor_returns, *_ = np.linalg.lstsq(exposure, asset_returns.T, rcond=None)   # factors x periods
+        residuals = asset_returns - (exposure @ factor_returns).T
+
+        self.factor_kind = kind
+        self.factor_covariance = np.atleast_2d(np.cov(factor_returns))
+        self.specific_variance = residuals.var(axis=0, ddof=1)
+        return self
+
+    def risk_decomposition(self, weights: Union[Dict[str, float], np.ndarray]) -> pd.DataFrame:
+        """Split each portfolio's variance into factor and specific parts.
+
+        Columns: total_variance, factor_variance, specific_variance and one
+        ``contribution:<factor>`` column per factor (the Euler contributions
+        b_k (F b)_k, which sum to factor_variance).
+        """
+        if self.factor_covariance is None:
+            raise ValueError("Call fit_factor_model before risk_decomposition")
+
+        weights = self.weights_matrix(weights)
+        factor_exposure = np.asarray((self._kind_loadings(self.factor_kind).T @ weights.T).T)
+        contributions = factor_exposure * (factor_exposure @ self.factor_covariance)
+        factor_variance = contributions.sum(axis=1)
+        specific_variance = (weights ** 2) @ self.specific_variance
+
+        prefix = f'{self.factor_kind}:'
+        names = [column[len(prefix):] for column in self.columns if column.startswith(prefix)]
+        frame = pd.DataFrame(contributions, columns=[f'contribution:{name}' for name in names])
+        frame.insert(0, 'specific_variance', specific_variance)
+        frame.insert(0, 'factor_variance', factor_variance)
+        frame.insert(0, 'total_variance', factor_variance + specific_variance)
+        return frame
+
+    def _kind_loadings(self, kind: str) -> sparse.csr_matrix:
+        prefix = f'{kind}:'
+        selected = [i for i, column in enumerate(self.columns) if column.startswith(prefix)]
+        return self.loadings[:, selected]
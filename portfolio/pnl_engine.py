@@ -0,0 +1,214 @@
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+
+class PnLEngine:
+    """Running P&L and exposure for many portfolios, driven by price tick batches.
+
+    Positions of every portfolio live in one sparse (portfolios x symbols)
+    quantity matrix kept in CSC form, so a batch of ticks touching k symbols
+    updates every affected portfolio with ``Q[:, k] @ price_change[k]`` -
+    work proportional to the positions in those symbols, not to the number
+    of portfolios.
+
+    Fills go into a per-position store (quantity, average cost) and realize
+    P&L as they reduce positions; the matrices are rebuilt lazily on the next
+    tick batch, since fills are rare next to ticks.
+
+    Subscribers receive change events for the portfolios whose unrealized
+    P&L moved (by at least ``threshold``) since the last event they were
+    sent. Only portfolios holding a ticked symbol, or filled since the last
+    batch, are checked.
+    """
+
+    def __init__(self, threshold: float = 0.0, capacity: int = 64):
+        self.threshold = threshold
+        self._portfolio_index: Dict[Hashable, int] = {}
+        self.portfolios: List[Hashable] = []
+        self._symbol_index: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self._prices = np.zeros(capacity)
+
+        self._positions: Dict[Tuple[int, int], List[float]] = {}   # (portfolio, symbol) -> [quantity, avg cost]
+        self._realized = np.zeros(capacity)
+        self._dirty = True
+        self._filled = set()   # portfolio rows with fills not yet checked for events
+        self._subscribers: List[Callable[[List[Dict]], None]] = []
+
+    def subscribe(self, callback: Callable[[List[Dict]], None]):
+        """Register a callback receiving each batch of change events"""
+        self._subscribers.append(callback)
+
+    @property
+    def prices(self) -> np.ndarray:
+        """Last price of each symbol"""
+        return self._prices[:len(self.symbols)]
+
+    @property
+    def realized(self) -> np.ndarray:
+        """Realized P&L of each portfolio"""
+        return self._realized[:len(self.portfolios)]
+
+    def apply_fill(self, portfolio: Hashable, symbol: str, quantity: float, price: float):
+        """Record a trade (negative quantity sells), realizing P&L on reductions"""
+        if quantity == 0:
+            raise ValueError(f"Fill for {symbol} in {portfolio} has zero quantity")
+        p = self._portfolio_row(portfolio)
+        s = self._symbol_column(symbol)
+        position = self._positions.setdefault((p, s), [0.0, 0.0])
+        held, cost = position
+
+        if held == 0 or np.sign(held) == np.sign(quantity):
+            position[1] = (held * cost + quantity * price) / (held + quantity)
+        else:
+            closed = np.sign(held) * min(abs(quantity), abs(held))
+            self._realized[p] += closed * (price - cost)
+            if abs(quantity) > abs(held):
+                position[1] = price   # position flipped, the remainder opens at the fill price
+        position[0] = held + quantity
+
+        if position[0] == 0:
+            del self._positions[(p, s)]
+        if self._prices[s] == 0:
+            self._prices[s] = price
+        self._filled.add(p)
+        self._dirty = True
+
+    def on_ticks(self, symbols: Sequence[str], prices: Sequence[float]) -> List[Dict]:
+        """Apply a batch of ticks and publish events for portfolios past the threshold.
+
+        Later ticks for the same symbol within a batch win.
+        """
+        if self._dirty:
+            self._rebuild()
+
+        columns = np.fromiter((self._symbol_index.get(symbol, -1) for symbol in symbols),
+                              dtype=np.int64, count=len(symbols))
+        prices = np.asarray(prices, dtype=np.float64)
+        known = columns >= 0
+        columns, prices = columns[known], prices[known]
+        if len(columns) == 0:
+            return []
+
+        # Keep the last tick per symbol
+        last = len(columns) - 1 - np.unique(columns[::-1], return_index=True)[1]
+        columns, prices = columns[last], prices[last]
+
+        change = prices - self._prices[columns]
+        self._prices[columns] = prices
+        self.market_value += self._quantities[:, columns] @ change
+        self.gross_exposure += self._abs_quantities[:, columns] @ change
+        # Portfolios holding the ticked symbols are the row indices of those CSC columns
+        touched = self._quantities[:, columns].indices
+        if self._filled:
+            touched = np.concatenate([touched, np.fromiter(self._filled, dtype=np.int64)])
+            self._filled.clear()
+        return self._publish(np.unique(touched))
+
+    @property
+    def unrealized(self) -> np.ndarray:
+        """Unrealized P&L per portfolio, market value minus cost basis"""
+        if self._dirty:
+            self._rebuild()
+        return self.market_value - self._cost_value
+
+    def symbol_exposure(self) -> np.ndarray:
+        """Net market value held in each symbol across all portfolios"""
+        if self._dirty:
+            self._rebuild()
+        return np.asarray(self._quantities.sum(axis=0)).ravel() * self.prices
+
+    def snapshot(self, portfolio: Hashable) -> Dict:
+        """Current P&L and exposure for one portfolio"""
+        p = self._portfolio_index[portfolio]
+        unrealized = self.unrealized
+        return {
+            'portfolio': portfolio,
+            'unrealized': float(unrealized[p]),
+            'realized': float(self.realized[p]),
+            'net_exposure': float(self.market_value[p]),
+            'gross_exposure': float(self.gross_exposure[p]),
+        }
+
+    def run(self, batches: Iterable[List[Dict]], on_events: Optional[Callable[[List[Dict]], None]] = None):
+        """Consume tick batches of {'symbol', 'price'} messages until the source ends
+
+        Typically fed from Kafka market data::
+
+            engine.run(processor.consume_batches(),
+                       on_events=lambda events: processor.publish('pnl_events', events))
+        """
+        for batch in batches:
+            ticks = [tick for tick in batch if 'symbol' in tick and 'price' in tick]
+            if not ticks:
+                continue
+            events = self.on_ticks([tick['symbol'] for tick in ticks], [tick['price'] for tick in ticks])
+            if events and on_events is not None:
+                on_events(events)
+
+    def _publish(self, candidates: np.ndarray) -> List[Dict]:
+        unrealized = self.market_value[candidates] - self._cost_value[candidates]
+        moved = np.abs(unrealized - self._last_published[candidates])
+        published = (moved > 0) & (moved >= self.threshold)
+        crossed, unrealized = candidates[published], unrealized[published]
+        if len(crossed) == 0:
+            return []
+        self._last_published[crossed] = unrealized
+
+        events = [{
+            'portfolio': self.portfolios[p],
+            'unrealized': u,
+            'realized': r,
+            'net_exposure': net,
+            'gross_exposure': gross,
+        } for p, u, r, net, gross in zip(crossed.tolist(), unrealized.tolist(),
+                                         self.realized[crossed].tolist(),
+                                         self.market_value[crossed].tolist(),
+                                         self.gross_exposure[crossed].tolist())]
+        for callback in self._subscribers:
+            callback(events)
+        return events
+
+    def _rebuild(self):
+        """Rebuild the sparse matrices and aggregates from the position store"""
+        shape = (len(self.portfolios), len(self.symbols))
+        if self._positions:
+            keys = np.array(list(self._positions.keys()), dtype=np.int64)
+            values = np.array(list(self._positions.values()))
+            rows, cols, quantities, costs = keys[:, 0], keys[:, 1], values[:, 0], values[:, 1]
+        else:
+            rows = cols = np.zeros(0, dtype=np.int64)
+            quantities = costs = np.zeros(0)
+
+        self._quantities = sparse.csc_matrix((quantities, (rows, cols)), shape=shape)
+        self._abs_quantities = abs(self._quantities)
+        self._cost_value = np.bincount(rows, weights=quantities * costs, minlength=shape[0])
+        self.market_value = self._quantities @ self.prices
+        self.gross_exposure = self._abs_quantities @ self.prices
+
+        published = getattr(self, '_last_published', np.zeros(0))
+        self._last_published = np.zeros(shape[0])
+        self._last_published[:len(published)] = published
+        self._dirty = False
+
+    def _portfolio_row(self, portfolio: Hashable) -> int:
+        row = self._portfolio_index.get(portfolio)
+        if row is None:
+            row = self._portfolio_index[portfolio] = len(self.portfolios)
+            self.portfolios.append(portfolio)
+            if row == len(self._realized):
+                self._realized = np.resize(self._realized, max(2 * row, 1))
+                self._realized[row:] = 0.0
+        return row
+
+    def _symbol_column(self, symbol: str) -> int:
+        column = self._symbol_index.get(symbol)
+        if column is None:
+            column = self._symbol_index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            if column == len(self._prices):
+                self._prices = np.resize(self._prices, max(2 * column, 1))
+                self._prices[column:] = 0.0
+        return column
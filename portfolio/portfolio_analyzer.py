@@ -1,72 +1,57 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, MutableMapping, Optional, Sequence, Tuple
 from datetime import datetime
-from scipy.optimize import minimize
 from scipy.stats import norm
 
+from portfolio.covariance_engine import ReturnMoments
+from portfolio.efficient_frontier import efficient_frontier, solve_min_variance
+from portfolio.exposure import ExposureModel
+from portfolio.position_book import BookColumn, HistoryMap, PositionBook
+from portfolio.risk_engine import RiskEngine
+
 class PortfolioAnalyzer:
     def __init__(self):
-        self.positions: Dict[str, float] = {}  # symbol -> quantity
-        self.prices: Dict[str, float] = {}     # symbol -> current_price
-        self.historical_data: Dict[str, pd.DataFrame] = {}  # symbol -> historical price data
+        self.book = PositionBook()  # symbols, quantities and current prices
+        self.positions = BookColumn(self.book, 'quantities')  # symbol -> quantity (writes through to the book)
+        self.prices = BookColumn(self.book, 'prices')         # symbol -> current_price (writes through to the book)
+        # symbol -> historical price data; assignments refresh the book's initial prices
+        self.historical_data: MutableMapping[str, pd.DataFrame] = HistoryMap(self._history_changed)
         self.risk_free_rate = 0.02  # 2% annual risk-free rate
+        self.covariance_shrinkage: Optional[str] = None  # None or 'ledoit_wolf'
+        self._moments_state: Optional[Tuple[str, int, ReturnMoments]] = None  # (fingerprint, rows, moments)
+        self.risk_seed: Optional[int] = 42  # Monte Carlo seed, None for fresh draws
+        self.exposure_model: Optional[ExposureModel] = None  # sector/factor loadings, see set_exposure_model
     
     def add_position(self, symbol: str, quantity: float, price: float):
         """Add or update a position in the portfolio."""
-        self.positions[symbol] = quantity
-        self.prices[symbol] = price
+        self.book.add(symbol, quantity, price, self._initial_price(symbol))
 
     def remove_position(self, symbol: str):
         """Remove a position from the portfolio."""
-        if symbol in self.positions:
-            del self.positions[symbol]
-        if symbol in self.prices:
-            del self.prices[symbol]
+        self.book.remove(symbol)
 
     def get_portfolio_value(self) -> float:
         """Calculate total portfolio value."""
-        return sum(self.positions[symbol] * self.prices[symbol] 
-                  for symbol in self.positions)
+        return self.book.total_value
 
     def get_position_weights(self) -> Dict[str, float]:
         """Calculate position weights in the portfolio."""
-        total_value = self.get_portfolio_value()
-        if total_value == 0:
-            return {symbol: 0 for symbol in self.positions}
-        
-        return {
-            symbol: (self.positions[symbol] * self.prices[symbol] / total_value)
-            for symbol in self.positions
-        }
+        return dict(zip(self.book.symbols, self.book.weights().tolist()))
 
     def calculate_returns(self) -> Dict[str, float]:
         """Calculate returns for each position."""
-        returns = {}
-        for symbol in self.positions:
-            if symbol in self.historical_data:
-                hist_data = self.historical_data[symbol]
-                if not hist_data.empty:
-                    initial_price = hist_data.iloc[0]['close']
-                    current_price = self.prices[symbol]
-                    returns[symbol] = (current_price - initial_price) / initial_price
-        return returns
+        known = ~np.isnan(self.book.initial_prices)
+        returns = self.book.returns()
+        return {symbol: returns[i] for i, symbol in enumerate(self.book.symbols) if known[i]}
 
     def calculate_portfolio_metrics(self) -> Dict[str, float]:
         """Calculate basic portfolio metrics."""
-        portfolio_value = self.get_portfolio_value()
-        weights = self.get_position_weights()
-        returns = self.calculate_returns()
-        
-        # Calculate portfolio return
-        portfolio_return = sum(weights.get(symbol, 0) * returns.get(symbol, 0) 
-                             for symbol in self.positions)
-
-        # Calculate other metrics
+        # Both come from running aggregates, not a pass over the positions
         metrics = {
-            'total_value': portfolio_value,
-            'return': portfolio_return,
-            'position_count': len(self.positions),
+            'total_value': self.book.total_value,
+            'return': self.book.portfolio_return,
+            'position_count': len(self.book),
             'timestamp': datetime.now().isoformat()
         }
 
@@ -74,40 +59,77 @@ class PortfolioAnalyzer:
 
     def update_prices(self, new_prices: Dict[str, float]):
         """Update current prices for positions."""
-        for symbol, price in new_prices.items():
-            if symbol in self.positions:
-                self.prices[symbol] = price
+        self.book.update_prices(list(new_prices.keys()), list(new_prices.values()))
 
     def update_historical_data(self, symbol: str, data: pd.DataFrame):
         """Update historical data for a symbol."""
         self.historical_data[symbol] = data
 
+    def _history_changed(self, symbol: str):
+        self.book.set_initial_price(symbol, self._initial_price(symbol))
+
+    def _initial_price(self, symbol: str) -> float:
+        """First historical close, which position returns are measured from"""
+        data = self.historical_data.get(symbol)
+        if data is None or data.empty:
+            return np.nan
+        return float(data.iloc[0]['close'])
+
+    def get_state_version(self) -> str:
+        """Hash of everything the portfolio summary depends on.
+
+        Cheap compared to building the summary, so callers can skip work when
+        the version has not changed since their last render.
+        """
+        return self.book.fingerprint()
+
     def get_portfolio_summary(self) -> Dict:
         """Get a complete portfolio summary."""
         metrics = self.calculate_portfolio_metrics()
-        weights = self.get_position_weights()
-        returns = self.calculate_returns()
-
-        positions_summary = []
-        for symbol in self.positions:
-            positions_summary.append({
-                'symbol': symbol,
-                'quantity': self.positions[symbol],
-                'price': self.prices[symbol],
-                'value': self.positions[symbol] * self.prices[symbol],
-                'weight': weights.get(symbol, 0),
-                'return': returns.get(symbol, 0)
-            })
+        book = self.book
+
+        columns = zip(book.symbols, book.quantities.tolist(), book.prices.tolist(),
+                      book.values().tolist(), book.weights().tolist(), book.returns().tolist())
+        positions_summary = [
+            {'symbol': symbol, 'quantity': quantity, 'price': price,
+             'value': value, 'weight': weight, 'return': ret}
+            for symbol, quantity, price, value, weight, ret in columns
+        ]
 
         return {
             'metrics': metrics,
             'positions': positions_summary
         }
 
-    def calculate_optimization_metrics(self, weights: np.ndarray, returns: pd.DataFrame) -> Dict:
+    def get_return_moments(self, returns: pd.DataFrame) -> ReturnMoments:
+        """Get mean/covariance moments for a returns frame, reusing them across calls
+
+        Only the most recent returns frame is kept. When ``returns`` is that
+        frame with new rows appended, the cached moments are updated with
+        just the new rows (so moments returned earlier change with them).
+        """
+        key = ReturnMoments.fingerprint(returns)
+        if self._moments_state is not None:
+            cached_key, cached_rows, moments = self._moments_state
+            if moments.shrinkage == self.covariance_shrinkage and list(returns.columns) == moments.assets:
+                if cached_key == key:
+                    return moments
+                if (len(returns) > cached_rows
+                        and ReturnMoments.fingerprint(returns.iloc[:cached_rows]) == cached_key):
+                    moments.update(returns.iloc[cached_rows:])
+                    self._moments_state = (key, len(returns), moments)
+                    return moments
+
+        moments = ReturnMoments(returns, shrinkage=self.covariance_shrinkage)
+        self._moments_state = (key, len(returns), moments)
+        return moments
+
+    def calculate_optimization_metrics(self, weights: np.ndarray, returns: pd.DataFrame,
+                                       moments: Optional[ReturnMoments] = None) -> Dict:
         """Calculate advanced portfolio metrics for optimization including expected return, volatility, and Sharpe ratio"""
-        portfolio_return = np.sum(returns.mean() * weights) * 252  # Annualized
-        portfolio_volatility = np.sqrt(np.dot(weights.T, np.dot(returns.cov() * 252, weights)))
+        moments = moments or self.get_return_moments(returns)
+        portfolio_return = moments.portfolio_return(weights)  # Annualized
+        portfolio_volatility = moments.portfolio_volatility(weights)
         sharpe_ratio = (portfolio_return - self.risk_free_rate) / portfolio_volatility
         
         return {
@@ -116,48 +138,88 @@ class PortfolioAnalyzer:
             'sharpe_ratio': sharpe_ratio
         }
     
-    def calculate_var(self, returns: pd.DataFrame, weights: np.ndarray, confidence_level: float = 0.95) -> float:
-        """Calculate Value at Risk (VaR) for the portfolio"""
+    def calculate_var(self, returns: pd.DataFrame, weights: np.ndarray, confidence_level: float = 0.95,
+                      method: str = 'historical') -> float:
+        """Calculate Value at Risk (VaR) for the portfolio
+        
+        ``method='historical'`` takes the percentile of realized portfolio
+        returns; ``method='parametric'`` uses the cached mean/covariance
+        moments under a normal assumption; ``method='monte_carlo'`` simulates
+        correlated scenarios (see ``calculate_risk_metrics``).
+        """
+        if method == 'parametric':
+            moments = self.get_return_moments(returns)
+            daily_mean = moments.mean @ weights
+            daily_volatility = moments.portfolio_volatility(weights) / np.sqrt(moments.periods_per_year)
+            return daily_mean + norm.ppf(1 - confidence_level) * daily_volatility
+        if method == 'monte_carlo':
+            return self.calculate_risk_metrics(returns, weights, [confidence_level], method)[confidence_level]['var']
+        
         portfolio_returns = np.dot(returns, weights)
         var = np.percentile(portfolio_returns, (1 - confidence_level) * 100)
         return var
     
-    def optimize_portfolio(self, returns: pd.DataFrame, target_return: float = None) -> Tuple[np.ndarray, Dict]:
-        """Optimize portfolio weights using Markowitz optimization"""
-        n_assets = len(returns.columns)
-        
-        def portfolio_volatility(weights):
-            return np.sqrt(np.dot(weights.T, np.dot(returns.cov() * 252, weights)))
+    def calculate_risk_metrics(self, returns: pd.DataFrame, weights: np.ndarray,
+                               confidence_levels: Sequence[float] = (0.95, 0.99),
+                               method: str = 'historical', n_scenarios: int = 100_000,
+                               horizon: int = 1, seed: Optional[int] = None) -> Dict[float, Dict[str, float]]:
+        """VaR and CVaR at several confidence levels in one pass
         
-        constraints = [
-            {'type': 'eq', 'fun': lambda x: np.sum(x) - 1},  # Weights sum to 1
-            {'type': 'ineq', 'fun': lambda x: x}  # Weights are positive
-        ]
+        Returns {confidence_level: {'var': ..., 'cvar': ...}}. Monte Carlo
+        scenarios are reproducible when ``seed`` is given (default
+        ``self.risk_seed``).
+        """
+        if method == 'historical':
+            return RiskEngine.historical_var(returns, weights, confidence_levels)
+        if method != 'monte_carlo':
+            raise ValueError(f"Unknown risk method: {method}")
         
-        if target_return is not None:
-            constraints.append({
-                'type': 'eq',
-                'fun': lambda x: np.sum(returns.mean() * x) * 252 - target_return
-            })
+        engine = RiskEngine(self.get_return_moments(returns), seed=self.risk_seed if seed is None else seed)
+        return engine.monte_carlo_var(weights, confidence_levels, n_scenarios, horizon)
+    
+    def optimize_portfolio(self, returns: pd.DataFrame, target_return: float = None) -> Tuple[np.ndarray, Dict]:
+        """Optimize portfolio weights using Markowitz optimization"""
+        # Moments are computed once, not on every SLSQP iteration
+        moments = self.get_return_moments(returns)
+        optimal_weights = solve_min_variance(moments.covariance, moments.expected_returns, target_return)
+        metrics = self.calculate_optimization_metrics(optimal_weights, returns, moments)
         
-        initial_weights = np.ones(n_assets) / n_assets
-        bounds = tuple((0, 1) for _ in range(n_assets))
+        return optimal_weights, metrics
+    
+    def calculate_efficient_frontier(self, returns: pd.DataFrame, n_points: int = 100,
+                                     allow_short: bool = False, method: str = 'cla',
+                                     n_jobs: int = 1) -> Dict[str, np.ndarray]:
+        """Efficient frontier from the cached return moments (see portfolio.efficient_frontier)
         
-        result = minimize(
-            portfolio_volatility,
-            initial_weights,
-            method='SLSQP',
-            bounds=bounds,
-            constraints=constraints
-        )
+        ``method`` is 'cla' (critical line, default) or 'slsqp'. ``n_jobs``
+        only applies to 'slsqp'; the critical line method is a single
+        sequential pass and ignores it.
+        """
+        moments = self.get_return_moments(returns)
+        return efficient_frontier(moments, n_points=n_points, allow_short=allow_short,
+                                  method=method, n_jobs=n_jobs)
+    
+    def set_exposure_model(self, model: ExposureModel):
+        """Use a precomputed sector/factor loading matrix for exposure queries"""
+        self.exposure_model = model
+    
+    def analyze_sector_exposure(self, portfolio: Dict[str, float],
+                                sector_data: Optional[Dict[str, str]] = None) -> Dict[str, float]:
+        """Analyze portfolio exposure across different sectors
         
-        optimal_weights = result.x
-        metrics = self.calculate_optimization_metrics(optimal_weights, returns)
+        Without ``sector_data`` the exposure model set through
+        ``set_exposure_model`` is used; symbols it does not cover count as
+        'Unknown', as with a ``sector_data`` dict.
+        """
+        if sector_data is None and self.exposure_model is not None:
+            sector_exposure = self.exposure_model.sector_exposure(portfolio)
+            unknown = sum(weight for symbol, weight in portfolio.items()
+                          if symbol not in self.exposure_model)
+            if unknown:
+                sector_exposure['Unknown'] = sector_exposure.get('Unknown', 0) + unknown
+            return sector_exposure
         
-        return optimal_weights, metrics
-    
-    def analyze_sector_exposure(self, portfolio: Dict[str, float], sector_data: Dict[str, str]) -> Dict[str, float]:
-        """Analyze portfolio exposure across different sectors"""
+        sector_data = sector_data or {}
         sector_exposure = {}
         for symbol, weight in portfolio.items():
             sector = sector_data.get(symbol, 'Unknown')
@@ -167,13 +229,7 @@ class PortfolioAnalyzer:
     def stress_test_portfolio(self, returns: pd.DataFrame, weights: np.ndarray, 
                             scenarios: List[Dict[str, float]]) -> Dict[str, float]:
         """Perform stress testing on portfolio under different market scenarios"""
-        results = {}
-        for scenario in scenarios:
-            adjusted_returns = returns.copy()
-            for symbol, impact in scenario.items():
-                if symbol in returns.columns:
-                    adjusted_returns[symbol] = returns[symbol] * (1 + impact)
-            
-            portfolio_return = np.sum(adjusted_returns.mean() * weights) * 252
-            results[str(scenario)] = portfolio_return
-
+        engine = RiskEngine(self.get_return_moments(returns))
+        # All scenarios are evaluated in one matrix product instead of copying the returns per scenario
+        portfolio_returns = engine.stress_test(weights, scenarios)
+        return {str(scenario): float(value) for scenario, value in zip(scenarios, portfolio_returns)}
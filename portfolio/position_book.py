@@ -0,0 +1,258 @@
+import hashlib
+from collections import UserDict
+from collections.abc import MutableMapping
+from typing import Callable, Dict, Iterator, List, Sequence
+
+import numpy as np
+
+
+class PositionBook:
+    """Positions stored as NumPy arrays behind a symbol -> row index map.
+
+    Total value and the value-weighted return numerator are kept as running
+    aggregates, so a price tick costs O(1) and summaries do not re-sum the
+    book. Removing a position moves the last row into its slot (O(1)), so
+    row order is insertion order only until the first removal.
+    """
+
+    # Running sums drift by round-off, so they are recomputed exactly every so often
+    RESYNC_EVERY = 4096
+
+    def __init__(self, capacity: int = 64):
+        self._index: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self._quantities = np.zeros(capacity)
+        self._prices = np.zeros(capacity)
+        self._initial_prices = np.full(capacity, np.nan)   # first historical close, NaN if unknown
+        self._updates = 0
+        self._resync()
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._index
+
+    @property
+    def quantities(self) -> np.ndarray:
+        return self._quantities[:len(self.symbols)]
+
+    @property
+    def prices(self) -> np.ndarray:
+        return self._prices[:len(self.symbols)]
+
+    @property
+    def initial_prices(self) -> np.ndarray:
+        return self._initial_prices[:len(self.symbols)]
+
+    def index_of(self, symbol: str) -> int:
+        return self._index[symbol]
+
+    def add(self, symbol: str, quantity: float, price: float, initial_price: float = np.nan):
+        """Add a position, or replace it if the symbol is already held"""
+        row = self._index.get(symbol)
+        if row is None:
+            row = len(self.symbols)
+            if row == len(self._quantities):
+                self._grow()
+            self._index[symbol] = row
+            self.symbols.append(symbol)
+        else:
+            self._apply(row, -1)
+        self._quantities[row] = quantity
+        self._prices[row] = price
+        self._initial_prices[row] = initial_price
+        self._apply(row, 1)
+
+    def remove(self, symbol: str):
+        """Remove a position by moving the last row into its slot"""
+        row = self._index.pop(symbol, None)
+        if row is None:
+            return
+        self._apply(row, -1)
+        last = len(self.symbols) - 1
+        if row != last:
+            moved = self.symbols[last]
+            self.symbols[row] = moved
+            self._index[moved] = row
+            for array in (self._quantities, self._prices, self._initial_prices):
+                array[row] = array[last]
+        self.symbols.pop()
+        self._initial_prices[last] = np.nan
+        self._quantities[last] = self._prices[last] = 0.0
+
+    def update_price(self, symbol: str, price: float) -> bool:
+        """Set the current price of a held symbol; returns False if it is not held"""
+        row = self._index.get(symbol)
+        if row is None:
+            return False
+        self._apply(row, -1)
+        self._prices[row] = price
+        self._apply(row, 1)
+        return True
+
+    def set_quantity(self, symbol: str, quantity: float) -> bool:
+        """Set the quantity of a held symbol; returns False if it is not held"""
+        row = self._index.get(symbol)
+        if row is None:
+            return False
+        self._apply(row, -1)
+        self._quantities[row] = quantity
+        self._apply(row, 1)
+        return True
+
+    def update_prices(self, symbols: Sequence[str], prices: Sequence[float]) -> int:
+        """Apply a batch of price ticks at once; symbols not held are ignored.
+
+        Returns the number of ticks applied. Later ticks for the same symbol win.
+        """
+        rows = np.fromiter((self._index.get(symbol, -1) for symbol in symbols),
+                           dtype=np.int64, count=len(symbols))
+        prices = np.asarray(prices, dtype=np.float64)
+        held = rows >= 0
+        rows, prices = rows[held], prices[held]
+        if len(rows) == 0:
+            return 0
+        last = len(rows) - 1 - np.unique(rows[::-1], return_index=True)[1]
+        rows, prices = rows[last], prices[last]
+
+        old_values = self._quantities[rows] * self._prices[rows]
+        new_values = self._quantities[rows] * prices
+        initial = self._initial_prices[rows]
+        known = np.isfinite(initial) & (initial != 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            old_returns = np.where(known, old_values * (self._prices[rows] / initial - 1), 0.0)
+            new_returns = np.where(known, new_values * (prices / initial - 1), 0.0)
+
+        self._prices[rows] = prices
+        self._total_value += float(new_values.sum() - old_values.sum())
+        self._weighted_return += float(new_returns.sum() - old_returns.sum())
+        self._updates += len(rows)
+        if self._updates >= self.RESYNC_EVERY:
+            self._updates = 0
+            self._resync()
+        return len(rows)
+
+    def set_initial_price(self, symbol: str, price: float):
+        """Set the reference price position returns are measured from"""
+        row = self._index.get(symbol)
+        if row is not None:
+            self._apply(row, -1)
+            self._initial_prices[row] = price
+            self._apply(row, 1)
+
+    @property
+    def total_value(self) -> float:
+        return self._total_value
+
+    @property
+    def portfolio_return(self) -> float:
+        """Value-weighted return of the positions since their initial prices"""
+        return self._weighted_return / self._total_value if self._total_value else 0.0
+
+    def values(self) -> np.ndarray:
+        return self.quantities * self.prices
+
+    def weights(self) -> np.ndarray:
+        values = self.values()
+        return values / self._total_value if self._total_value else np.zeros_like(values)
+
+    def returns(self) -> np.ndarray:
+        """Per-position return since the initial price, 0 where it is unknown"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = self.prices / self.initial_prices - 1
+        return np.where(np.isfinite(returns), returns, 0.0)
+
+    def fingerprint(self) -> str:
+        """Content hash of the book, identical across processes holding the same positions"""
+        digest = hashlib.sha1('\0'.join(self.symbols).encode('utf-8'))
+        for array in (self.quantities, self.prices, self.initial_prices):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.hexdigest()
+
+    def _apply(self, row: int, sign: int):
+        """Add (sign=1) or subtract (sign=-1) one row's contribution to the aggregates"""
+        value = self._quantities[row] * self._prices[row]
+        self._total_value += sign * value
+        initial = self._initial_prices[row]
+        if initial == initial and initial != 0:   # known (not NaN) and usable
+            self._weighted_return += sign * value * (self._prices[row] / initial - 1)
+
+        # Only resync once the row is back in a consistent state
+        if sign == 1:
+            self._updates += 1
+            if self._updates >= self.RESYNC_EVERY:
+                self._updates = 0
+                self._resync()
+
+    def _resync(self):
+        self._total_value = float(self.values().sum())
+        self._weighted_return = float((self.values() * self.returns()).sum())
+
+    def _grow(self):
+        capacity = 2 * len(self._quantities)
+        self._quantities = np.resize(self._quantities, capacity)
+        self._prices = np.resize(self._prices, capacity)
+        initial_prices = np.full(capacity, np.nan)
+        initial_prices[:len(self._initial_prices)] = self._initial_prices
+        self._initial_prices = initial_prices
+
+
+class BookColumn(MutableMapping):
+    """symbol -> value mapping over one PositionBook column that writes through to the book.
+
+    Assigning a quantity to a symbol that is not held adds it at price 0;
+    assigning a price requires the symbol to be held. Deleting a symbol
+    from either column removes the whole position.
+    """
+
+    def __init__(self, book: PositionBook, column: str):
+        self._book = book
+        self._column = column
+
+    def __getitem__(self, symbol: str) -> float:
+        return float(getattr(self._book, self._column)[self._book.index_of(symbol)])
+
+    def __setitem__(self, symbol: str, value: float):
+        if self._column == 'quantities':
+            if not self._book.set_quantity(symbol, value):
+                self._book.add(symbol, value, 0.0)
+        elif self._column == 'prices':
+            if not self._book.update_price(symbol, value):
+                raise KeyError(f"{symbol} is not held; add the position first")
+        else:
+            raise TypeError(f"The {self._column} column is read-only")
+
+    def __delitem__(self, symbol: str):
+        if symbol not in self._book:
+            raise KeyError(symbol)
+        self._book.remove(symbol)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._book.symbols))
+
+    def __len__(self) -> int:
+        return len(self._book)
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self._book
+
+
+class HistoryMap(UserDict):
+    """symbol -> historical data dict that reports every assignment or deletion.
+
+    Lets the owner keep values derived from the history (such as the book's
+    initial prices) in sync with direct edits like ``history[symbol] = df``.
+    """
+
+    def __init__(self, on_change: Callable[[str], None]):
+        super().__init__()
+        self._on_change = on_change
+
+    def __setitem__(self, symbol: str, data):
+        super().__setitem__(symbol, data)
+        self._on_change(symbol)
+
+    def __delitem__(self, symbol: str):
+        super().__delitem__(symbol)
+        self._on_change(symbol)
@@ -0,0 +1,117 @@
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from portfolio.covariance_engine import ReturnMoments
+
+
+def var_cvar(portfolio_returns: np.ndarray, confidence_levels: Sequence[float]) -> Dict[float, Dict[str, float]]:
+    """VaR and CVaR (expected shortfall) at several confidence levels from one sort.
+
+    Both are expressed as returns, like ``PortfolioAnalyzer.calculate_var``:
+    VaR is the (1 - level) quantile and CVaR the mean of the returns at or
+    below it, so losses are negative numbers.
+    """
+    ordered = np.sort(np.asarray(portfolio_returns, dtype=np.float64))
+    tail_sums = np.cumsum(ordered)
+    results = {}
+    for level in confidence_levels:
+        var = float(np.percentile(ordered, (1 - level) * 100))
+        n_tail = max(int(np.searchsorted(ordered, var, side='right')), 1)
+        results[level] = {'var': var, 'cvar': float(tail_sums[n_tail - 1] / n_tail)}
+    return results
+
+
+def scenario_matrix(scenarios: List[Dict[str, float]], assets: List[str]) -> np.ndarray:
+    """Stack {symbol: impact} scenarios into a (scenarios x assets) impact matrix"""
+    index = {asset: i for i, asset in enumerate(assets)}
+    matrix = np.zeros((len(scenarios), len(assets)))
+    for row, scenario in enumerate(scenarios):
+        for symbol, impact in scenario.items():
+            if symbol in index:
+                matrix[row, index[symbol]] = impact
+    return matrix
+
+
+class RiskEngine:
+    """Monte Carlo and historical-simulation risk for a set of assets.
+
+    Correlated scenarios are drawn as ``mean + z @ L.T`` with ``L`` the
+    Cholesky factor of the per-period covariance. Only portfolio returns are
+    kept: each chunk of ``chunk_size`` asset-level draws is reduced to
+    ``z @ (L.T @ w)`` straight away, so memory stays at
+    ``chunk_size * n_assets`` floats regardless of the scenario count.
+
+    Draws come from a seeded ``numpy.random.Generator``, so results are
+    reproducible for a given seed (and independent of ``chunk_size``).
+    """
+
+    def __init__(self, moments: ReturnMoments, seed: Optional[int] = None, chunk_size: int = 50_000):
+        self.moments = moments
+        self.seed = seed
+        self.chunk_size = chunk_size
+
+    def simulate_portfolio_returns(self, weights: np.ndarray, n_scenarios: int = 100_000,
+                                   horizon: int = 1, dof: Optional[float] = None) -> np.ndarray:
+        """Simulated portfolio returns over ``horizon`` periods.
+
+        Args:
+            weights: Portfolio weights, or a (portfolios x assets) matrix to
+                simulate several portfolios on the same scenarios
+            n_scenarios: Number of scenarios
+            horizon: Holding period in periods (days); mean and covariance
+                scale linearly with it
+            dof: Degrees of freedom for multivariate Student-t draws (fat
+                tails, scaled to the same covariance); None for normal
+
+        Returns:
+            Array of shape (n_scenarios,) or (n_scenarios, portfolios)
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        weight_matrix = np.atleast_2d(weights).T                 # assets x portfolios
+        loadings = self.moments.cholesky.T @ weight_matrix * np.sqrt(horizon)
+        drift = self.moments.mean @ weight_matrix * horizon
+
+        # Separate streams so the normal draws do not depend on chunking or dof
+        normal_rng, mixing_rng = (np.random.default_rng(seed)
+                                  for seed in np.random.SeedSequence(self.seed).spawn(2))
+        n_assets = len(self.moments.assets)
+        simulated = np.empty((n_scenarios, weight_matrix.shape[1]))
+        for start in range(0, n_scenarios, self.chunk_size):
+            stop = min(start + self.chunk_size, n_scenarios)
+            z = normal_rng.standard_normal((stop - start, n_assets))
+            shocks = z @ loadings
+            if dof is not None:
+                # Scale each scenario by a shared chi-square mixing variable
+                mixing = np.sqrt(mixing_rng.chisquare(dof, stop - start) / (dof - 2))
+                shocks /= mixing[:, np.newaxis]
+            simulated[start:stop] = drift + shocks
+
+        return simulated[:, 0] if weights.ndim == 1 else simulated
+
+    def monte_carlo_var(self, weights: np.ndarray, confidence_levels: Sequence[float] = (0.95, 0.99),
+                        n_scenarios: int = 100_000, horizon: int = 1,
+                        dof: Optional[float] = None) -> Dict[float, Dict[str, float]]:
+        """Monte Carlo VaR/CVaR at each confidence level from a single simulation"""
+        simulated = self.simulate_portfolio_returns(weights, n_scenarios, horizon, dof)
+        return var_cvar(simulated, confidence_levels)
+
+    @staticmethod
+    def historical_var(returns: pd.DataFrame, weights: np.ndarray,
+                       confidence_levels: Sequence[float] = (0.95, 0.99)) -> Dict[float, Dict[str, float]]:
+        """Historical-simulation VaR/CVaR from realized returns"""
+        portfolio_returns = returns.to_numpy(dtype=np.float64) @ weights
+        return var_cvar(portfolio_returns[~np.isnan(portfolio_returns)], confidence_levels)
+
+    def stress_test(self, weights: np.ndarray, scenarios: Union[np.ndarray, List[Dict[str, float]]]) -> np.ndarray:
+        """Annualized portfolio return under each stress scenario.
+
+        A scenario scales each asset's mean return by ``1 + impact``, so with
+        an (scenarios x assets) impact matrix ``S`` the results for all
+        scenarios are ``(1 + S) @ (mean * weights)`` in one matrix product.
+        """
+        if not isinstance(scenarios, np.ndarray):
+            scenarios = scenario_matrix(scenarios, self.moments.assets)
+        contributions = self.moments.expected_returns * weights
+        return (1 + scenarios) @ contributions
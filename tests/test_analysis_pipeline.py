@@ -0,0 +1,42 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from dashboard.analysis_pipeline import AnalysisPipeline
+from data_ingestion.snapshot_service import MarketSnapshot
+
+class TestAnalysisPipeline(unittest.TestCase):
+    def setUp(self):
+        close = np.linspace(90, 110, 80)
+        self.bars = pd.DataFrame({
+            'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+            'volume': np.full(80, 1000.0)
+        }, index=pd.bdate_range('2024-01-01', periods=80))
+        self.loads = 0
+        self.pipeline = AnalysisPipeline(MarketSnapshot(tempfile.mkdtemp(), loader=self._loader))
+        
+    def _loader(self, symbol):
+        self.loads += 1
+        return self.bars
+        
+    def test_memoized_figures_are_returned_as_copies(self):
+        first = self.pipeline.get_figures('aapl', '1M')
+        self.assertEqual(len(first), 4)
+        self.assertEqual(len(first[0].data[0].x), 21)
+        
+        first[0].update_layout(title='changed')
+        first[0].data[0].close = [0.0]
+        second = self.pipeline.get_figures('AAPL', '1M')
+        self.assertEqual(second[0].layout.title.text, 'AAPL Price Chart')
+        self.assertEqual(len(second[0].data[0].close), 21)
+        self.assertEqual(len(self.pipeline._cache), 1)
+        self.assertEqual(self.loads, 1)
+        
+    def test_invalid_symbol_raises(self):
+        with self.assertRaises(ValueError):
+            self.pipeline.get_figures('not a symbol', '1M')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.arima.model import ARIMA
+
+from models.arima_batch import ARIMAFitStore, candidate_orders, fit_universe, save_fits
+
+class TestARIMABatch(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(8)
+        returns = rng.normal(0, 0.01, (300, 4))
+        returns[1:, 0] += 0.5 * returns[:-1, 0]
+        self.prices = pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), columns=['A', 'B', 'C', 'D'])
+        self.prices.iloc[:40, 3] = np.nan
+
+    def test_search_persist_and_serve(self):
+        fits = fit_universe(self.prices, order=(1, 1, 0), search=True, max_p=1, max_q=1, n_jobs=2, chunk_size=2)
+        self.assertEqual([fit['symbol'] for fit in fits], ['A', 'B', 'C', 'D'])
+        self.assertTrue(all(fit['status'] == 'ok' for fit in fits))
+        self.assertEqual(fits[3]['nobs'], 260)
+
+        aics = [ARIMA(self.prices['A'].to_numpy(), order=order).fit().aic for order in candidate_orders((1, 1, 0), True, 1, 1)]
+        self.assertAlmostEqual(fits[0]['aic'], min(aics))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'fits.npz')
+            save_fits(fits, path)
+            store = ARIMAFitStore(path)
+        refit = ARIMA(self.prices['A'].to_numpy(), order=fits[0]['order']).filter(fits[0]['params'])
+        np.testing.assert_allclose(store.forecast('A', 5), refit.forecast(5), rtol=1e-6)
+
+    def test_timeouts_are_reported(self):
+        fits = fit_universe(self.prices[['A']], timeout=1e-4)
+        self.assertEqual(fits[0]['status'], 'failed')
+        self.assertEqual(fits[0]['timeouts'], 1)
+
+    def test_unexpected_errors_fail_only_their_symbol(self):
+        with patch('models.arima_batch.ARIMA', side_effect=IndexError('index 0 is out of bounds')):
+            fits = fit_universe(self.prices[['A', 'B']], search=True, max_p=1, max_q=0)
+        self.assertEqual([fit['status'] for fit in fits], ['failed', 'failed'])
+        self.assertEqual(fits[0]['errors'], 2)
+        self.assertIn('IndexError', fits[0]['error'])
+
+if __name__ == '__main__':
+    unittest.main()
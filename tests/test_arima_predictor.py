@@ -0,0 +1,44 @@
+import unittest
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.arima.model import ARIMA
+
+from models.arima_predictor import ARIMAPredictor
+
+def records(prices, start):
+    dates = pd.bdate_range(start, periods=len(prices))
+    return [{'timestamp': str(date), 'price': price} for date, price in zip(dates, prices)]
+
+class TestARIMAPredictor(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        self.prices = 100 + np.cumsum(rng.normal(0, 1, 460))
+        self.records = records(self.prices, '2020-01-01')
+        
+    def test_update_filters_without_refitting(self):
+        predictor = ARIMAPredictor(order=(2,1,0), refit_every=None, drift_threshold=None)
+        predictor.fit(self.records[:400])
+        params = predictor.model.params.copy()
+        for i in range(400, 460, 20):
+            predictor.update(self.records[i:i + 20])
+            
+        self.assertEqual(predictor.last_refit_reason, 'initial')
+        self.assertEqual(len(predictor.history), 460)
+        expected = ARIMA(pd.Series(self.prices), order=(2,1,0)).filter(params).forecast(5)
+        np.testing.assert_allclose(predictor.predict(5).to_numpy(), expected.to_numpy())
+        
+    def test_schedule_and_drift_trigger_refits(self):
+        predictor = ARIMAPredictor(order=(1,1,0), refit_every=30, drift_threshold=None)
+        predictor.fit(self.records[:400])
+        predictor.update(self.records[400:430])
+        self.assertEqual(predictor.last_refit_reason, 'schedule')
+        self.assertEqual(predictor.updates_since_fit, 0)
+        
+        predictor = ARIMAPredictor(order=(1,1,0), refit_every=None, drift_window=10)
+        predictor.fit(self.records[:400])
+        noisy = self.prices[400] + np.cumsum(np.random.default_rng(6).normal(0, 5, 10))
+        predictor.update(records(noisy, '2022-01-03'))
+        self.assertEqual(predictor.last_refit_reason, 'drift')
+
+if __name__ == '__main__':
+    unittest.main()
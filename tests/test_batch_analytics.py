@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from portfolio.batch_analytics import run_batch, weights_matrix, write_results
+from portfolio.portfolio_analyzer import PortfolioAnalyzer
+from portfolio.risk_engine import scenario_matrix, var_cvar
+
+class TestBatchAnalytics(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(9)
+        self.returns = pd.DataFrame(rng.normal(0.0004, 0.015, (400, 6)), columns=list('ABCDEF'))
+        self.weights = rng.dirichlet(np.ones(6), 50)
+        
+    def test_matches_single_portfolio_analytics(self):
+        scenarios = [{'A': -0.5}, {'C': 0.3, 'F': -1.0}]
+        stress = scenario_matrix(scenarios, list(self.returns.columns))
+        results = run_batch(self.returns, self.weights, stress=stress)
+        analyzer = PortfolioAnalyzer()
+        
+        for i in (0, 17, 49):
+            weights = self.weights[i]
+            expected = var_cvar(self.returns.to_numpy() @ weights, [0.95, 0.99])
+            metrics = analyzer.calculate_optimization_metrics(weights, self.returns)
+            stressed = analyzer.stress_test_portfolio(self.returns, weights, scenarios)
+            
+            self.assertAlmostEqual(results['var_95'].iloc[i], analyzer.calculate_var(self.returns, weights))
+            self.assertAlmostEqual(results['cvar_99'].iloc[i], expected[0.99]['cvar'])
+            self.assertAlmostEqual(results['volatility'].iloc[i], metrics['volatility'])
+            self.assertAlmostEqual(results['stress_1'].iloc[i], list(stressed.values())[1])
+            
+    def test_process_pool_matches_serial(self):
+        serial = run_batch(self.returns, self.weights)
+        parallel = run_batch(self.returns, self.weights, n_jobs=2, chunk_size=16)
+        chunked = run_batch(self.returns, self.weights, chunk_size=16)
+        
+        pd.testing.assert_frame_equal(serial, parallel)
+        pd.testing.assert_frame_equal(serial, chunked)
+        
+    def test_weights_and_columnar_output(self):
+        weights = weights_matrix([{'A': 10, 'B': 30}, {}], {'A': 3.0, 'B': 1.0}, ['A', 'B'])
+        np.testing.assert_allclose(weights, [[0.5, 0.5], [0.0, 0.0]])
+        
+        results = run_batch(self.returns, self.weights[:3], portfolio_ids=['x', 'y', 'z'])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.npz')
+            write_results(results, path)
+            stored = np.load(path)
+            np.testing.assert_allclose(stored['sharpe_ratio'], results['sharpe_ratio'])
+            self.assertEqual(list(stored['portfolio']), ['x', 'y', 'z'])
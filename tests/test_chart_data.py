@@ -0,0 +1,66 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import flask_app
+from data_ingestion.snapshot_service import MarketSnapshot, filter_timeframe, build_snapshot
+
+def daily_bars(start='2023-10-02', periods=120):
+    dates = pd.bdate_range(start, periods=periods)
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, periods))
+    return pd.DataFrame({
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+        'volume': np.full(periods, 1000.0)
+    }, index=dates)
+
+class TestChartData(unittest.TestCase):
+    def setUp(self):
+        self.bars = daily_bars()
+        self.snapshot = MarketSnapshot(tempfile.mkdtemp(), loader=lambda symbol: self.bars)
+        self.original = flask_app.market_snapshot
+        flask_app.market_snapshot = self.snapshot
+        self.client = flask_app.app.test_client()
+        
+    def tearDown(self):
+        flask_app.market_snapshot = self.original
+        
+    def test_timeframe_and_etag(self):
+        response = self.client.get('/api/chart-data/AAPL?timeframe=1M')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['close']), 21)
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+        
+        etag = response.headers['ETag']
+        cached = self.client.get('/api/chart-data/AAPL?timeframe=1M', headers={'If-None-Match': etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.data, b'')
+        
+        # A new bar changes the body and with it the ETag
+        self.bars = daily_bars(periods=121)
+        self.snapshot.refresh('AAPL', force=True)
+        changed = self.client.get('/api/chart-data/AAPL?timeframe=1M', headers={'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['ETag'], etag)
+        
+    def test_since_returns_only_newer_bars(self):
+        full = self.client.get('/api/chart-data/AAPL?timeframe=All').get_json()
+        since = full['timestamp'][-3]
+        delta = self.client.get(f'/api/chart-data/AAPL?timeframe=All&since={since}').get_json()
+        self.assertEqual(delta['timestamp'], full['timestamp'][-3:])
+        self.assertEqual(delta['close'], full['close'][-3:])
+        
+    def test_ytd_starts_at_january_first(self):
+        series = self.client.get('/api/chart-data/AAPL?timeframe=YTD').get_json()
+        dates = pd.to_datetime(series['timestamp'], unit='ms')
+        self.assertTrue((dates.year == 2024).all())
+        self.assertEqual(dates[0], pd.Timestamp('2024-01-01'))
+        self.assertEqual(len(filter_timeframe(build_snapshot(self.bars), 'YTD')), len(dates))
+        
+    def test_rejects_unknown_timeframe(self):
+        response = self.client.get('/api/chart-data/AAPL?timeframe=2W')
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
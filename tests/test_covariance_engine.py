@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from portfolio.covariance_engine import ReturnMoments
+
+class TestReturnMoments(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.returns = pd.DataFrame(
+            rng.normal(0.0005, 0.02, size=(300, 8)),
+            columns=[f'S{i}' for i in range(8)]
+        )
+        
+    def test_matches_pandas_moments(self):
+        moments = ReturnMoments(self.returns)
+        
+        np.testing.assert_allclose(moments.expected_returns, self.returns.mean() * 252)
+        np.testing.assert_allclose(moments.covariance, self.returns.cov() * 252)
+        
+    def test_incremental_update_matches_full_computation(self):
+        moments = ReturnMoments(self.returns.iloc[:200], shrinkage='ledoit_wolf')
+        moments.update(self.returns.iloc[200:])
+        full = ReturnMoments(self.returns, shrinkage='ledoit_wolf')
+        
+        self.assertEqual(moments.n_observations, 300)
+        np.testing.assert_allclose(moments.covariance, full.covariance)
+        
+    def test_ledoit_wolf_matches_reference(self):
+        try:
+            from sklearn.covariance import ledoit_wolf
+        except ImportError:
+            self.skipTest("scikit-learn not installed")
+        
+        moments = ReturnMoments(self.returns, shrinkage='ledoit_wolf')
+        expected, shrinkage = ledoit_wolf(self.returns.values)
+        
+        np.testing.assert_allclose(moments.covariance, expected * 252)
+        self.assertAlmostEqual(moments.shrinkage_intensity, shrinkage)
+        
+    def test_nan_rows_are_skipped(self):
+        warmup = pd.DataFrame(np.nan, index=[-1], columns=self.returns.columns)
+        moments = ReturnMoments(pd.concat([warmup, self.returns]))
+        
+        self.assertEqual(moments.n_observations, len(self.returns))
+
+    def test_stable_for_large_offsets(self):
+        # Tiny variance around a large level loses everything to raw sums of squares
+        shifted = self.returns * 1e-3 + 1e3
+        moments = ReturnMoments(shifted.iloc[:100])
+        for start in range(100, 300, 50):
+            moments.update(shifted.iloc[start:start + 50])
+        
+        expected = shifted.cov().to_numpy() * 252
+        np.testing.assert_allclose(moments.covariance, expected, rtol=1e-6, atol=1e-6 * expected.max())
+        try:
+            from sklearn.covariance import ledoit_wolf
+        except ImportError:
+            return
+        lw = ReturnMoments(shifted.iloc[:100], shrinkage='ledoit_wolf').update(shifted.iloc[100:])
+        expected, shrinkage = ledoit_wolf(shifted.values)
+        np.testing.assert_allclose(lw.covariance, expected * 252, rtol=1e-6, atol=1e-6 * expected.max() * 252)
+        self.assertAlmostEqual(lw.shrinkage_intensity, shrinkage, places=6)
+        
+    def test_analyzer_updates_appended_returns(self):
+        from portfolio.portfolio_analyzer import PortfolioAnalyzer
+        analyzer = PortfolioAnalyzer()
+        first = analyzer.get_return_moments(self.returns.iloc[:200])
+        extended = analyzer.get_return_moments(self.returns)
+        
+        self.assertIs(extended, first)
+        self.assertEqual(extended.n_observations, 300)
+        np.testing.assert_allclose(extended.covariance, self.returns.cov() * 252)
+        
+        # A frame that rewrites history is recomputed from scratch
+        revised = self.returns.copy()
+        revised.iloc[0] = 0.0
+        self.assertIsNot(analyzer.get_return_moments(revised), first)
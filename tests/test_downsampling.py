@@ -0,0 +1,54 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from dashboard.downsampling import lttb_indices, aggregate_ohlc, parse_relayout_range
+
+class TestDownsampling(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        n = 10000
+        close = 100 + np.cumsum(rng.normal(0, 1, n))
+        self.data = pd.DataFrame({
+            'date': pd.date_range(start='2020-01-01', periods=n, freq='min'),
+            'open': close + rng.normal(0, 0.5, n),
+            'high': close + 2,
+            'low': close - 2,
+            'close': close,
+            'volume': rng.integers(1000, 100000, n)
+        })
+        
+    def test_lttb_keeps_endpoints_and_threshold(self):
+        x = np.arange(len(self.data), dtype=float)
+        y = self.data['close'].to_numpy(copy=True)
+        y[5000] = 1000  # A spike must survive downsampling
+        
+        keep = lttb_indices(x, y, 500)
+        
+        self.assertEqual(len(keep), 500)
+        self.assertEqual(keep[0], 0)
+        self.assertEqual(keep[-1], len(x) - 1)
+        self.assertTrue(np.all(np.diff(keep) > 0))
+        self.assertIn(5000, keep)
+        
+    def test_lttb_returns_everything_below_threshold(self):
+        x = np.arange(10, dtype=float)
+        np.testing.assert_array_equal(lttb_indices(x, x, 50), np.arange(10))
+        
+    def test_aggregate_ohlc_preserves_extremes_and_volume(self):
+        candles = aggregate_ohlc(self.data, 100)
+        
+        self.assertEqual(len(candles), 100)
+        self.assertEqual(candles['high'].max(), self.data['high'].max())
+        self.assertEqual(candles['low'].min(), self.data['low'].min())
+        self.assertEqual(candles['volume'].sum(), self.data['volume'].sum())
+        self.assertEqual(candles['open'].iloc[0], self.data['open'].iloc[0])
+        self.assertEqual(candles['close'].iloc[-1], self.data['close'].iloc[-1])
+        
+    def test_parse_relayout_range(self):
+        self.assertEqual(
+            parse_relayout_range({'xaxis.range[0]': '2020-01-01', 'xaxis.range[1]': '2020-01-02'}),
+            ('2020-01-01', '2020-01-02')
+        )
+        self.assertIsNone(parse_relayout_range({'xaxis.autorange': True}))
+        self.assertIsNone(parse_relayout_range(None))
@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from portfolio.covariance_engine import ReturnMoments
+from portfolio.efficient_frontier import efficient_frontier, solve_min_variance
+
+class TestEfficientFrontier(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        market = rng.normal(0.0004, 0.01, 500)
+        returns = (rng.normal(0.0002, 0.0003, 15) + np.outer(market, rng.uniform(0.5, 1.5, 15))
+                   + rng.normal(0, 0.015, (500, 15)))
+        self.moments = ReturnMoments(pd.DataFrame(returns, columns=[f'S{i}' for i in range(15)]))
+
+    def test_critical_line_matches_slsqp(self):
+        frontier = efficient_frontier(self.moments, n_points=10)
+        covariance = self.moments.covariance
+        mu = self.moments.expected_returns
+
+        np.testing.assert_allclose(frontier['weights'].sum(axis=1), 1)
+        np.testing.assert_allclose(frontier['weights'] @ mu, frontier['returns'])
+        self.assertGreaterEqual(frontier['weights'].min(), 0)
+        for target, volatility in zip(frontier['returns'], frontier['volatilities']):
+            weights = solve_min_variance(covariance, mu, target)
+            self.assertAlmostEqual(volatility, np.sqrt(weights @ covariance @ weights), places=6)
+
+    def test_targets_below_minimum_variance_return(self):
+        mu = self.moments.expected_returns
+        targets = np.linspace(mu.min(), mu.max(), 12)
+        cla = efficient_frontier(self.moments, target_returns=targets)
+        slsqp = efficient_frontier(self.moments, target_returns=targets, method='slsqp')
+
+        np.testing.assert_allclose(cla['weights'] @ mu, targets, atol=1e-8)
+        np.testing.assert_allclose(cla['volatilities'], slsqp['volatilities'], atol=1e-6)
+
+    def test_closed_form_satisfies_constraints(self):
+        frontier = efficient_frontier(self.moments, n_points=5, allow_short=True)
+        covariance = self.moments.covariance
+
+        np.testing.assert_allclose(frontier['weights'].sum(axis=1), 1)
+        np.testing.assert_allclose(frontier['weights'] @ self.moments.expected_returns, frontier['returns'])
+        np.testing.assert_allclose(
+            frontier['volatilities'],
+            np.sqrt(np.einsum('ij,jk,ik->i', frontier['weights'], covariance, frontier['weights']))
+        )
+
+    def test_analyzer_passes_method_through(self):
+        from portfolio.portfolio_analyzer import PortfolioAnalyzer
+        analyzer = PortfolioAnalyzer()
+        returns = pd.DataFrame(np.random.default_rng(3).normal(0.0005, 0.01, (300, 5)),
+                               columns=[f'S{i}' for i in range(5)])
+        cla = analyzer.calculate_efficient_frontier(returns, n_points=6)
+        slsqp = analyzer.calculate_efficient_frontier(returns, n_points=6, method='slsqp', n_jobs=2)
+
+        np.testing.assert_allclose(cla['volatilities'], slsqp['volatilities'], atol=1e-6)
@@ -0,0 +1,49 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from portfolio.exposure import ExposureModel
+from portfolio.portfolio_analyzer import PortfolioAnalyzer
+
+METADATA = [
+    {'symbol': 'AAA', 'name': 'A', 'exchange': 'NYSE', 'sector': 'Tech', 'industry': 'Software'},
+    {'symbol': 'BBB', 'name': 'B', 'exchange': 'NYSE', 'sector': 'Tech', 'industry': 'Hardware'},
+    {'symbol': 'CCC', 'name': 'C', 'exchange': 'NASDAQ', 'sector': 'Energy', 'industry': 'Oil'},
+    {'symbol': 'DDD', 'name': 'D', 'exchange': 'NASDAQ', 'sector': None, 'industry': None},
+]
+
+class TestExposureModel(unittest.TestCase):
+    def setUp(self):
+        self.model = ExposureModel.from_metadata(METADATA)
+        
+    def test_sector_exposure_matches_dict_loop(self):
+        portfolio = {'AAA': 0.2, 'BBB': 0.3, 'CCC': 0.1, 'DDD': 0.15, 'ZZZ': 0.25}
+        sector_data = {record['symbol']: record['sector'] or 'Unknown' for record in METADATA}
+        analyzer = PortfolioAnalyzer()
+        expected = analyzer.analyze_sector_exposure(portfolio, sector_data)
+        analyzer.set_exposure_model(self.model)
+        
+        result = analyzer.analyze_sector_exposure(portfolio)
+        self.assertEqual(result.keys(), expected.keys())
+        for sector in expected:
+            self.assertAlmostEqual(result[sector], expected[sector])
+            
+    def test_many_portfolios_in_one_product(self):
+        weights = np.random.default_rng(1).dirichlet(np.ones(4), 10)
+        exposures = self.model.exposures(weights, 'industry')
+        
+        self.assertEqual(exposures.shape, (10, 4))
+        np.testing.assert_allclose(exposures['Software'], weights[:, 0])
+        np.testing.assert_allclose(exposures.sum(axis=1), 1)
+        
+    def test_factor_risk_decomposition_sums_to_total(self):
+        rng = np.random.default_rng(5)
+        sector_returns = rng.normal(0, 0.01, (500, 3))
+        returns = pd.DataFrame(sector_returns[:, [0, 0, 1, 2]] + rng.normal(0, 0.002, (500, 4)),
+                               columns=['AAA', 'BBB', 'CCC', 'DDD'])
+        weights = np.array([0.4, 0.3, 0.2, 0.1])
+        decomposition = self.model.fit_factor_model(returns).risk_decomposition(weights).iloc[0]
+        
+        contributions = decomposition.filter(like='contribution:').sum()
+        self.assertAlmostEqual(contributions, decomposition['factor_variance'])
+        self.assertAlmostEqual(decomposition['total_variance'] / np.var(returns.to_numpy() @ weights, ddof=1), 1, delta=0.05)
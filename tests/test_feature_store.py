@@ -0,0 +1,94 @@
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from analysis.feature_store import FeatureStore
+from analysis.technical_analyzer import TechnicalAnalyzer
+from models.prediction_manager import PredictionManager
+
+class TestFeatureStore(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(10)
+        self.bars = pd.DataFrame({
+            'close': 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 320))),
+            'volume': rng.uniform(1e5, 1e6, 320),
+        }, index=pd.bdate_range('2021-01-01', periods=320))
+        self.features = [('sma', {'window': 50}), ('volatility', {}), ('rsi', {}),
+                         ('returns', {'column': 'volume', 'periods': 5}), ('macd', {})]
+        
+    def test_incremental_appends_match_full_computation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = FeatureStore(directory)
+            store.append('A', self.bars.iloc[:200])
+            store.frame('A', self.features)
+            for start in range(200, 320, 9):
+                # Overlapping bars are ignored, only newer ones are added
+                self.assertEqual(store.append('A', self.bars.iloc[start - 4:start + 9]), min(9, 320 - start))
+            store.flush()
+            reloaded = FeatureStore(directory).frame('A', self.features)
+            
+        full = FeatureStore()
+        full.append('A', self.bars)
+        expected = full.frame('A', self.features)
+        pd.testing.assert_frame_equal(reloaded, expected, check_freq=False, rtol=1e-9)
+        np.testing.assert_allclose(expected['sma|close|window=50'], self.bars['close'].rolling(50).mean(), rtol=1e-12)
+        
+    def test_backfill_and_tz_aware_index_round_trip(self):
+        bars = self.bars.tz_localize('America/New_York')
+        with tempfile.TemporaryDirectory() as directory:
+            store = FeatureStore(directory)
+            store.append('A', bars.iloc[100:200])
+            store.frame('A', self.features)
+            # Older bars are merged into place rather than dropped
+            self.assertEqual(store.append('A', bars.iloc[:120]), 100)
+            self.assertEqual(store.append('A', bars.iloc[150:320:2]), 60)
+            self.assertEqual(store.append('A', bars), 60)
+            store.flush()
+            reloaded = FeatureStore(directory).frame('A', self.features)
+            
+        full = FeatureStore()
+        full.append('A', bars)
+        expected = full.frame('A', self.features)
+        self.assertEqual(str(reloaded.index.tz), 'America/New_York')
+        pd.testing.assert_frame_equal(reloaded, expected, check_freq=False, rtol=1e-9)
+        
+    def test_revised_bars_overwrite_stored_ones(self):
+        store = FeatureStore()
+        store.append('A', self.bars.iloc[:300])
+        store.frame('A', self.features)
+        self.assertEqual(store.append('A', self.bars.iloc[290:300]), 0)
+        
+        # The last bar is updated intraday, then a daily close is revised further back
+        revised = self.bars.copy()
+        revised.iloc[299, 0] *= 1.05
+        self.assertEqual(store.append('A', revised.iloc[295:300]), 1)
+        revised.iloc[250, 0] *= 0.97
+        self.assertEqual(store.append('A', revised), 21)
+        
+        full = FeatureStore()
+        full.append('A', revised)
+        pd.testing.assert_frame_equal(store.frame('A', self.features), full.frame('A', self.features),
+                                      check_freq=False, rtol=1e-9)
+        
+    def test_feature_params(self):
+        store = FeatureStore()
+        store.append('A', self.bars)
+        pd.testing.assert_series_equal(store.get('A', 'sma'), store.get('A', 'sma', window=20))
+        with self.assertRaises(ValueError):
+            store.get('A', 'sma', windows=20)
+        
+    def test_consumers_read_store_columns(self):
+        store = FeatureStore()
+        manager = PredictionManager(feature_store=store)
+        pd.testing.assert_frame_equal(manager._create_features(self.bars, symbol='A'),
+                                      PredictionManager()._create_features(self.bars), rtol=1e-9)
+        self.assertIn('sma|close|window=200', store.frame('A', [('sma', {'window': 200})]))
+        
+        stored = TechnicalAnalyzer(feature_store=store).analyze_stock(self.bars, symbol='A')
+        plain = TechnicalAnalyzer().analyze_stock(self.bars)
+        self.assertEqual(stored['overall_signal']['signal'], plain['overall_signal']['signal'])
+        self.assertAlmostEqual(stored['overall_signal']['strength'], plain['overall_signal']['strength'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import unittest
+
+from api.micro_batcher import MicroBatcher
+
+class TestMicroBatcher(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+        self.threads = set()
+
+    def _handler(self, items):
+        self.batches.append(list(items))
+        self.threads.add(threading.current_thread().name)
+        return [ValueError(item) if item < 0 else item * 2 for item in items]
+
+    def _run(self, batcher, items):
+        async def run():
+            batcher.start()
+            try:
+                return await asyncio.gather(*(batcher.submit(item) for item in items), return_exceptions=True)
+            finally:
+                await batcher.stop()
+        return asyncio.run(run())
+
+    def test_results_match_requests(self):
+        batcher = MicroBatcher(self._handler, max_batch_size=8, max_wait_ms=20)
+        results = self._run(batcher, list(range(20)))
+        self.assertEqual(results, [item * 2 for item in range(20)])
+        self.assertLess(len(self.batches), 20)
+        self.assertTrue(all(len(batch) <= 8 for batch in self.batches))
+        self.assertEqual(batcher.items, 20)
+        self.assertNotIn(threading.main_thread().name, self.threads)
+
+    def test_errors_stay_with_their_request(self):
+        batcher = MicroBatcher(self._handler, max_batch_size=8, max_wait_ms=20)
+        results = self._run(batcher, [1, -1, 2])
+        self.assertEqual(results[0], 2)
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(results[2], 4)
+
+    def test_handler_failure_fails_whole_batch(self):
+        def failing(items):
+            raise RuntimeError('model unavailable')
+        results = self._run(MicroBatcher(failing, max_wait_ms=20), [1, 2])
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+    def test_mismatched_result_count_fails_batch(self):
+        results = self._run(MicroBatcher(lambda items: items[:-1], max_wait_ms=20), [1, 2, 3])
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        
+    def test_stop_fails_undispatched_requests(self):
+        release = threading.Event()
+        def blocking(items):
+            release.wait()
+            return list(items)
+        
+        async def run():
+            batcher = MicroBatcher(blocking, max_batch_size=1, max_wait_ms=0, workers=1)
+            batcher.start()
+            requests = [asyncio.ensure_future(batcher.submit(item)) for item in range(4)]
+            await asyncio.sleep(0.05)   # first batch running, second held by the collector, rest queued
+            stopping = asyncio.ensure_future(batcher.stop())
+            await asyncio.sleep(0.05)
+            release.set()
+            await stopping
+            return await asyncio.gather(*requests, return_exceptions=True)
+        results = asyncio.run(run())
+        self.assertEqual(results[0], 0)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results[1:]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+
+from portfolio.pnl_engine import PnLEngine
+
+class TestPnLEngine(unittest.TestCase):
+    def test_matches_naive_valuation(self):
+        rng = np.random.default_rng(4)
+        engine = PnLEngine()
+        symbols = [f'S{i}' for i in range(30)]
+        prices = dict(zip(symbols, rng.uniform(10, 100, 30)))
+        
+        for _ in range(400):
+            symbol = symbols[rng.integers(30)]
+            engine.apply_fill(f'P{rng.integers(25)}', symbol, float(rng.integers(-50, 100)) or 1.0, prices[symbol])
+        for _ in range(20):
+            moved = rng.choice(symbols, 10)
+            ticks = rng.uniform(10, 100, 10)
+            prices.update(zip(moved, ticks))
+            engine.on_ticks(list(moved), ticks)
+            
+        for p, portfolio in enumerate(engine.portfolios):
+            market_value = cost_value = 0.0
+            for (row, column), (quantity, cost) in engine._positions.items():
+                if row == p:
+                    market_value += quantity * prices[engine.symbols[column]]
+                    cost_value += quantity * cost
+            snapshot = engine.snapshot(portfolio)
+            self.assertAlmostEqual(snapshot['net_exposure'], market_value, places=6)
+            self.assertAlmostEqual(snapshot['unrealized'], market_value - cost_value, places=6)
+            
+    def test_realized_pnl_and_threshold_events(self):
+        engine = PnLEngine(threshold=50.0)
+        received = []
+        engine.subscribe(received.extend)
+        engine.apply_fill('A', 'AAA', 10, 100.0)
+        engine.apply_fill('B', 'AAA', -5, 100.0)
+        engine.apply_fill('A', 'AAA', -4, 110.0)
+        
+        self.assertEqual(engine.snapshot('A')['realized'], 40.0)
+        self.assertEqual(engine.on_ticks(['AAA'], [104.0]), [])
+        
+        events = engine.on_ticks(['AAA', 'AAA'], [90.0, 115.0])
+        self.assertEqual(events, received)
+        self.assertEqual([event['portfolio'] for event in events], ['A', 'B'])
+        self.assertEqual(events[0]['unrealized'], 6 * 15.0)
+        self.assertEqual(events[1]['unrealized'], -5 * 15.0)
+        
+    def test_events_only_for_changed_portfolios(self):
+        engine = PnLEngine()
+        engine.apply_fill('A', 'X', 10, 100.0)
+        engine.apply_fill('B', 'X', 5, 100.0)
+        engine.apply_fill('C', 'Y', 5, 50.0)
+        
+        events = engine.on_ticks(['X'], [101.0])
+        self.assertEqual([event['portfolio'] for event in events], ['A', 'B'])
+        # Same price again, and a tick for a symbol only C holds
+        self.assertEqual(engine.on_ticks(['X'], [101.0]), [])
+        self.assertEqual([event['portfolio'] for event in engine.on_ticks(['Y'], [51.0])], ['C'])
+        
+        # A fill is reported on the next batch even if its symbols did not tick
+        engine.apply_fill('A', 'X', 10, 90.0)
+        self.assertEqual([event['portfolio'] for event in engine.on_ticks(['Y'], [51.0])], ['A'])
+        
+    def test_growth_beyond_capacity_and_zero_fills(self):
+        engine = PnLEngine(capacity=2)
+        for i in range(100):
+            engine.apply_fill(f'P{i}', f'S{i % 7}', 10, 100.0 + i % 7)
+            engine.apply_fill(f'P{i}', f'S{i % 7}', -4, 110.0 + i % 7)
+        self.assertEqual(len(engine.realized), 100)
+        np.testing.assert_allclose(engine.realized, 40.0)
+        np.testing.assert_allclose(engine.prices, 100.0 + np.arange(7))
+        engine.on_ticks(['S0'], [105.0])
+        self.assertEqual(engine.snapshot('P98')['unrealized'], 6 * 5.0)
+        
+        with self.assertRaises(ValueError):
+            engine.apply_fill('Q', 'S0', 0, 100.0)
+        self.assertNotIn('Q', engine.portfolios)
@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from portfolio.portfolio_analyzer import PortfolioAnalyzer
+from portfolio.position_book import PositionBook
+
+class TestPositionBook(unittest.TestCase):
+    def test_aggregates_match_full_recomputation(self):
+        rng = np.random.default_rng(2)
+        book = PositionBook(capacity=4)
+        book.RESYNC_EVERY = 50
+        quantities, prices, initial = {}, {}, {}
+        
+        for step in range(2000):
+            symbol = f'S{rng.integers(40)}'
+            action = rng.random()
+            if action < 0.2:
+                quantities[symbol], prices[symbol] = rng.uniform(1, 100), rng.uniform(10, 500)
+                initial[symbol] = rng.uniform(10, 500) if rng.random() < 0.7 else np.nan
+                book.add(symbol, quantities[symbol], prices[symbol], initial[symbol])
+            elif action < 0.3:
+                book.remove(symbol)
+                quantities.pop(symbol, None)
+            elif symbol in quantities:
+                prices[symbol] = rng.uniform(10, 500)
+                book.update_price(symbol, prices[symbol])
+        
+        total = sum(quantities[s] * prices[s] for s in quantities)
+        weighted = sum(quantities[s] * prices[s] * (prices[s] / initial[s] - 1)
+                       for s in quantities if not np.isnan(initial[s]))
+        self.assertEqual(sorted(book.symbols), sorted(quantities))
+        self.assertAlmostEqual(book.total_value, total, places=6)
+        self.assertAlmostEqual(book.portfolio_return, weighted / total, places=9)
+        for symbol in quantities:
+            row = book.index_of(symbol)
+            self.assertEqual(book.quantities[row], quantities[symbol])
+            self.assertEqual(book.prices[row], prices[symbol])
+            
+    def test_analyzer_summary(self):
+        analyzer = PortfolioAnalyzer()
+        analyzer.update_historical_data('AAA', pd.DataFrame({'close': [50.0, 60.0]}))
+        analyzer.add_position('AAA', 10, 100.0)
+        analyzer.add_position('BBB', 5, 200.0)
+        analyzer.update_prices({'AAA': 75.0, 'ZZZ': 1.0})
+        
+        summary = analyzer.get_portfolio_summary()
+        self.assertEqual(summary['metrics']['total_value'], 1750.0)
+        self.assertAlmostEqual(summary['metrics']['return'], 750 / 1750 * 0.5)
+        self.assertEqual(dict(analyzer.prices), {'AAA': 75.0, 'BBB': 200.0})
+        self.assertEqual(analyzer.calculate_returns(), {'AAA': 0.5})
+        
+        version = analyzer.get_state_version()
+        analyzer.update_prices({'AAA': 75.0})
+        self.assertEqual(analyzer.get_state_version(), version)
+        analyzer.update_prices({'BBB': 201.0})
+        self.assertNotEqual(analyzer.get_state_version(), version)
+        
+    def test_analyzer_mappings_write_through(self):
+        analyzer = PortfolioAnalyzer()
+        analyzer.add_position('AAA', 10, 100.0)
+        analyzer.positions['AAA'] = 20
+        analyzer.prices['AAA'] = 110.0
+        analyzer.positions['BBB'] = 5
+        self.assertEqual(analyzer.get_portfolio_value(), 2200.0)
+        self.assertEqual(dict(analyzer.positions), {'AAA': 20.0, 'BBB': 5.0})
+        with self.assertRaises(KeyError):
+            analyzer.prices['ZZZ'] = 1.0
+        
+        del analyzer.prices['BBB']
+        self.assertNotIn('BBB', analyzer.positions)
+        
+        # Direct history edits move the reference price returns are measured from
+        analyzer.historical_data['AAA'] = pd.DataFrame({'close': [55.0]})
+        self.assertEqual(analyzer.calculate_returns(), {'AAA': 1.0})
+        self.assertAlmostEqual(analyzer.calculate_portfolio_metrics()['return'], 1.0)
+        del analyzer.historical_data['AAA']
+        self.assertEqual(analyzer.calculate_returns(), {})
@@ -0,0 +1,70 @@
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import mean_absolute_percentage_error
+from sklearn.model_selection import TimeSeriesSplit
+
+from models.model_registry import ModelRegistry
+from models.prediction_manager import PredictionManager
+
+class TestPredictionManager(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(9)
+        features = pd.DataFrame(rng.normal(size=(240, 3)), columns=['returns', 'volatility', 'ma_50'])
+        features['target'] = 100 + features @ np.array([2.0, -1.0, 0.5]) + rng.normal(0, 0.1, 240)
+        self.data = features
+        
+    def test_parallel_cv_refit_and_registry(self):
+        with tempfile.TemporaryDirectory() as directory:
+            manager = PredictionManager(n_jobs=2, registry=ModelRegistry(directory))
+            manager.train_models(self.data, 'target')
+            manager.wait_for_refit()
+            
+            X, y = self.data.drop('target', axis=1), self.data['target']
+            for name, model in manager._model_specs().items():
+                scores = [mean_absolute_percentage_error(y.iloc[val], clone(model).fit(X.iloc[train], y.iloc[train]).predict(X.iloc[val]))
+                          for train, val in TimeSeriesSplit(n_splits=5).split(X)]
+                self.assertAlmostEqual(manager.model_metrics[name]['cv_mape'], np.mean(scores))
+                # Refit on all rows, not the last fold
+                np.testing.assert_allclose(manager.models[name].predict(X), clone(model).fit(X, y).predict(X))
+                
+            self.assertEqual(manager.model_versions, {'rf': 1, 'gb': 1})
+            manager.train_models(self.data, 'target', background_refit=False)
+            self.assertEqual(manager.registry.latest_version('rf'), 2)
+            loaded = manager.registry.load('gb', version=1)
+            np.testing.assert_allclose(loaded.predict(X), manager.models['gb'].predict(X))
+            self.assertIn('prediction', manager.get_ensemble_prediction(X.tail(3)))
+            
+    def test_failed_refit_keeps_previous_models(self):
+        with tempfile.TemporaryDirectory() as directory:
+            manager = PredictionManager(n_jobs=1, registry=ModelRegistry(directory))
+            manager.train_models(self.data, 'target', background_refit=False)
+            models = manager.models
+            X = self.data.drop('target', axis=1)
+            expected = manager.get_ensemble_prediction(X.tail(3))['prediction']
+            
+            def full_disk(*args, **kwargs):
+                raise OSError('disk full')
+            manager.registry.register = full_disk
+            manager.train_models(self.data, 'target')
+            # The failure is reported once, then the last good models keep serving
+            with self.assertRaises(OSError):
+                manager.wait_for_refit()
+            self.assertIsInstance(manager.refit_error, OSError)
+            manager.wait_for_refit()
+            self.assertIs(manager.models, models)
+            np.testing.assert_allclose(manager.get_ensemble_prediction(X.tail(3))['prediction'], expected)
+            
+            # A stale failure is not re-raised by the next training run, only its own
+            manager.train_models(self.data, 'target')
+            with self.assertRaises(OSError):
+                manager.train_models(self.data, 'target', background_refit=False)
+            del manager.registry.register
+            manager.train_models(self.data, 'target', background_refit=False)
+            self.assertIsNone(manager.refit_error)
+            self.assertEqual(manager.model_versions, {'rf': 2, 'gb': 2})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+from portfolio.covariance_engine import ReturnMoments
+from portfolio.risk_engine import RiskEngine, var_cvar
+
+class TestRiskEngine(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.returns = pd.DataFrame(
+            rng.multivariate_normal([0.0005, 0.0003, 0.0008],
+                                    [[4e-4, 1e-4, 5e-5], [1e-4, 2e-4, 2e-5], [5e-5, 2e-5, 9e-4]], 1000),
+            columns=['AAA', 'BBB', 'CCC']
+        )
+        self.weights = np.array([0.5, 0.3, 0.2])
+        self.moments = ReturnMoments(self.returns)
+        
+    def test_monte_carlo_matches_normal_quantiles(self):
+        engine = RiskEngine(self.moments, seed=1)
+        results = engine.monte_carlo_var(self.weights, [0.95, 0.99], n_scenarios=200_000)
+        
+        mean = self.moments.mean @ self.weights
+        std = self.moments.portfolio_volatility(self.weights) / np.sqrt(252)
+        for level in (0.95, 0.99):
+            z = norm.ppf(1 - level)
+            self.assertAlmostEqual(results[level]['var'], mean + z * std, delta=0.02 * std)
+            self.assertAlmostEqual(results[level]['cvar'], mean - std * norm.pdf(z) / (1 - level), delta=0.02 * std)
+            
+    def test_seeded_results_do_not_depend_on_chunk_size(self):
+        small = RiskEngine(self.moments, seed=5, chunk_size=777).simulate_portfolio_returns(self.weights, 5000)
+        large = RiskEngine(self.moments, seed=5).simulate_portfolio_returns(self.weights, 5000)
+        
+        np.testing.assert_allclose(small, large)
+        
+    def test_stress_test_matches_per_scenario_copies(self):
+        scenarios = [{'AAA': -0.5}, {'BBB': 0.2, 'CCC': -1.0}, {'ZZZ': 3.0}]
+        results = RiskEngine(self.moments).stress_test(self.weights, scenarios)
+        
+        for scenario, result in zip(scenarios, results):
+            adjusted = self.returns.copy()
+            for symbol, impact in scenario.items():
+                if symbol in adjusted.columns:
+                    adjusted[symbol] = adjusted[symbol] * (1 + impact)
+            self.assertAlmostEqual(result, np.sum(adjusted.mean() * self.weights) * 252)
+            
+    def test_var_cvar_ordering(self):
+        results = var_cvar(np.random.default_rng(0).standard_normal(10_000), [0.9, 0.95, 0.99])
+        
+        self.assertLess(results[0.99]['var'], results[0.95]['var'])
+        for level in results:
+            self.assertLessEqual(results[level]['cvar'], results[level]['var'])
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from models.serving_registry import ServingRegistry
+
+class TestServingRegistry(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.loads = []
+        for symbol in ('AAA', 'BBB', 'CCC'):
+            self._write(symbol, 'v1')
+            
+    def _write(self, symbol, content):
+        with open(os.path.join(self.directory, f'{symbol}_model.h5'), 'w') as f:
+            f.write(content)
+            
+    def _loader(self, directory, symbol):
+        self.loads.append(symbol)
+        time.sleep(0.01)
+        with open(os.path.join(directory, f'{symbol}_model.h5')) as f:
+            return (symbol, f.read()), 400
+        
+    def test_lazy_lru_budget(self):
+        registry = ServingRegistry(self._loader, self.directory, memory_budget_mb=1000 / 2**20)
+        self.assertEqual(registry.symbols(), ['AAA', 'BBB', 'CCC'])
+        self.assertEqual(self.loads, [])
+        
+        threads = [threading.Thread(target=registry.get, args=('AAA',)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.loads, ['AAA'])
+        
+        registry.get('BBB')
+        registry.get('AAA')
+        registry.get('CCC')   # over budget: BBB was least recently used
+        self.assertEqual(list(registry._entries), ['AAA', 'CCC'])
+        self.assertEqual(registry.loaded_bytes, 800)
+        with self.assertRaises(KeyError):
+            registry.get('ZZZ')
+            
+    def test_hot_swap_on_refresh(self):
+        registry = ServingRegistry(self._loader, self.directory)
+        old = registry.get('AAA')
+        self._write('AAA', 'v2')
+        os.utime(os.path.join(self.directory, 'AAA_model.h5'), ns=(1, time.time_ns() + 10**9))
+        self._write('DDD', 'v1')
+        
+        self.assertEqual(registry.refresh(), ['AAA'])
+        self.assertEqual(old, ('AAA', 'v1'))
+        self.assertEqual(registry.get('AAA'), ('AAA', 'v2'))
+        self.assertIn('DDD', registry)
+        
+    def test_failed_reload_keeps_previous_version(self):
+        registry = ServingRegistry(self._loader, self.directory)
+        registry.get('AAA')
+        self._write('AAA', 'partial')
+        os.utime(os.path.join(self.directory, 'AAA_model.h5'), ns=(1, time.time_ns() + 10**9))
+        registry.loader = lambda directory, symbol: 1 / 0
+        
+        with self.assertLogs('models.serving_registry', 'ERROR'):
+            self.assertEqual(registry.refresh(), [])
+        self.assertEqual(registry.get('AAA'), ('AAA', 'v1'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from data_ingestion import snapshot_service
+from data_ingestion.snapshot_service import MarketSnapshot, SnapshotRefresher
+
+def daily_bars(periods=60, last_close=100.0):
+    close = np.linspace(last_close - periods + 1, last_close, periods)
+    return pd.DataFrame({
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+        'volume': np.full(periods, 1000.0)
+    }, index=pd.bdate_range('2024-01-01', periods=periods))
+
+class TestMarketSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.calls = []
+        self.close = 100.0
+        
+    def _loader(self, symbol):
+        self.calls.append(symbol)
+        time.sleep(0.05)
+        return daily_bars(last_close=self.close)
+        
+    def test_single_flight_and_read_only_mapping(self):
+        snapshot = MarketSnapshot(self.directory, loader=self._loader)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(snapshot.get('aapl'))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+            
+        self.assertEqual(self.calls, ['AAPL'])
+        self.assertTrue(all(len(bars) == 60 for bars in results))
+        self.assertIsInstance(results[0], np.memmap)
+        with self.assertRaises(ValueError):
+            results[0]['close'][0] = 0
+        # Indicators are warmed up over the full history
+        self.assertFalse(np.isnan(results[0]['rsi'][-1]))
+        
+    def test_refresh_respects_max_age_and_readers_see_new_version(self):
+        snapshot = MarketSnapshot(self.directory, loader=self._loader, max_age=3600)
+        self.assertEqual(snapshot.get('AAPL')['close'][-1], 100.0)
+        self.assertFalse(snapshot.refresh('AAPL'))
+        
+        self.close = 120.0
+        self.assertTrue(snapshot.refresh('AAPL', force=True))
+        self.assertEqual(snapshot.get('AAPL')['close'][-1], 120.0)
+        self.assertEqual(len(self.calls), 2)
+        
+    def test_latest_closes_never_fetches(self):
+        snapshot = MarketSnapshot(self.directory, loader=self._loader)
+        snapshot.get('MSFT')
+        self.assertEqual(snapshot.latest_closes(['MSFT', 'TSLA']), {'MSFT': 100.0})
+        self.assertEqual(self.calls, ['MSFT'])
+        
+    def test_rejects_invalid_symbols(self):
+        snapshot = MarketSnapshot(self.directory, loader=self._loader)
+        with self.assertRaises(ValueError):
+            snapshot.get('../etc/passwd')
+            
+    def test_only_one_refresher_leads(self):
+        snapshot = MarketSnapshot(self.directory, loader=self._loader)
+        first = SnapshotRefresher(snapshot, ['AAPL'])
+        second = SnapshotRefresher(snapshot, ['AAPL'])
+        self.assertTrue(first._acquire_leadership())
+        self.assertFalse(second._acquire_leadership())
+        first._leader_file.close()
+        self.assertTrue(second._acquire_leadership())
+        second._leader_file.close()
+        
+    def test_process_local_locks_without_fcntl(self):
+        with patch.object(snapshot_service, 'fcntl', None):
+            snapshot = MarketSnapshot(self.directory, loader=self._loader)
+            threads = [threading.Thread(target=snapshot.get, args=('AAPL',)) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(self.calls, ['AAPL'])
+            self.assertTrue(SnapshotRefresher(snapshot, ['AAPL'])._acquire_leadership())
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'AAPL.lock')))
+
+    def test_refreshes_merge_recent_bars_onto_full_history(self):
+        history = daily_bars(periods=400)
+        recent = history.iloc[-100:].copy()
+        recent.iloc[-1, recent.columns.get_loc('close')] = 250.0
+        snapshot = MarketSnapshot(self.directory, loader=lambda symbol: history,
+                                  update_loader=lambda symbol: recent)
+        self.assertEqual(len(snapshot.get('AAPL')), 400)
+        
+        self.assertTrue(snapshot.refresh('AAPL', force=True))
+        bars = snapshot.get('AAPL')
+        self.assertEqual(len(bars), 400)
+        self.assertEqual(bars['close'][-1], 250.0)
+        np.testing.assert_array_equal(bars['close'][:-1], history['close'].to_numpy()[:-1])
+        
+        # Recent bars no longer overlapping the snapshot trigger a full fetch
+        later = daily_bars(periods=500)
+        history, recent = later, later.iloc[-100:]
+        self.assertTrue(snapshot.refresh('AAPL', force=True))
+        self.assertEqual(len(snapshot.get('AAPL')), 500)
+        
+    def test_refresher_survives_failing_refreshes(self):
+        snapshot = MarketSnapshot(self.directory, loader=self._loader)
+        refresher = SnapshotRefresher(snapshot, ['AAPL', 'MSFT'], interval=0.01)
+        attempts = []
+        def refresh(symbol, force=False):
+            attempts.append(symbol)
+            if len(attempts) >= 6:
+                refresher.stop()
+            raise OSError('disk full')
+        with patch.object(snapshot, 'refresh', side_effect=refresh), \
+                patch.object(refresher, '_acquire_leadership', return_value=True), \
+                self.assertLogs('data_ingestion.snapshot_service', 'ERROR'):
+            refresher.start()
+            refresher.join(5)
+        self.assertFalse(refresher.is_alive())
+        self.assertEqual(attempts[:4], ['AAPL', 'MSFT', 'AAPL', 'MSFT'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from analysis.feature_kernel import FeatureKernel
+from analysis.technical_analyzer import TechnicalAnalyzer
+
+class TestFeatureKernel(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(8)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 600)))
+        self.data = pd.DataFrame({
+            'date': pd.date_range('2020-01-01', periods=600),
+            'open': close, 'high': close * 1.01, 'low': close * 0.98, 'close': close,
+            'volume': rng.integers(1e5, 1e6, 600).astype(float)
+        })
+        self.kernel = FeatureKernel.from_frame(self.data)
+        
+    def test_rolling_statistics_match_pandas(self):
+        close = self.data['close']
+        for window in (20, 50, 200):
+            np.testing.assert_allclose(self.kernel.rolling_mean(window), close.rolling(window).mean(), rtol=1e-10)
+            np.testing.assert_allclose(self.kernel.rolling_std(window), close.rolling(window).std(), rtol=1e-7)
+        np.testing.assert_allclose(self.kernel.rolling_mean(20, 'returns'), close.pct_change().rolling(20).mean(),
+                                   rtol=1e-7, atol=1e-14)
+            
+    def test_long_low_volatility_series(self):
+        from numpy.lib.stride_tricks import sliding_window_view
+        rng = np.random.default_rng(1)
+        close = np.linspace(1000, 4000, 300000) + rng.normal(0, 0.05, 300000)
+        kernel = FeatureKernel(close)
+        
+        exact = sliding_window_view(close, 20).std(axis=1, ddof=1)
+        np.testing.assert_allclose(kernel.rolling_std(20)[19:], exact, rtol=1e-8)
+        np.testing.assert_allclose(kernel.rolling_mean(20)[19:], sliding_window_view(close, 20).mean(axis=1), rtol=1e-12)
+        
+    def test_panel_with_late_columns_across_blocks(self):
+        rng = np.random.default_rng(5)
+        panel = pd.DataFrame(100 + np.cumsum(rng.normal(0, 1, (3000, 3)), axis=0))
+        panel.iloc[:1500, 1] = np.nan
+        panel.iloc[:2990, 2] = np.nan
+        kernel = FeatureKernel(panel.to_numpy())
+        
+        for window in (20, 1500):
+            np.testing.assert_allclose(kernel.rolling_mean(window), panel.rolling(window).mean(), rtol=1e-10)
+            np.testing.assert_allclose(kernel.rolling_std(window), panel.rolling(window).std(), rtol=1e-7)
+            
+    def test_rsi_on_flat_and_rising_windows(self):
+        close = pd.Series(np.concatenate([np.full(30, 100.0), np.arange(101.0, 121.0)]))
+        delta = close.diff()
+        gains, losses = delta.clip(lower=0).rolling(14).mean(), (-delta.clip(upper=0)).rolling(14).mean()
+        expected = 100 - 100 / (1 + gains / losses)
+        rsi = FeatureKernel(close.to_numpy()).rsi(14)
+        np.testing.assert_array_equal(rsi, expected)
+        self.assertTrue(np.isnan(rsi[20]))
+        self.assertEqual(rsi[-1], 100.0)
+        
+    def test_outputs_are_read_only(self):
+        close = self.data['close'].to_numpy(copy=True)
+        kernel = FeatureKernel(close)
+        for values in (kernel.rolling_mean(20), kernel.rolling_std(20), kernel.values('close'), kernel.returns):
+            with self.assertRaises(ValueError):
+                values[-1] = 0.0
+        close[0] = 1.0   # the caller's own array is untouched
+        
+    def test_atr_and_drawdown(self):
+        previous = self.data['close'].shift()
+        true_range = pd.concat([self.data['high'] - self.data['low'], (self.data['high'] - previous).abs(),
+                                (self.data['low'] - previous).abs()], axis=1).max(axis=1)
+        close = self.data['close']
+        
+        np.testing.assert_allclose(self.kernel.atr(14)[14:], true_range.rolling(14).mean()[14:], rtol=1e-10)
+        self.assertAlmostEqual(self.kernel.max_drawdown, (close / close.cummax() - 1).min())
+        
+    def test_analysis_is_memoized_per_bar(self):
+        analyzer = TechnicalAnalyzer()
+        first = analyzer.analyze_stock(self.data, symbol='AAA')
+        
+        self.assertIs(analyzer.analyze_stock(self.data, symbol='AAA'), first)
+        self.assertIsNot(analyzer.analyze_stock(self.data.iloc[:-1], symbol='AAA'), first)
+        self.assertIn(first['overall_signal']['signal'], ('buy', 'sell'))
+        self.assertLessEqual(first['risk_metrics']['max_drawdown'], 0)
+        
+class TestUniverseAnalysis(unittest.TestCase):
+    def test_matches_single_symbol_analysis(self):
+        rng = np.random.default_rng(12)
+        dates = pd.date_range('2021-01-01', periods=300)
+        symbols = [f'S{i}' for i in range(6)]
+        close = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.015, (300, 6)), axis=0)),
+                             index=dates, columns=symbols)
+        high, low = close * 1.01, close * 0.985
+        volume = pd.DataFrame(rng.integers(1e5, 1e6, (300, 6)).astype(float), index=dates, columns=symbols)
+        
+        analyzer = TechnicalAnalyzer()
+        ranking = analyzer.analyze_universe(close, high, low, volume)
+        self.assertTrue(ranking['score'].is_monotonic_decreasing)
+        
+        for symbol in symbols:
+            data = pd.DataFrame({'close': close[symbol], 'high': high[symbol],
+                                 'low': low[symbol], 'volume': volume[symbol]})
+            single = analyzer.analyze_stock(data)
+            row = ranking.loc[symbol]
+            
+            self.assertEqual(row['signal'], single['overall_signal']['signal'])
+            self.assertAlmostEqual(row['strength'], single['overall_signal']['strength'])
+            self.assertAlmostEqual(row['confidence'], single['overall_signal']['confidence'])
+            self.assertEqual(row['against_trend'], single['overall_signal']['against_trend'])
+            for metric in ('volatility', 'max_drawdown', 'var_95', 'risk_reward_ratio'):
+                self.assertAlmostEqual(row[metric], single['risk_metrics'][metric])
+            for stop in ('technical_stop', 'risk_adjusted_stop', 'trailing_stop'):
+                self.assertAlmostEqual(row[stop], single['stop_loss'][stop])
@@ -0,0 +1,32 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from models import train_model
+
+def _worker_threads():
+    import numpy  # noqa: F401  (imported before anything can change the environment)
+    return os.environ.get('OPENBLAS_NUM_THREADS')
+
+class TestTrainModel(unittest.TestCase):
+    def test_spawned_workers_inherit_thread_limits(self):
+        before = os.environ.get('OPENBLAS_NUM_THREADS')
+        context = multiprocessing.get_context('spawn')
+        with train_model._thread_limits(3), ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            self.assertEqual(executor.submit(_worker_threads).result(), '3')
+        self.assertEqual(os.environ.get('OPENBLAS_NUM_THREADS'), before)
+        
+    def test_checkpoints_append_and_latest_row_wins(self):
+        path = os.path.join(tempfile.mkdtemp(), 'results.csv')
+        train_model._checkpoint({'symbol': 'AAA', 'status': 'failed', 'error': 'no data'}, path)
+        train_model._checkpoint({'symbol': 'BBB', 'status': 'trained', 'fingerprint': 'f1'}, path)
+        train_model._checkpoint({'symbol': 'AAA', 'status': 'trained', 'fingerprint': 'f2'}, path)
+        
+        results = train_model.load_results(path).set_index('symbol')
+        self.assertEqual(list(results.index), ['BBB', 'AAA'])
+        self.assertEqual(results.loc['AAA', 'fingerprint'], 'f2')
+
+if __name__ == '__main__':
+    unittest.main()
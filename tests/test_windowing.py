@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from models.baseline_models import BaselineModels
+from models.windowing import sliding_windows, stream_windows
+
+class TestWindowing(unittest.TestCase):
+    def test_matches_loop_construction(self):
+        values = np.random.default_rng(1).normal(size=(50, 3))
+        X, y = sliding_windows(values, 7, horizon=2)
+        self.assertTrue(np.shares_memory(X, values))
+        self.assertEqual(X.shape, (42, 7, 3))
+        for i in range(len(X)):
+            np.testing.assert_array_equal(X[i], values[i:i + 7])
+            np.testing.assert_array_equal(y[i], values[i + 8])
+            
+        X, y = sliding_windows(values[:5, 0], 7)
+        self.assertEqual((X.shape, y.shape), ((0, 7), (0,)))
+        
+    def test_stream_matches_full_series(self):
+        values = np.random.default_rng(3).normal(size=103)
+        chunks = np.array_split(values, [4, 10, 11, 60])
+        streamed = list(stream_windows(chunks, 6, horizon=2))
+        X, y = sliding_windows(values, 6, horizon=2)
+        np.testing.assert_array_equal(np.concatenate([part[0] for part in streamed]), X)
+        np.testing.assert_array_equal(np.concatenate([part[1] for part in streamed]), y)
+        
+    def test_memmap_backed_views(self):
+        values = np.arange(100, dtype=np.float64)
+        with tempfile.TemporaryDirectory() as directory:
+            X, y = sliding_windows(values, 10, memmap_path=os.path.join(directory, 'series.npy'))
+            self.assertIsInstance(y, np.memmap)
+            np.testing.assert_array_equal(X[-1], values[89:99])
+            self.assertEqual(y[-1], 99)
+            del X, y
+            
+    def test_linear_baseline_windows(self):
+        close = 100 + np.cumsum(np.random.default_rng(2).normal(size=80))
+        baselines = BaselineModels()
+        baselines.train_linear_model(pd.DataFrame({'close': close}), window=5)
+        
+        X = np.array([close[i:i + 5] for i in range(75)])
+        expected = LinearRegression().fit(X, close[5:])
+        np.testing.assert_allclose(baselines.models['linear']['model'].coef_, expected.coef_)
+
+if __name__ == '__main__':
+    unittest.main()